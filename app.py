@@ -2,6 +2,8 @@ import streamlit as st
 import os
 import glob
 import json
+import importlib
+from datetime import datetime
 from utils.data_manager import (
     initialize_session_state, save_all_data, 
     create_backup, init_directories,
@@ -9,12 +11,27 @@ from utils.data_manager import (
     CLASSES_DIR
 )
 from utils.constants import BACKUP_DIR
-import pages_ui.overview as p_overview
-import pages_ui.subjects as p_subjects
-import pages_ui.analytics as p_analytics
-import pages_ui.emails as p_emails
-import pages_ui.data_io as p_data_io
-import pages_ui.quick_entry as p_quick_entry
+from utils import perf, profiling
+from utils.memory import deep_sizeof, session_report, cache_report
+
+# ==========================================
+# PAGE REGISTRY
+# ==========================================
+# Page modules pull in pandas, plotly, xlsxwriter and smtplib. They are imported
+# the first time their page is opened, so the class dashboard starts without them.
+PAGES = {
+    "📊 Übersicht": ("pages_ui.overview", ()),
+    "📝 Schnelleingabe": ("pages_ui.quick_entry", ()),
+    "📈 Analyse": ("pages_ui.analytics", ()),
+    "📝 GESELLSCHAFT": ("pages_ui.subjects", ("GESELLSCHAFT",)),
+    "📝 SPRACHE": ("pages_ui.subjects", ("SPRACHE",)),
+    "✉️ Smart Emails": ("pages_ui.emails", ()),
+    "📁 Import/Export/Backup": ("pages_ui.data_io", ()),
+}
+
+def render_page(label):
+    module_name, args = PAGES[label]
+    importlib.import_module(module_name).render(*args)
 
 # ==========================================
 # NEW: LANDING PAGE (CLASS DASHBOARD)
@@ -114,6 +131,49 @@ def render_class_dashboard():
 # MAIN APP
 # ==========================================
 
+def render_perf_panel():
+    """Sidebar panel with the timings of the last reruns (only with instrumentation enabled)"""
+    runs = st.session_state.get('perf_runs', [])
+    if not runs:
+        return
+    last = runs[-1]
+    with st.sidebar.expander("⏱️ System", expanded=False):
+        st.metric("Letzter Rerun", f"{last['total_ms']:.0f} ms", help=last['page'])
+        st.dataframe(
+            [{"Phase": name, "ms": ms} for name, ms in last['phases'].items()],
+            hide_index=True, use_container_width=True
+        )
+        (load_files, load_bytes), (save_files, save_bytes) = last['io']['load'], last['io']['save']
+        st.caption(
+            f"JSON gelesen: {load_files} Dateien, {load_bytes / 1024:.1f} KB | "
+            f"geschrieben: {save_files} Dateien, {save_bytes / 1024:.1f} KB"
+        )
+        if last['counters']:
+            st.dataframe(
+                [{"Funktion": name, "Aufrufe": n} for name, n in sorted(last['counters'].items())],
+                hide_index=True, use_container_width=True
+            )
+        st.line_chart([run['total_ms'] for run in runs], height=120)
+        if st.button("🧮 Speicher messen", key="perf_memory"):
+            state = {key: value for key, value in st.session_state.items()}
+            st.caption(f"Session: {deep_sizeof(state) / 1024:.0f} KB (gemeinsame Objekte einmal gezählt)")
+            st.dataframe(
+                [{"Schlüssel": key, "Typ": kind, "KB": round(size / 1024, 1)} for key, kind, size in session_report(state)],
+                hide_index=True, use_container_width=True
+            )
+            st.dataframe(
+                [{"Cache": kind, "Funktion": name, "Einträge": n, "KB": round(size / 1024, 1)}
+                 for kind, name, n, size in cache_report()],
+                hide_index=True, use_container_width=True
+            )
+        st.download_button(
+            f"⬇️ {len(runs)} Reruns (JSONL)",
+            data=perf.to_jsonl(runs).encode("utf-8"),
+            file_name=f"perf_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl",
+            mime="application/x-ndjson",
+            key="perf_export"
+        )
+
 def main():
     st.set_page_config(
         page_title="BBW Notenverwaltung",
@@ -121,10 +181,99 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
-    
+
+    # Opt-in instrumentation: NOTEN_PERF=1 or config['perf_instrumentation']
+    instrumented = perf.requested(st.session_state.get('config'))
+    if instrumented:
+        perf.start_run(st.session_state.get('current_page', "🏠 Alle Klassen"))
+    try:
+        render_app_profiled()
+    finally:
+        # Also runs when a page calls st.rerun(), so every rerun is recorded
+        if instrumented:
+            perf.add_run(st.session_state.setdefault('perf_runs', []), perf.finish_run())
+    if instrumented:
+        render_perf_panel()
+    render_profile_results()
+
+def render_app_profiled():
+    """render_app, under the profiler while the sidebar has armed it for the current page"""
+    request = st.session_state.get('profile_request')
+    if not request or request['page'] != st.session_state.get('current_page'):
+        render_app()
+        return
+
+    request['remaining'] -= 1
+    if request['remaining'] <= 0:
+        del st.session_state['profile_request']
+    try:
+        with profiling.capture(request['mode']) as result:
+            render_app()
+    finally:
+        results = st.session_state.setdefault('profile_results', [])
+        results.append({
+            'page': request['page'],
+            'mode': result.mode,
+            'seconds': result.seconds,
+            'path': profiling.save_capture(result, request['page']),
+            'top': profiling.top_functions(result),
+        })
+        del results[:-10]
+
+def render_profile_results():
+    """Top functions of the captured profiles below the page"""
+    results = st.session_state.get('profile_results')
+    if not results:
+        return
+    st.write("---")
+    with st.expander(f"🔬 Profile ({len(results)})", expanded=True):
+        choice = st.selectbox(
+            "Aufnahme", range(len(results)), index=len(results) - 1,
+            format_func=lambda i: f"{i + 1}. {results[i]['page']} – {results[i]['mode']}, {results[i]['seconds'] * 1000:.0f} ms",
+            key="profile_choice"
+        )
+        shown = results[choice]
+        st.caption(f"Datei: `{shown['path']}`")
+        st.dataframe(
+            shown['top'],
+            column_config={
+                "function": "Funktion",
+                "calls": "Aufrufe",
+                "self_ms": st.column_config.NumberColumn("Eigenzeit (ms)", format="%.1f"),
+                "total_ms": st.column_config.NumberColumn("Gesamt (ms)", format="%.1f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        if st.button("Profile ausblenden", key="profile_clear"):
+            del st.session_state['profile_results']
+            st.rerun()
+
+def render_profiler_controls(options):
+    """Sidebar switch for profiling the next reruns of one page (no restart needed)"""
+    with st.expander("🔬 Profiler"):
+        request = st.session_state.get('profile_request')
+        if request:
+            st.caption(f"{request['mode']}: noch {request['remaining']} Reruns von {request['page']}")
+            if st.button("⏹️ Stoppen", key="profile_stop", use_container_width=True):
+                del st.session_state['profile_request']
+                st.rerun()
+            return
+        page = st.selectbox("Seite", options, index=options.index(st.session_state.current_page), key="profile_page")
+        mode = st.radio(
+            "Modus", profiling.MODES, key="profile_mode",
+            format_func={"cprofile": "cProfile (exakt)", "sampling": "Sampling (wenig Overhead)"}.get
+        )
+        reruns = st.number_input("Reruns", min_value=1, max_value=20, value=3, key="profile_reruns")
+        if st.button("▶️ Aufnehmen", key="profile_start", use_container_width=True):
+            st.session_state.profile_request = {'page': page, 'mode': mode, 'remaining': int(reruns)}
+            st.rerun()
+
+def render_app():
     # Initialize system & Migration
-    init_directories()
-    initialize_session_state()
+    with perf.phase("init"):
+        init_directories()
+        initialize_session_state()
     
     if 'current_page' not in st.session_state:
         st.session_state.current_page = "🏠 Alle Klassen"
@@ -133,7 +282,8 @@ def main():
     with st.sidebar:
         st.title("📚 BBW Manager")
         
-        registry = get_class_registry()
+        with perf.phase("registry"):
+            registry = get_class_registry()
         current_class = next((c for c in registry if c['id'] == st.session_state.get('current_class_id')), None)
         
         if current_class:
@@ -144,16 +294,7 @@ def main():
         st.write("---")
         
         # NAVIGATION MENU
-        options = [
-            "🏠 Alle Klassen",
-            "📊 Übersicht",
-            "📝 Schnelleingabe",
-            "📈 Analyse", 
-            "📝 GESELLSCHAFT", 
-            "📝 SPRACHE", 
-            "✉️ Smart Emails", 
-            "📁 Import/Export/Backup" # Renamed
-        ]
+        options = ["🏠 Alle Klassen", *PAGES]
         
         if not current_class and st.session_state.current_page != "🏠 Alle Klassen":
             st.session_state.current_page = "🏠 Alle Klassen"
@@ -192,26 +333,17 @@ def main():
             success, msg = create_backup(auto=False)
             if success: st.info(msg)
             else: st.error(msg)
+
+        if current_class:
+            render_profiler_controls(options)
             
     # --- PAGE ROUTING ---
-    if st.session_state.current_page == "🏠 Alle Klassen":
-        render_class_dashboard()
-        
-    elif current_class:
-        if st.session_state.current_page == "📊 Übersicht":
-            p_overview.render()
-        elif st.session_state.current_page == "📝 Schnelleingabe":
-            p_quick_entry.render()
-        elif st.session_state.current_page == "📈 Analyse":
-            p_analytics.render()
-        elif st.session_state.current_page == "📝 GESELLSCHAFT":
-            p_subjects.render("GESELLSCHAFT")
-        elif st.session_state.current_page == "📝 SPRACHE":
-            p_subjects.render("SPRACHE")
-        elif st.session_state.current_page == "✉️ Smart Emails":
-            p_emails.render()
-        elif st.session_state.current_page == "📁 Import/Export/Backup":
-            p_data_io.render()
+    with perf.phase("page"):
+        if st.session_state.current_page == "🏠 Alle Klassen":
+            render_class_dashboard()
+
+        elif current_class:
+            render_page(st.session_state.current_page)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+import generate_demo_data as demo
+
+# Seeded synthetic classes in the current schema, at any size, built with the demo
+# data generator (same names, grading and random streams as generate_demo_data.py).
+# A dataset is written like the app's data folder (data/classes.json plus one
+# folder per class), so the benchmarks run the same file code paths as the app.
+
+SUBJECTS = demo.SUBJECTS
+REFERENCE_DATE = datetime(2026, 6, 30)  # fixed, so a seed always gives the same dates
+
+# name: (classes, students per class, assignments per class)
+SCALES = {
+    'tiny': (1, 6, 8),
+    'small': (1, 30, 50),
+    'team': (6, 25, 60),  # load test: the classes of a few colleagues
+    'medium': (1, 200, 300),
+    'school': (50, 30, 200),
+}
+
+
+def make_dataset(scale, seed=42):
+    """[(class_id, class_name, students, assignments), ...] for a SCALES entry"""
+    n_classes, n_students, n_assignments = SCALES[scale]
+    configs = demo.assignment_configs(n_assignments // len(SUBJECTS), REFERENCE_DATE, 300)
+    classes = []
+    # One random stream per class, like generate_demo_data.main
+    for c, class_seed in enumerate(np.random.SeedSequence(seed).spawn(n_classes)):
+        rng = np.random.default_rng(class_seed)
+        students = demo.generate_students(rng, n_students)
+        assignments = list(demo.generate_assignments(rng, students, configs))
+        classes.append((f"class_bench_{c:03d}", f"Bench {c + 1}", students, assignments))
+    return classes
+
+
+def write_dataset(classes, data_dir="data", config=None):
+    """Write classes like the app's data folder (registry, one folder per class)"""
+    from utils.schema import SCHEMA_VERSION, META_FILE
+
+    classes_dir = os.path.join(data_dir, "classes")
+    os.makedirs(classes_dir, exist_ok=True)
+    registry = []
+    for class_id, name, students, assignments in classes:
+        path = os.path.join(classes_dir, class_id)
+        os.makedirs(path, exist_ok=True)
+        files = {
+            "students.json": students,
+            "assignments.json": assignments,
+            "email_log.json": [],
+            "audit_log.json": [],
+            META_FILE: {"schema_version": SCHEMA_VERSION},
+        }
+        if config is not None:
+            files["config.json"] = config
+        for filename, content in files.items():
+            with open(os.path.join(path, filename), 'w', encoding='utf-8') as f:
+                json.dump(content, f, indent=2, ensure_ascii=False)
+        registry.append({"id": class_id, "name": name, "created_at": datetime(2025, 8, 1).isoformat()})
+    with open(os.path.join(data_dir, "classes.json"), 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,305 @@
+"""
+Load test: N concurrent Streamlit sessions (AppTest) on one shared data folder.
+
+    python -m benchmarks.load                                 # 4 sessions, 3 rounds each
+    python -m benchmarks.load --sessions 8 --iterations 5 --output load.json
+    python -m benchmarks.load --no-email                      # without the SMTP stand-in
+
+Every session runs the app script in this process, like the Streamlit server runs
+one script thread per browser tab, so the caches and the data folder are shared.
+One round of a session: open a class from the dashboard (overview), open a subject
+page, edit points and save, open the email center and send the weekly mail to a
+local SMTP stand-in, back to the dashboard.
+Reported: latency percentiles per step and per rerun, memory per session (session
+state size and process RSS), JSON bytes read/written (utils.perf), backups, mails.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from unittest.mock import MagicMock, patch
+
+from streamlit.logger import set_log_level
+from streamlit.runtime import Runtime
+from streamlit.components.v2.component_manager import BidiComponentManager
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.util import patch_config_options
+
+from utils import perf
+from utils.constants import DEFAULT_CONFIG, BACKUP_DIR
+from utils.data_manager import get_dir_size
+from utils.memory import deep_sizeof
+from .datasets import SCALES, SUBJECTS, make_dataset, write_dataset
+from .run import ROOT, run_meta
+from .smtp_server import LocalSMTPServer
+
+APP_PATH = os.path.join(ROOT, "app.py")
+DASHBOARD = "🏠 Alle Klassen"
+EMAIL_PAGE = "✉️ Smart Emails"
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ---------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------
+def percentiles(values):
+    """count, p50..p99 and max of a list of ms values (empty dict without values)"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {'count': len(ordered)}
+    for p in PERCENTILES:
+        # Nearest-rank percentile: exact for small samples, no interpolation
+        result[f"p{p}_ms"] = round(ordered[max(0, -(-p * len(ordered) // 100) - 1)], 2)
+    result['max_ms'] = round(ordered[-1], 2)
+    return result
+
+
+def process_rss():
+    """Resident memory of this process in bytes (None where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@contextmanager
+def shared_runtime():
+    """
+    One Runtime stand-in for all sessions, like the single Runtime of a Streamlit server.
+    AppTest installs a fresh mock Runtime per run and removes it afterwards, which
+    breaks runs in other threads; here every lookup returns the shared stand-in
+    (built like the one in AppTest._run of the installed Streamlit version).
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    with patch.object(Runtime, 'instance', classmethod(lambda cls: runtime)), \
+            patch.object(Runtime, 'exists', classmethod(lambda cls: True)), \
+            patch_config_options({"global.appTest": True}):  # nested per-run patches restore True
+        yield runtime
+
+
+# ---------------------------------------------------------
+# One simulated user
+# ---------------------------------------------------------
+class Session:
+    """One browser tab: an AppTest plus the timings of its steps"""
+
+    def __init__(self, index, class_ids, seed, timeout, email=True):
+        self.index = index
+        self.class_ids = class_ids
+        self.rng = random.Random(seed * 1000 + index)
+        self.email = email
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.steps = []   # (step, ms)
+        self.runs = []    # perf runs (one per rerun)
+        self.errors = []
+
+    def step(self, name, action):
+        start = time.perf_counter()
+        action()
+        self.steps.append((name, (time.perf_counter() - start) * 1000))
+        # Reruns recorded by utils.perf in this step; the history is emptied so nothing is counted twice
+        self.runs.extend(self.at.session_state.get('perf_runs', []))
+        self.at.session_state['perf_runs'] = []
+        if self.at.exception:
+            raise RuntimeError(f"{name}: {self.at.exception[0].value}")
+
+    def navigate(self, page):
+        self.at.sidebar.radio[0].set_value(page).run()
+
+    def edit_points(self, subject):
+        """Change the points of one student in the open assignment, then save"""
+        at = self.at
+        aid = at.selectbox(key=f"open_assignment_{subject}").value
+        assignment = next(a for a in at.session_state.assignments if a['id'] == aid)
+        row = self.rng.randrange(len(at.session_state.students))
+        points = round(self.rng.uniform(0.3, 1.0) * float(assignment['maxPoints']) * 2) / 2
+        at.session_state[f"entry_{aid}"] = {
+            "edited_rows": {row: {"Punkte": points}}, "added_rows": [], "deleted_rows": []
+        }
+        self.step("edit_points", at.run)
+        self.step("save_points", lambda: at.button(key=f"save_entry_{aid}").click().run())
+
+    def send_emails(self):
+        at = self.at
+        self.step("email_page", lambda: self.navigate(EMAIL_PAGE))
+        password = next(t for t in at.text_input if t.label == "Passwort")
+        self.step("email_login", lambda: password.set_value("stand-in").run())
+        send = next(b for b in at.button if b.label.startswith("🚀"))
+        self.step("send_emails", lambda: send.click().run())
+
+    def run(self, iterations):
+        at = self.at
+        try:
+            self.step("start", at.run)
+            for i in range(iterations):
+                class_id = self.class_ids[(self.index + i) % len(self.class_ids)]
+                if at.session_state.current_page != DASHBOARD:
+                    self.step("dashboard", lambda: self.navigate(DASHBOARD))
+                self.step("open_class", lambda: at.button(key=f"open_{class_id}").click().run())
+                subject = SUBJECTS[i % len(SUBJECTS)]
+                self.step("subject_page", lambda: self.navigate(f"📝 {subject}"))
+                self.edit_points(subject)
+                if self.email:
+                    self.send_emails()
+        except Exception as e:  # Keep the other sessions running; the error is reported
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+    def state_size(self):
+        return deep_sizeof(self.at.session_state.to_dict())
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+def run_load_test(sessions=4, iterations=3, scale='team', seed=42, timeout=120, email=True, log=print):
+    """Returns {'meta', 'steps', 'reruns', 'sessions', 'io', 'memory', 'backups', 'smtp', 'errors'}"""
+    classes = make_dataset(scale, seed=seed)
+    class_ids = [c[0] for c in classes]
+    cwd = os.getcwd()
+    previous_flag = os.environ.get(perf.ENV_FLAG)
+    os.environ[perf.ENV_FLAG] = "1"  # every session records its reruns
+    try:
+        with tempfile.TemporaryDirectory(prefix="load_") as workdir, shared_runtime(), \
+                (LocalSMTPServer() if email else nullcontext()) as smtp:
+            os.chdir(workdir)
+            config = json.loads(json.dumps(DEFAULT_CONFIG))
+            if smtp:
+                config['email'].update(smtp_server=smtp.host, smtp_port=smtp.port, sender_email="lehrer@example.ch")
+            write_dataset(classes, config=config)
+
+            # One unmeasured round first: page modules are imported once per process,
+            # so the RSS growth below is what the measured sessions add
+            Session(sessions, class_ids, seed, timeout, email=False).run(1)
+            users = [Session(i, class_ids, seed, timeout, email) for i in range(sessions)]
+            rss_before = process_rss()
+            barrier = threading.Barrier(sessions)
+
+            def start(user):
+                barrier.wait()  # all sessions start together
+                user.run(iterations)
+
+            threads = [threading.Thread(target=start, args=(u,), name=f"load-session-{u.index}") for u in users]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            wall_s = time.perf_counter() - started
+            rss_after = process_rss()
+
+            report = summarize(users, rss_before, rss_after)
+            report['meta'] = {
+                **run_meta([scale], seed),
+                'sessions': sessions, 'iterations': iterations, 'wall_s': round(wall_s, 2),
+            }
+            report['backups'] = {
+                'count': len(os.listdir(BACKUP_DIR)) if os.path.isdir(BACKUP_DIR) else 0,
+                'size_mb': get_dir_size(BACKUP_DIR),
+            }
+            report['smtp'] = {'messages': smtp.messages, 'bytes': smtp.bytes} if smtp else None
+    finally:
+        os.chdir(cwd)
+        if previous_flag is None:
+            os.environ.pop(perf.ENV_FLAG, None)
+        else:
+            os.environ[perf.ENV_FLAG] = previous_flag
+    for line in format_report(report):
+        log(line)
+    return report
+
+
+def summarize(users, rss_before, rss_after):
+    by_step = {}
+    for user in users:
+        for name, ms in user.steps:
+            by_step.setdefault(name, []).append(ms)
+    runs = [run for user in users for run in user.runs]
+    io = {
+        kind: {
+            'files': sum(run['io'][kind][0] for run in runs),
+            'bytes': sum(run['io'][kind][1] for run in runs),
+        }
+        for kind in ('load', 'save')
+    }
+    state_sizes = [user.state_size() for user in users]
+    rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    return {
+        'steps': {name: percentiles(values) for name, values in by_step.items()},
+        'reruns': percentiles([run['total_ms'] for run in runs]),
+        'sessions': [
+            {'index': u.index, 'steps': len(u.steps), 'reruns': len(u.runs), 'state_bytes': size, 'errors': u.errors}
+            for u, size in zip(users, state_sizes)
+        ],
+        'io': io,
+        'memory': {
+            'state_bytes_mean': round(statistics.fmean(state_sizes)) if state_sizes else 0,
+            'rss_bytes': rss_after,
+            'rss_growth_per_session_bytes': round(rss_delta / len(users)) if rss_delta is not None and users else None,
+        },
+        'errors': [f"session {u.index}: {e}" for u in users for e in u.errors],
+    }
+
+
+def format_report(report):
+    mb = 1024 * 1024
+    meta = report['meta']
+    yield f"{meta['sessions']} Sitzungen × {meta['iterations']} Runden in {meta['wall_s']:.1f} s"
+    yield f"{'Schritt':<14} {'n':>5} " + " ".join(f"{f'p{p}':>9}" for p in PERCENTILES) + f" {'max':>9}"
+    for name, stats in list(report['steps'].items()) + [("(rerun)", report['reruns'])]:
+        if stats:
+            yield f"{name:<14} {stats['count']:>5} " + " ".join(
+                f"{stats[f'p{p}_ms']:>9.0f}" for p in PERCENTILES
+            ) + f" {stats['max_ms']:>9.0f}  ms"
+    memory, io = report['memory'], report['io']
+    yield f"Sitzungszustand: Ø {memory['state_bytes_mean'] / 1024:.0f} KB pro Sitzung"
+    if memory['rss_bytes'] is not None:
+        yield f"Prozess: {memory['rss_bytes'] / mb:.0f} MB RSS, Zuwachs {memory['rss_growth_per_session_bytes'] / mb:.1f} MB pro Sitzung"
+    yield (f"JSON gelesen: {io['load']['files']} Dateien, {io['load']['bytes'] / mb:.1f} MB | "
+           f"geschrieben: {io['save']['files']} Dateien, {io['save']['bytes'] / mb:.1f} MB")
+    yield f"Backups: {report['backups']['count']} ({report['backups']['size_mb']} MB)"
+    if report['smtp']:
+        yield f"E-Mails: {report['smtp']['messages']} ({report['smtp']['bytes'] / 1024:.0f} KB)"
+    for error in report['errors']:
+        yield f"FEHLER {error}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest mit mehreren gleichzeitigen Sitzungen (AppTest)")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=3, help="Runden pro Sitzung")
+    parser.add_argument("--scale", choices=list(SCALES), default="team")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=120, help="Sekunden pro Rerun")
+    parser.add_argument("--no-email", action="store_true", help="Ohne E-Mail-Versand (SMTP-Stand-in)")
+    parser.add_argument("--output", help="JSON-Datei für die Ergebnisse")
+    args = parser.parse_args(argv)
+    set_log_level("error")  # bare-mode and deprecation warnings of every session rerun
+
+    output = os.path.abspath(args.output) if args.output else None
+    report = run_load_test(args.sessions, args.iterations, args.scale, args.seed, args.timeout, not args.no_email)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nErgebnisse: {output}")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
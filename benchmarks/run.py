@@ -0,0 +1,283 @@
+"""
+Benchmarks of the core hot paths over synthetic classes.
+
+    python -m benchmarks.run                                  # small, medium, school
+    python -m benchmarks.run --scales small --cases averages_loop overview_summary
+    python -m benchmarks.run --output base.json
+    python -m benchmarks.run --baseline base.json --fail-on-regression
+
+Every case runs in a temporary data folder; results are written as JSON
+(default: benchmarks/results/<timestamp>.json) and compared with a baseline file.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pandas as pd
+
+import utils.data_manager as data_manager
+import utils.grading as grading
+from utils.analytics import load_classes, build_cohort
+from utils.constants import DEFAULT_CONFIG, DEFAULT_TEMPLATES, BACKUP_DIR
+from utils.gradebook import GradeBook, build_class_summary, build_grade_matrix, diff_grade_matrix, weighted_average
+from utils.storage import load_class_data
+from utils.template_manager import render_template
+from .datasets import SCALES, SUBJECTS, make_dataset, write_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SCALES = ["small", "medium", "school"]
+
+
+# ---------------------------------------------------------
+# Session state outside a Streamlit run
+# ---------------------------------------------------------
+class _SessionState(dict):
+    """Dict with attribute access, standing in for st.session_state"""
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+@contextmanager
+def active_class(class_id, students, assignments):
+    """Run session-state based functions (grading, data_manager) against one class"""
+    state = _SessionState(
+        current_class_id=class_id, data_load_id="bench", data_version=0,
+        students=students, assignments=assignments, config=DEFAULT_CONFIG,
+        email_log=[], audit_log=[],
+    )
+    fake_st = SimpleNamespace(session_state=state)
+    with patch.object(data_manager, 'st', fake_st), patch.object(grading, 'st', fake_st):
+        yield state
+
+
+# ---------------------------------------------------------
+# Cases: setup(dataset) -> (function, teardown or None)
+# ---------------------------------------------------------
+def case_averages_loop(classes):
+    _, _, students, assignments = classes[0]
+
+    def run():
+        for s in students:
+            for subject in SUBJECTS:
+                weighted_average(assignments, s['id'], subject)
+    return run, None
+
+
+def case_averages_vectorized(classes):
+    _, _, students, assignments = classes[0]
+    return lambda: GradeBook(students, assignments).weighted_averages(SUBJECTS), None
+
+
+def case_overview_summary(classes):
+    _, _, students, assignments = classes[0]
+    return lambda: build_class_summary(students, assignments, SUBJECTS, book=GradeBook(students, assignments)), None
+
+
+def case_quick_entry_diff(classes):
+    _, _, students, assignments = classes[0]
+    original = build_grade_matrix(students, assignments)
+    edited = original.copy()
+    values = edited.to_numpy(copy=True).ravel()
+    values[::100] = 4.5  # about 1% of the cells
+    edited = pd.DataFrame(values.reshape(original.shape), index=original.index, columns=original.columns)
+    return lambda: diff_grade_matrix(original, edited), None
+
+
+def case_template_render(classes):
+    _, _, students, assignments = classes[0]
+    subject = SUBJECTS[0]
+    template = DEFAULT_TEMPLATES[0]
+
+    def run():
+        for s in students:
+            graded = [a for a in assignments if a['subject'] == subject and s['id'] in a['grades']]
+            render_template(template, s, subject, 4.5, graded)
+    return run, None
+
+
+def case_load_class(classes):
+    return lambda: load_class_data(classes[0][0]), None
+
+
+def case_save_all(classes):
+    class_id, _, students, assignments = classes[0]
+
+    def run():
+        with active_class(class_id, students, assignments):
+            data_manager.save_all_data(create_auto_backup=False)
+    return run, None
+
+
+def case_backup(classes):
+    def run():
+        ok, msg = data_manager.create_backup(auto=True)
+        assert ok, msg
+    # Backup folders are named by the second: remove them so every round copies anew
+    return run, lambda: shutil.rmtree(BACKUP_DIR, ignore_errors=True)
+
+
+def case_import_grades(classes):
+    class_id, _, students, assignments = classes[0]
+    sheet = pd.DataFrame({
+        'Anmeldename': [s['Anmeldename'] for s in students],
+        'Punkte': [round(i * 7.3 % 100, 1) for i in range(len(students))],
+    })
+
+    def run():
+        with active_class(class_id, students, assignments):
+            grading.grade_import_frame(sheet, students, 100)
+    return run, None
+
+
+def case_load_all_classes(classes):
+    return lambda: load_classes([c[0] for c in classes]), None
+
+
+def case_cohort(classes):
+    loaded = load_classes([c[0] for c in classes])
+    return lambda: build_cohort(loaded, SUBJECTS[0]), None
+
+
+CASES = {
+    'averages_loop': case_averages_loop,
+    'averages_vectorized': case_averages_vectorized,
+    'overview_summary': case_overview_summary,
+    'quick_entry_diff': case_quick_entry_diff,
+    'template_render': case_template_render,
+    'load_class': case_load_class,
+    'save_all': case_save_all,
+    'backup': case_backup,
+    'import_grades': case_import_grades,
+    'load_all_classes': case_load_all_classes,
+    'cohort': case_cohort,
+}
+MULTI_CLASS_CASES = {'load_all_classes', 'cohort'}  # only meaningful with several classes
+
+
+# ---------------------------------------------------------
+# Runner
+# ---------------------------------------------------------
+def measure(func, teardown=None, min_rounds=3, max_rounds=50, min_time=0.2):
+    """Repeat func until min_rounds and min_time are reached; timings in ms"""
+    times = []
+    while len(times) < min_rounds or (sum(times) < min_time and len(times) < max_rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if teardown:
+            teardown()
+    ms = [t * 1000 for t in times]
+    return {
+        'rounds': len(ms),
+        'min_ms': round(min(ms), 3),
+        'median_ms': round(statistics.median(ms), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'max_ms': round(max(ms), 3),
+    }
+
+
+def run_benchmarks(scales, cases=None, seed=42, min_rounds=3, max_rounds=50, min_time=0.2, log=print):
+    """Returns {'meta': ..., 'results': {"<scale>/<case>": timings}}"""
+    cases = cases or list(CASES)
+    results = {}
+    cwd = os.getcwd()
+    for scale in scales:
+        classes = make_dataset(scale, seed=seed)
+        with tempfile.TemporaryDirectory(prefix=f"bench_{scale}_") as workdir:
+            os.chdir(workdir)
+            try:
+                write_dataset(classes, config=DEFAULT_CONFIG)
+                for name in cases:
+                    if name in MULTI_CLASS_CASES and len(classes) < 2:
+                        continue
+                    func, teardown = CASES[name](classes)
+                    results[f"{scale}/{name}"] = timing = measure(func, teardown, min_rounds, max_rounds, min_time)
+                    log(f"{scale:>8} {name:<22} {timing['median_ms']:>10.2f} ms  ({timing['rounds']} rounds)")
+            finally:
+                os.chdir(cwd)
+    return {'meta': run_meta(scales, seed), 'results': results}
+
+
+def run_meta(scales, seed):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'scales': {scale: dict(zip(('classes', 'students', 'assignments'), SCALES[scale])) for scale in scales},
+    }
+
+
+def compare(results, baseline, threshold=0.2):
+    """Rows (key, baseline_ms, current_ms, ratio, status) for benchmarks present in both runs"""
+    rows = []
+    for key, timing in results['results'].items():
+        base = baseline['results'].get(key)
+        if not base:
+            continue
+        ratio = timing['median_ms'] / base['median_ms'] if base['median_ms'] else float('inf')
+        status = "slower" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "same"
+        rows.append((key, base['median_ms'], timing['median_ms'], ratio, status))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks der Kernfunktionen über synthetische Klassen")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=DEFAULT_SCALES)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-rounds", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Sekunden pro Benchmark (mindestens)")
+    parser.add_argument("--output", help="JSON-Datei für die Ergebnisse")
+    parser.add_argument("--baseline", help="Ergebnisse einer früheren Messung zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Toleranz für den Vergleich (0.2 = ±20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json"))
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    results = run_benchmarks(args.scales, args.cases, args.seed, args.min_rounds, min_time=args.min_time)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nErgebnisse: {output}")
+
+    if not baseline_path:
+        return 0
+    with open(baseline_path, encoding='utf-8') as f:
+        rows = compare(results, json.load(f), args.threshold)
+    print(f"\nVergleich mit {baseline_path}:")
+    for key, base_ms, current_ms, ratio, status in rows:
+        print(f"{key:<32} {base_ms:>10.2f} -> {current_ms:>10.2f} ms  x{ratio:.2f}  {status}")
+    slower = [row for row in rows if row[4] == "slower"]
+    return 1 if slower and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import os
+import shutil
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+
+# Local SMTP stand-in for load tests: accepts every login and message and only
+# counts them. The app sends with smtplib.SMTP_SSL, so the server speaks implicit
+# TLS with a throwaway self-signed certificate (smtplib does not verify it).
+
+
+def make_certificate(directory):
+    """Self-signed localhost certificate via the openssl command; returns (certfile, keyfile)"""
+    if not shutil.which("openssl"):
+        raise RuntimeError("openssl wurde nicht gefunden (für das Testzertifikat benötigt)")
+    certfile, keyfile = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", keyfile, "-out", certfile],
+        check=True, capture_output=True, timeout=60
+    )
+    return certfile, keyfile
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """The part of SMTP that smtplib uses: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.reply("220 localhost SMTP stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n")
+            elif command == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+                self.server.record(size)
+                self.reply("250 2.0.0 OK")
+            elif command == "QUIT":
+                self.reply("221 2.0.0 Bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self.reply("250 2.0.0 OK")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    SMTP over TLS on 127.0.0.1 in a background thread.
+
+        with LocalSMTPServer() as smtp:
+            config['email'].update(smtp_server=smtp.host, smtp_port=smtp.port)
+            ...
+            smtp.messages, smtp.bytes
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.messages = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self._certdir = tempfile.mkdtemp(prefix="smtp_cert_")
+        self._context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self._context.load_cert_chain(*make_certificate(self._certdir))
+        self._thread = threading.Thread(target=self.serve_forever, name="smtp-stand-in", daemon=True)
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def get_request(self):
+        sock, address = super().get_request()
+        # The handshake runs on first use, in the handler thread of the connection
+        return self._context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False), address
+
+    def record(self, size):
+        with self._lock:
+            self.messages += 1
+            self.bytes += size
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        shutil.rmtree(self._certdir, ignore_errors=True)
@@ -1,8 +1,24 @@
 import os
 import json
-import random
 import shutil
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import numpy as np
+from utils.constants import DEFAULT_SCALE
+from utils.scales import calculate_grades
+from utils.schema import SCHEMA_VERSION, META_FILE
+
+# Demo and stress data generator.
+#
+#   python generate_demo_data.py                      # the demo class (18 students, 5 assignments)
+#   python generate_demo_data.py --classes 50 --students 30 --assignments-per-subject 100 --workers 8
+#
+# Everything is derived from --seed (one independent stream per class), so the same
+# arguments always give the same data regardless of --workers. Names are combined
+# from the name lists (with a number once all combinations are used), and the class
+# files are written record by record instead of building the whole JSON in memory.
 
 # CONFIG
 DATA_DIR = "data"
@@ -12,6 +28,8 @@ REGISTRY_FILE = os.path.join(DATA_DIR, "classes.json")
 CLASS_NAME = "Demo Class 2025"
 CLASS_ID = "class_demo_2025"
 
+SUBJECTS = ["GESELLSCHAFT", "SPRACHE"]
+
 # NAMES DATABASE
 FIRST_NAMES = ["Emma", "Liam", "Noah", "Olivia", "William", "Ava", "James", "Isabella", "Oliver", "Sophia", "Benjamin", "Mia", "Lucas", "Charlotte", "Henry", "Amelia", "Alexander", "Harper", "Michael", "Evelyn"]
 LAST_NAMES = ["Smith", "Johnson", "Brown", "Taylor", "Miller", "Davis", "Garcia", "Rodriguez", "Wilson", "Martinez", "Anderson", "Thomas", "Hernandez", "Moore", "Martin", "Jackson", "Thompson", "White", "Lopez", "Lee"]
@@ -19,160 +37,257 @@ LAST_NAMES = ["Smith", "Johnson", "Brown", "Taylor", "Miller", "Davis", "Garcia"
 # COMMENTS DATABASE
 COMMENTS = ["Gut gemacht!", "Bitte mehr Details beim nächsten Mal.", "Bonus +0.5", "Sehr gute Präsentation", "Schrift kaum lesbar", "Zu spät abgegeben", "Hervorragend", "knapp genügend"]
 
-def ensure_dirs():
-    if os.path.exists(os.path.join(CLASSES_DIR, CLASS_ID)):
-        shutil.rmtree(os.path.join(CLASSES_DIR, CLASS_ID))
-    os.makedirs(os.path.join(CLASSES_DIR, CLASS_ID), exist_ok=True)
+# Classic demo assignments: (subject, name, type, weight, days ago)
+DEMO_ASSIGNMENTS = [
+    ("GESELLSCHAFT", "Test 1: Grundlagen", "Test", 2.0, 30),
+    ("GESELLSCHAFT", "Vortrag: Wirtschaft", "Lernpfad", 1.0, 60),
+    ("GESELLSCHAFT", "Test 2: Politik", "Test", 2.0, 15),
+    ("SPRACHE", "Grammatik Test", "Test", 2.0, 45),
+    ("SPRACHE", "Essay: Literatur", "Custom Assignment", 1.0, 20),
+]
+TYPES = [("Test", 2.0), ("Lernpfad", 1.0), ("Custom Assignment", 0.5)]
+
+AUDIT_ACTIONS = ["Note geändert", "Schnelleingabe", "Prüfung erstellt", "Import"]
+
+
+def class_ids(count):
+    """The first class keeps the classic demo id, further classes get a number"""
+    return [
+        (CLASS_ID, CLASS_NAME) if k == 0 else (f"{CLASS_ID}_{k:03d}", f"{CLASS_NAME} ({k + 1})")
+        for k in range(count)
+    ]
+
+
+def ensure_dirs(class_id):
+    if os.path.exists(os.path.join(CLASSES_DIR, class_id)):
+        shutil.rmtree(os.path.join(CLASSES_DIR, class_id))
+    os.makedirs(os.path.join(CLASSES_DIR, class_id), exist_ok=True)
     os.makedirs(DATA_DIR, exist_ok=True)
 
-def generate_students(count=15):
+
+def generate_students(rng, count=15):
+    """Unique names from the name combinations in random order; beyond 400 a number is appended"""
+    n_first, n_last = len(FIRST_NAMES), len(LAST_NAMES)
+    combinations = n_first * n_last
     students = []
-    used_names = set()
-    
-    for _ in range(count):
-        fn = random.choice(FIRST_NAMES)
-        ln = random.choice(LAST_NAMES)
-        
-        # Ensure unique
-        while f"{fn} {ln}" in used_names:
-            fn = random.choice(FIRST_NAMES)
-            ln = random.choice(LAST_NAMES)
-        used_names.add(f"{fn} {ln}")
-        
-        username = f"{fn.lower()}.{ln.lower()}"
-        students.append({
-            "id": f"student_{username}",
-            "Anmeldename": username,
-            "Vorname": fn,
-            "Nachname": ln
-        })
+    for start in range(0, count, combinations):
+        block = rng.permutation(combinations)[:min(combinations, count - start)]
+        suffix = str(start // combinations + 1) if start else ""
+        for combo in block.tolist():
+            fn, ln = FIRST_NAMES[combo % n_first], LAST_NAMES[combo // n_first]
+            username = f"{fn.lower()}.{ln.lower()}{suffix}"
+            students.append({
+                "id": f"student_{username}",
+                "Anmeldename": username,
+                "Vorname": fn,
+                "Nachname": ln
+            })
     return students
 
-def generate_assignments(students):
-    assignments = []
-    subjects = ["GESELLSCHAFT", "SPRACHE"]
-    
-    # Create 3-4 assignments per subject
-    configs = [
-        ("GESELLSCHAFT", "Test 1: Grundlagen", "Test", 2.0, 30),
-        ("GESELLSCHAFT", "Vortrag: Wirtschaft", "Lernpfad", 1.0, 60),
-        ("GESELLSCHAFT", "Test 2: Politik", "Test", 2.0, 15),
-        ("SPRACHE", "Grammatik Test", "Test", 2.0, 45),
-        ("SPRACHE", "Essay: Literatur", "Custom Assignment", 1.0, 20),
-    ]
 
-    for subj, name, type_, weight, days_ago in configs:
+def assignment_configs(per_subject, today, days):
+    """Classic demo assignments, or per_subject generated ones spread over `days`"""
+    if per_subject is None:
+        return [(subj, name, type_, weight, today - timedelta(days=ago)) for subj, name, type_, weight, ago in DEMO_ASSIGNMENTS]
+    configs = []
+    for subj in SUBJECTS:
+        for j in range(per_subject):
+            type_, weight = TYPES[j % len(TYPES)]
+            ago = days - (j * days) // max(per_subject, 1)
+            configs.append((subj, f"{type_} {j + 1}", type_, weight, today - timedelta(days=ago)))
+    return configs
+
+
+def generate_assignments(rng, students, configs, missing_rate=0.1, comment_rate=0.2):
+    """Yield assignments one by one; grades follow a per-student skill (vectorized per assignment)"""
+    ids = np.array([s["id"] for s in students], dtype=object)
+    # Random "skill" factor per student: some good students, some struggling
+    skill = rng.uniform(0.4, 0.95, len(students))
+
+    for subj, name, type_, weight, date in configs:
         max_points = 100 if "Vortrag" not in name else 20
-        scale = "60% Scale"
-        
-        assignment = {
-            "id": f"assign_{random.randint(1000, 9999)}",
+
+        # Points based on skill + randomness, rounded to 0.5
+        points = np.minimum(max_points, np.round(max_points * skill * rng.uniform(0.8, 1.1, len(students)) * 2) / 2)
+        # Grade like the app does, so a regrade finds nothing to change
+        notes = calculate_grades(points, max_points, DEFAULT_SCALE)
+
+        graded = rng.random(len(students)) >= missing_rate
+        commented = graded & (rng.random(len(students)) < comment_rate)
+        comment_picks = rng.integers(0, len(COMMENTS), int(commented.sum()))
+
+        yield {
+            "id": f"assign_{rng.bytes(6).hex()}",
             "name": name,
             "subject": subj,
             "type": type_,
             "weight": weight,
             "maxPoints": max_points,
-            "scaleType": scale,
-            "date": (datetime.now() - timedelta(days=days_ago)).isoformat(),
-            "grades": {},
-            "comments": {} # Initialize comments
+            "scaleType": DEFAULT_SCALE,
+            "url": "",
+            "date": date.isoformat(),
+            "grades": dict(zip(ids[graded].tolist(), notes[graded].tolist())),
+            "points": dict(zip(ids[graded].tolist(), points[graded].tolist())),
+            "comments": dict(zip(ids[commented].tolist(), (COMMENTS[i] for i in comment_picks.tolist())))
         }
 
-        # Generate grades with a distribution
-        # Some good students, some struggling
-        for student in students:
-            # Random "skill" factor for student
-            skill = random.uniform(0.4, 0.95) 
-            
-            # Points based on skill + randomness
-            points = max_points * skill * random.uniform(0.8, 1.1)
-            points = min(max_points, round(points * 2) / 2) # Round to 0.5
-            
-            # Calculate grade (Simple 60% logic for demo)
-            pct = points / max_points
-            note = (pct * 5) + 1
-            note = max(1.0, min(6.0, round(note, 1)))
-            
-            # 10% chance of missing grade
-            if random.random() > 0.1:
-                assignment["grades"][student["id"]] = note
-                
-                # 20% chance of a comment
-                if random.random() > 0.8:
-                    assignment["comments"][student["id"]] = random.choice(COMMENTS)
-        
-        assignments.append(assignment)
-    
-    return assignments
-
-def generate_logs(students, assignments):
+
+def generate_logs(rng, students, email_count=5, audit_count=1, now=None):
+    """Email and audit log entries, newest first (like the app writes them)"""
+    now = now or datetime.now()
     email_log = []
-    audit_log = []
-    
-    # Fake Email Logs
-    for s in students[:5]: # First 5 students got emails
+    for i in range(email_count):
+        s = students[i % len(students)]
+        failed = rng.random() < 0.05
         email_log.append({
-            "timestamp": (datetime.now() - timedelta(hours=random.randint(1, 48))).isoformat(),
+            "timestamp": (now - timedelta(minutes=int(rng.integers(60, 60 * 24 * 60)))).isoformat(),
             "student_id": s["id"],
             "student_name": f"{s['Vorname']} {s['Nachname']}",
-            "subject": "GESELLSCHAFT",
-            "status": "sent",
-            "error": ""
+            "subject": SUBJECTS[int(rng.integers(len(SUBJECTS)))],
+            "status": "failed" if failed else "sent",
+            "error": "SMTP timeout" if failed else ""
+        })
+    email_log.sort(key=lambda e: e["timestamp"], reverse=True)
+
+    audit_log = [{
+        "timestamp": (now - timedelta(minutes=int(rng.integers(1, 60 * 24 * 60)))).isoformat(),
+        "user": "Teacher",
+        "action": AUDIT_ACTIONS[int(rng.integers(len(AUDIT_ACTIONS)))],
+        "details": f"Demo-Eintrag {i + 1}"
+    } for i in range(max(audit_count - 1, 0))]
+    audit_log.sort(key=lambda e: e["timestamp"], reverse=True)
+    if audit_count > 0:
+        audit_log.insert(0, {
+            "timestamp": now.isoformat(),
+            "user": "System",
+            "action": "Demo Data Generation",
+            "details": "Created demo environment"
         })
-        
-    # Fake Audit Logs
-    audit_log.append({
-        "timestamp": datetime.now().isoformat(),
-        "user": "System",
-        "action": "Demo Data Generation",
-        "details": "Created demo environment"
-    })
-    
     return email_log, audit_log
 
-def main():
-    print("🚀 Generating Demo Data...")
-    ensure_dirs()
-    
-    # 1. Update Registry
+
+# ---------------------------------------------------------
+# Streaming JSON output
+# ---------------------------------------------------------
+def write_json_stream(path, records, pretty=True):
+    """Write an iterable as a JSON list, one record at a time; returns the record count"""
+    indent = 2 if pretty else None
+    sep, first_sep, end = (",\n  ", "[\n  ", "\n]") if pretty else (",", "[", "]")
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            text = json.dumps(record, indent=indent, ensure_ascii=False)
+            f.write((sep if count else first_sep) + (text.replace("\n", "\n  ") if pretty else text))
+            count += 1
+        f.write(end if count else "[]")
+    return count
+
+
+def write_class(task):
+    """Generate and write one class folder (runs in a worker process); returns (students, assignments, bytes)"""
+    class_id, seed_seq, args = task
+    rng = np.random.default_rng(seed_seq)
+    pretty = args['format'] == "pretty"
+    base = os.path.join(CLASSES_DIR, class_id)
+    ensure_dirs(class_id)
+
+    students = generate_students(rng, args['students'])
+    configs = assignment_configs(args['assignments_per_subject'], args['today'], args['days'])
+    email_log, audit_log = generate_logs(rng, students, args['email_logs'], args['audit_logs'], args['today'])
+
+    write_json_stream(os.path.join(base, "students.json"), students, pretty)
+    n_assignments = write_json_stream(
+        os.path.join(base, "assignments.json"),
+        generate_assignments(rng, students, configs, args['missing_rate'], args['comment_rate']),
+        pretty
+    )
+    write_json_stream(os.path.join(base, "email_log.json"), email_log, pretty)
+    write_json_stream(os.path.join(base, "audit_log.json"), audit_log, pretty)
+    with open(os.path.join(base, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"schema_version": SCHEMA_VERSION}, f)
+
+    size = sum(e.stat().st_size for e in os.scandir(base))
+    return len(students), n_assignments, size
+
+
+def update_registry(classes):
+    """Replace all demo classes in the registry (and their folders) by the generated ones"""
+    os.makedirs(CLASSES_DIR, exist_ok=True)
     registry = []
     if os.path.exists(REGISTRY_FILE):
-        with open(REGISTRY_FILE, 'r') as f:
+        with open(REGISTRY_FILE, 'r', encoding='utf-8') as f:
             registry = json.load(f)
-    
-    # Remove old demo if exists
-    registry = [c for c in registry if c['id'] != CLASS_ID]
-    registry.append({
-        "id": CLASS_ID,
-        "name": CLASS_NAME,
-        "created_at": datetime.now().isoformat()
-    })
-    
-    with open(REGISTRY_FILE, 'w') as f:
-        json.dump(registry, f, indent=2)
-
-    # 2. Generate Content
-    students = generate_students(18)
-    assignments = generate_assignments(students)
-    email_log, audit_log = generate_logs(students, assignments)
-    
-    # 3. Save Files
-    base = os.path.join(CLASSES_DIR, CLASS_ID)
-    
-    with open(os.path.join(base, "students.json"), 'w', encoding='utf-8') as f:
-        json.dump(students, f, indent=2, ensure_ascii=False)
-        
-    with open(os.path.join(base, "assignments.json"), 'w', encoding='utf-8') as f:
-        json.dump(assignments, f, indent=2, ensure_ascii=False)
-        
-    with open(os.path.join(base, "email_log.json"), 'w', encoding='utf-8') as f:
-        json.dump(email_log, f, indent=2, ensure_ascii=False)
-
-    with open(os.path.join(base, "audit_log.json"), 'w', encoding='utf-8') as f:
-        json.dump(audit_log, f, indent=2, ensure_ascii=False)
-        
-    print(f"✅ Successfully created '{CLASS_NAME}' with {len(students)} students and {len(assignments)} assignments.")
+
+    generated = {class_id for class_id, _ in classes}
+    for c in registry:
+        # Remove old demo classes that are not generated again
+        if c['id'].startswith(CLASS_ID) and c['id'] not in generated:
+            shutil.rmtree(os.path.join(CLASSES_DIR, c['id']), ignore_errors=True)
+    registry = [c for c in registry if not c['id'].startswith(CLASS_ID)]
+    created_at = datetime.now().isoformat()
+    registry += [{"id": class_id, "name": name, "created_at": created_at} for class_id, name in classes]
+
+    with open(REGISTRY_FILE, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=2, ensure_ascii=False)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Demo- und Stresstestdaten erzeugen")
+    parser.add_argument("--seed", type=int, default=42, help="Startwert; gleiche Argumente ergeben gleiche Daten")
+    parser.add_argument("--classes", type=int, default=1, help="Anzahl Klassen")
+    parser.add_argument("--students", type=int, default=18, help="Lernende pro Klasse")
+    parser.add_argument("--assignments-per-subject", type=int, default=None,
+                        help="Prüfungen pro Fach (ohne Angabe: die 5 klassischen Demo-Prüfungen)")
+    parser.add_argument("--days", type=int, default=300, help="Zeitraum der generierten Prüfungen in Tagen")
+    parser.add_argument("--date", type=datetime.fromisoformat, default=None, help="Referenzdatum (ISO), Standard: jetzt")
+    parser.add_argument("--missing-rate", type=float, default=0.1, help="Anteil fehlender Noten")
+    parser.add_argument("--comment-rate", type=float, default=0.2, help="Anteil benoteter Einträge mit Kommentar")
+    parser.add_argument("--email-logs", type=int, default=5, help="E-Mail-Protokolleinträge pro Klasse")
+    parser.add_argument("--audit-logs", type=int, default=1, help="Audit-Log-Einträge pro Klasse")
+    parser.add_argument("--format", choices=["pretty", "compact"], default="pretty",
+                        help="pretty: eingerückt wie die App speichert; compact: ohne Leerraum (kleiner, schneller)")
+    parser.add_argument("--workers", type=int, default=1, help="Parallele Prozesse (eine Klasse pro Prozess)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🚀 Generating Demo Data...")
+    start = time.perf_counter()
+
+    classes = class_ids(args.classes)
+    update_registry(classes)
+
+    options = {
+        'students': args.students,
+        'assignments_per_subject': args.assignments_per_subject,
+        'days': args.days,
+        'today': args.date or datetime.now(),
+        'missing_rate': args.missing_rate,
+        'comment_rate': args.comment_rate,
+        'email_logs': args.email_logs,
+        'audit_logs': args.audit_logs,
+        'format': args.format,
+    }
+    # One independent random stream per class: results do not depend on --workers
+    seeds = np.random.SeedSequence(args.seed).spawn(len(classes))
+    tasks = [(class_id, seed, options) for (class_id, _), seed in zip(classes, seeds)]
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(write_class, tasks, chunksize=max(1, len(tasks) // (args.workers * 4))))
+    else:
+        results = [write_class(task) for task in tasks]
+
+    n_students = sum(r[0] for r in results)
+    n_assignments = sum(r[1] for r in results)
+    size_mb = sum(r[2] for r in results) / 1024 / 1024
+    if len(classes) == 1:
+        print(f"✅ Successfully created '{CLASS_NAME}' with {n_students} students and {n_assignments} assignments.")
+    else:
+        print(f"✅ Successfully created {len(classes)} classes with {n_students} students and {n_assignments} assignments.")
+    print(f"   {size_mb:.1f} MB in {time.perf_counter() - start:.1f} s")
     print("👉 Run 'streamlit run app.py' to see the data.")
 
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
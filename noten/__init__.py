@@ -0,0 +1,9 @@
+"""
+Headless batch commands for the grade data, without Streamlit:
+
+    python -m noten classes
+    python -m noten averages --class class_demo_2025 --format json
+    python -m noten validate
+
+See `python -m noten --help` and noten/cli.py.
+"""
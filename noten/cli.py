@@ -0,0 +1,253 @@
+"""
+Command line interface of the grade data, for batch jobs without a Streamlit session.
+
+    python -m noten classes                                   # registered classes
+    python -m noten averages [--class ID ...] [--format csv|json] [--output FILE]
+    python -m noten export [--class ID ...] [--format csv|xlsx] [--output-dir DIR]
+    python -m noten regrade [--class ID ...] [--apply] [--no-backup]
+    python -m noten validate [--class ID ...] [--strict]
+    python -m noten reports --output reports.zip [--class ID ...] [--pdf] [--workers N]
+
+Without --class every class that is not archived is processed (--all includes the
+archived ones). --root selects the program folder that contains data/.
+Exit codes: 0 ok, 1 validation errors, 2 usage errors.
+"""
+import argparse
+import os
+import sys
+
+from utils.storage import (
+    load_class_data, load_class_registry, save_class_data, audit_event, create_backup
+)
+
+# pandas, numpy and the report renderer are imported by the commands that need them,
+# so `classes` and `--help` start without them.
+
+
+class UsageError(Exception):
+    """Invalid arguments (unknown class ids, ...); reported without a traceback"""
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+def select_classes(args):
+    """Registry entries selected by --class / --all, in registry order"""
+    registry = load_class_registry()
+    if args.class_ids:
+        known = {c['id'] for c in registry}
+        unknown = [cid for cid in args.class_ids if cid not in known]
+        if unknown:
+            raise UsageError(f"Unbekannte Klasse(n): {', '.join(unknown)}")
+        return [c for c in registry if c['id'] in args.class_ids]
+    return [c for c in registry if args.all or not c.get('archived')]
+
+
+def iter_class_data(classes):
+    """(registry entry, loaded data) for every class with a data folder"""
+    for cls in classes:
+        data = load_class_data(cls['id'])
+        if data is None:
+            print(f"{cls['id']}: Ordner fehlt, übersprungen", file=sys.stderr)
+            continue
+        yield cls, data
+
+
+def write_output(text, output):
+    if output:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+def subjects_of(data):
+    return data['config'].get('subjects', [])
+
+
+# ---------------------------------------------------------
+# Commands
+# ---------------------------------------------------------
+def cmd_classes(args):
+    for cls in select_classes(args):
+        data = load_class_data(cls['id'])
+        students = len(data['students']) if data else 0
+        assignments = len(data['assignments']) if data else 0
+        archived = " (archiviert)" if cls.get('archived') else ""
+        print(f"{cls['id']:<24} {cls['name']}{archived}: {students} Schüler/innen, {assignments} Prüfungen")
+    return 0
+
+
+def cmd_averages(args):
+    import pandas as pd
+    from utils.gradebook import build_class_summary, zeugnis_col, OVERALL_COL
+
+    frames = []
+    for cls, data in iter_class_data(select_classes(args)):
+        subjects = subjects_of(data)
+        summary = build_class_summary(data['students'], data['assignments'], subjects)
+        columns = ['Anmeldename', 'Name'] + [c for s in subjects for c in (s, zeugnis_col(s))] + [OVERALL_COL]
+        frame = summary[columns]
+        frame.insert(0, 'Klasse', cls['name'])
+        frame.insert(0, 'class_id', cls['id'])
+        frames.append(frame)
+
+    result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['class_id', 'Klasse'])
+    if args.format == 'json':
+        text = result.to_json(orient='records', force_ascii=False, indent=2) + "\n"
+    else:
+        text = result.to_csv(index=False)
+    write_output(text, args.output)
+    return 0
+
+
+def cmd_export(args):
+    from utils.batch_reports import safe_filename
+    from utils.gradebook import build_class_summary, build_grade_matrix, zeugnis_col, OVERALL_COL
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for cls, data in iter_class_data(select_classes(args)):
+        students, subjects = data['students'], subjects_of(data)
+        assignments = sorted(data['assignments'], key=lambda a: (a['subject'], a['date']))
+        # One row per student: grades of every assignment, then the subject averages
+        matrix = build_grade_matrix(students, assignments)
+        matrix.columns = [f"{a['subject']}: {a['name']} ({a['date'][:10]})" for a in assignments]
+        summary = build_class_summary(students, data['assignments'], subjects).set_index('id')
+        book = summary[['Anmeldename', 'Vorname', 'Nachname']].join(matrix)
+        for subject in subjects:
+            book[f"Ø {subject}"] = summary[subject]
+            book[zeugnis_col(subject)] = summary[zeugnis_col(subject)]
+        book[OVERALL_COL] = summary[OVERALL_COL]
+
+        path = os.path.join(args.output_dir, f"{safe_filename(cls['name'])}_{cls['id'][-4:]}.{args.format}")
+        if args.format == 'xlsx':
+            book.to_excel(path, index=False, sheet_name='Notenbuch', engine='xlsxwriter')
+        else:
+            book.to_csv(path, index=False)
+        print(path)
+    return 0
+
+
+def cmd_regrade(args):
+    from utils.scales import compute_regrade, apply_regrade
+
+    pending = []
+    for cls, data in iter_class_data(select_classes(args)):
+        changes, skipped = compute_regrade(data['assignments'], data['config'].get('scales'))
+        print(f"{cls['name']} ({cls['id']}): {len(changes)} Noten ändern sich, {skipped} ohne Punkte übersprungen")
+        if args.verbose:
+            for c in changes:
+                print(f"    {c['subject']} / {c['assignment']} / {c['student_id']}: {c['old']} -> {c['new']}")
+        if changes:
+            pending.append((cls, data, changes))
+
+    if not args.apply or not pending:
+        if pending:
+            print("Vorschau – mit --apply übernehmen.")
+        return 0
+
+    if not args.no_backup:
+        ok, msg = create_backup(auto=True, note="Neuberechnung (CLI)")
+        print(msg)
+        if not ok:
+            return 1
+    for cls, data, changes in pending:
+        apply_regrade(data['assignments'], changes)
+        assignment_count = len({c['assignment_id'] for c in changes})
+        data['audit_log'].insert(0, audit_event(
+            "Noten neu berechnet", f"{len(changes)} Noten in {assignment_count} Prüfungen (CLI)", user='CLI'
+        ))
+        if not save_class_data(cls['id'], data):
+            print(f"{cls['id']}: Speichern fehlgeschlagen", file=sys.stderr)
+            return 1
+    return 0
+
+
+def cmd_validate(args):
+    from utils.schema import validate_class_data
+
+    errors = warnings = 0
+    for cls, data in iter_class_data(select_classes(args)):
+        problems = validate_class_data(data, subjects_of(data))
+        if data['migrated']:
+            problems.insert(0, ('warning', "Dateien im alten Schema (werden beim nächsten Speichern aktualisiert)"))
+        if data['journal']:
+            problems.insert(0, ('warning', f"{data['journal']} Änderungen nur im Journal (noch nicht kompaktiert)"))
+        errors += sum(1 for level, _ in problems if level == 'error')
+        warnings += sum(1 for level, _ in problems if level == 'warning')
+        print(f"{cls['name']} ({cls['id']}): {'OK' if not problems else f'{len(problems)} Hinweise'}")
+        for level, message in problems:
+            print(f"    {'FEHLER' if level == 'error' else 'Warnung'}: {message}")
+
+    print(f"{errors} Fehler, {warnings} Warnungen")
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+def cmd_reports(args):
+    from utils.batch_reports import generate_batch_reports, pdf_renderer_available
+
+    classes = select_classes(args)
+    if args.pdf and not pdf_renderer_available():
+        raise UsageError("Kein PDF-Renderer installiert (WeasyPrint oder wkhtmltopdf)")
+    count = generate_batch_reports(classes, args.output, with_pdf=args.pdf, max_workers=args.workers)
+    print(f"{count} Dateien für {len(classes)} Klassen: {args.output}")
+    return 0
+
+
+# ---------------------------------------------------------
+# Arguments
+# ---------------------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m noten", description="Notenverwaltung ohne Oberfläche")
+    parser.add_argument("--root", help="Programmordner mit data/ (Standard: aktueller Ordner)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    selection = argparse.ArgumentParser(add_help=False)
+    selection.add_argument("--class", dest="class_ids", action="append", metavar="ID",
+                           help="Nur diese Klasse (mehrfach möglich)")
+    selection.add_argument("--all", action="store_true", help="Auch archivierte Klassen")
+
+    p = commands.add_parser("classes", parents=[selection], help="Klassen auflisten")
+    p.set_defaults(func=cmd_classes)
+
+    p = commands.add_parser("averages", parents=[selection], help="Durchschnitte und Zeugnisnoten")
+    p.add_argument("--format", choices=["csv", "json"], default="csv")
+    p.add_argument("--output", help="Datei statt Standardausgabe")
+    p.set_defaults(func=cmd_averages)
+
+    p = commands.add_parser("export", parents=[selection], help="Notenbuch pro Klasse exportieren")
+    p.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    p.add_argument("--output-dir", default="exports")
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser("regrade", parents=[selection], help="Noten aus den Punkten neu berechnen")
+    p.add_argument("--apply", action="store_true", help="Änderungen speichern (sonst nur Vorschau)")
+    p.add_argument("--no-backup", action="store_true", help="Kein Backup vor dem Speichern")
+    p.add_argument("--verbose", "-v", action="store_true", help="Jede geänderte Note ausgeben")
+    p.set_defaults(func=cmd_regrade)
+
+    p = commands.add_parser("validate", parents=[selection], help="Daten auf Fehler prüfen")
+    p.add_argument("--strict", action="store_true", help="Auch bei Warnungen mit Code 1 enden")
+    p.set_defaults(func=cmd_validate)
+
+    p = commands.add_parser("reports", parents=[selection], help="Notenberichte als ZIP erzeugen")
+    p.add_argument("--output", required=True, help="ZIP-Datei")
+    p.add_argument("--pdf", action="store_true", help="Zusätzlich PDF-Dateien")
+    p.add_argument("--workers", type=int, help="Anzahl Prozesse (Standard: eine pro Klasse)")
+    p.set_defaults(func=cmd_reports)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Output paths are relative to the caller's folder, data paths to --root
+    for name in ('output', 'output_dir'):
+        if getattr(args, name, None):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    if args.root:
+        os.chdir(args.root)
+    try:
+        return args.func(args)
+    except UsageError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 2
@@ -1,117 +1,93 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime
-from utils.grading import calculate_weighted_average
+from utils.data_manager import get_class_registry
+from utils.grading import get_gradebook
+from utils.cache import grade_version, analytics_cube
+from utils.storage import class_signature
+from utils.analytics import student_grades, load_classes, build_cohort, GRADE_BIN_EDGES
+from utils.charts import histogram_figure, trend_figure, difficulty_figure, cohort_box_figure, share_figure, cohort_difficulty_figure
+from utils.batch_reports import render_subject_report, safe_filename
+from pages_ui.common import show_print_report
 
-def get_class_performance_data(subject):
-    """Prepare dataframe for class analytics"""
-    assignments = [a for a in st.session_state.assignments if a['subject'] == subject]
-    students = st.session_state.students
-    
-    if not assignments:
-        return None
-    
-    # Sort assignments by date
-    assignments.sort(key=lambda x: x['date'])
-    
-    data = []
-    for a in assignments:
-        grades = [float(g) for g in a['grades'].values() if g]
-        if grades:
-            avg = sum(grades) / len(grades)
-            data.append({
-                'Assignment': a['name'],
-                'Date': datetime.fromisoformat(a['date']),
-                'Average': avg,
-                'Type': a['type'],
-                'MaxPoints': a['maxPoints']
-            })
-            
-    return pd.DataFrame(data)
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_cohort(signatures, labels, subject):
+    """
+    Cohort comparison of several classes, read from their folders (the active class is not switched).
+    signatures: ((class_id, class_signature), ...) - a saved change in any folder gives a new cache key.
+    """
+    loaded = load_classes([class_id for class_id, _ in signatures])
+    return build_cohort({label: loaded[class_id] for class_id, label in labels if class_id in loaded}, subject)
 
-def get_student_performance_data(student_id, subject):
-    """Prepare dataframe for individual student analytics"""
-    assignments = [a for a in st.session_state.assignments if a['subject'] == subject]
-    assignments.sort(key=lambda x: x['date'])
-    
-    data = []
-    for a in assignments:
-        student_grade = a['grades'].get(student_id)
-        
-        # Calculate class average for this specific assignment
-        all_grades = [float(g) for g in a['grades'].values() if g]
-        class_avg = sum(all_grades) / len(all_grades) if all_grades else 0
-        
-        if student_grade:
-            data.append({
-                'Assignment': a['name'],
-                'Date': datetime.fromisoformat(a['date']),
-                'Grade': float(student_grade),
-                'ClassAverage': class_avg,
-                'Difference': float(student_grade) - class_avg
-            })
-            
-    return pd.DataFrame(data)
+@st.cache_resource(show_spinner=False, max_entries=64)
+def get_class_figures(data_version, subject, _cube):
+    """Charts of the class tab per (class, subject, data version); shared figures, do not modify"""
+    stats = _cube['assignments']
+    stats = stats[(stats['subject'] == subject) & (stats['n'] > 0)]
+    return {
+        'trend': trend_figure(stats, title='Durchschnitt pro Prüfung'),
+        'difficulty': difficulty_figure(stats, title='Prüfungen sortiert nach Durchschnitt'),
+        'bins': histogram_figure(_cube['bins'][subject], GRADE_BIN_EDGES),
+    }
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_cohort_figures(signatures, labels, subject):
+    """Charts of the cohort tab, cached with the same key as the comparison itself"""
+    cohort = get_cohort(signatures, labels, subject)
+    return {
+        'box': cohort_box_figure(cohort['students']),
+        'share': share_figure(cohort['bins'], grade_bin_labels()),
+        'difficulty': cohort_difficulty_figure(cohort['assignments']),
+    }
+
+def grade_bin_labels():
+    return [f"{lo:.1f}–{hi:.1f}" for lo, hi in zip(GRADE_BIN_EDGES[:-1], GRADE_BIN_EDGES[1:])]
 
 def render():
     st.title("📈 Analyse & Berichte")
     
     subject = st.selectbox("Fach auswählen", st.session_state.config['subjects'])
     
-    tab_class, tab_student = st.tabs(["🏫 Klassenanalyse", "👤 Schülerdetails"])
+    tab_class, tab_student, tab_cohort = st.tabs(["🏫 Klassenanalyse", "👤 Schülerdetails", "🏫 Klassenvergleich"])
+    
+    cube = analytics_cube(st.session_state.config['subjects'])
+    df_class = cube['assignments']
+    df_class = df_class[(df_class['subject'] == subject) & (df_class['n'] > 0)]
+    df_students = cube['students']
+    df_students = df_students[df_students['subject'] == subject]
     
     # === TAB 1: CLASS ANALYTICS ===
     with tab_class:
-        df_class = get_class_performance_data(subject)
-        
-        if df_class is None or df_class.empty:
+        if df_class.empty:
             st.info("Keine Daten verfügbar.")
         else:
             # 1. KPIs and Alerts
             st.subheader("Aktueller Status")
             col1, col2, col3 = st.columns(3)
             
-            # Identify "At Risk" students (< 4.0) with Grades
-            at_risk = []
-            for s in st.session_state.students:
-                avg = calculate_weighted_average(s['id'], subject)
-                if avg and avg < 4.0:
-                    at_risk.append({
-                        "name": f"{s['Vorname']} {s['Nachname']}",
-                        "avg": avg,
-                        "id": s['id']
-                    })
-            
-            # Sort by lowest grade first
-            at_risk.sort(key=lambda x: x['avg'])
+            # "At Risk" students (< 4.0), lowest average first
+            at_risk = df_students[df_students['average'] < 4.0].sort_values('average')
 
             with col1:
                 st.metric("Anzahl Prüfungen", len(df_class))
             with col2:
-                all_avgs = [calculate_weighted_average(s['id'], subject) for s in st.session_state.students]
-                all_avgs = [a for a in all_avgs if a is not None]
-                real_class_avg = sum(all_avgs)/len(all_avgs) if all_avgs else 0
-                st.metric("Klassendurchschnitt (Gesamt)", f"{real_class_avg:.2f}")
+                real_class_avg = df_students['average'].mean()
+                st.metric("Klassendurchschnitt (Gesamt)", f"{real_class_avg:.2f}" if pd.notna(real_class_avg) else "0.00")
             with col3:
-                if at_risk:
+                if not at_risk.empty:
                     st.metric("⚠️ Risikoschüler (< 4.0)", len(at_risk), delta_color="inverse")
                 else:
                     st.metric("Risikoschüler", "0", "✅")
 
-            if at_risk:
+            if not at_risk.empty:
                 # NEW: Clickable list (Expander)
                 with st.expander(f"🚨 {len(at_risk)} Schüler/innen unter 4.0 anzeigen (Klicken für Details)", expanded=True):
-                    
-                    risk_df = pd.DataFrame(at_risk)
-                    risk_df['avg'] = risk_df['avg'].apply(lambda x: f"{x:.2f}")
-                    
                     st.dataframe(
-                        risk_df[['name', 'avg']], 
+                        at_risk[['Name', 'average', 'trend']],
                         column_config={
-                            "name": "Name",
-                            "avg": "Durchschnitt"
+                            "Name": "Name",
+                            "average": st.column_config.NumberColumn("Durchschnitt", format="%.2f"),
+                            "trend": st.column_config.NumberColumn("Trend (pro Prüfung)", format="%+.2f")
                         },
                         hide_index=True,
                         use_container_width=True
@@ -120,26 +96,40 @@ def render():
 
             st.write("---")
 
-            # 2. Charts
+            # 2. Charts (cached per class, subject and data version)
+            figures = get_class_figures(grade_version(), subject, _cube=cube)
             c1, c2 = st.columns(2)
             
             with c1:
                 st.subheader("Verlauf Klassendurchschnitt")
-                fig_trend = px.line(df_class, x='Date', y='Average', markers=True, 
-                                   title='Durchschnitt pro Prüfung', hover_data=['Assignment'])
-                fig_trend.add_hline(y=4.0, line_dash="dash", line_color="red", annotation_text="Genügend (4.0)")
-                fig_trend.update_yaxes(range=[1, 6])
-                st.plotly_chart(fig_trend, use_container_width=True)
+                st.plotly_chart(figures['trend'], use_container_width=True)
             
             with c2:
                 st.subheader("Schwierigkeitsgrad (Härteste Prüfungen)")
-                # Sort by lowest average
-                df_difficulty = df_class.sort_values('Average')
-                fig_diff = px.bar(df_difficulty, x='Average', y='Assignment', orientation='h',
-                                 title='Prüfungen sortiert nach Durchschnitt', color='Average',
-                                 color_continuous_scale='RdYlGn')
-                fig_diff.update_xaxes(range=[1, 6])
-                st.plotly_chart(fig_diff, use_container_width=True)
+                st.plotly_chart(figures['difficulty'], use_container_width=True)
+
+            # 3. Distribution and per-assignment statistics
+            c3, c4 = st.columns(2)
+            with c3:
+                st.subheader("Notenverteilung")
+                st.plotly_chart(figures['bins'], use_container_width=True)
+            with c4:
+                st.subheader("Kennzahlen pro Prüfung")
+                st.dataframe(
+                    df_class[['name', 'n', 'mean', 'median', 'std', 'min', 'max', 'fail_rate']],
+                    column_config={
+                        "name": "Prüfung",
+                        "n": "Noten",
+                        "mean": st.column_config.NumberColumn("Ø", format="%.2f"),
+                        "median": st.column_config.NumberColumn("Median", format="%.2f"),
+                        "std": st.column_config.NumberColumn("Std", format="%.2f"),
+                        "min": st.column_config.NumberColumn("Min", format="%.1f"),
+                        "max": st.column_config.NumberColumn("Max", format="%.1f"),
+                        "fail_rate": st.column_config.NumberColumn("< 4.0", format="percent")
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
 
     # === TAB 2: STUDENT DETAILS ===
     with tab_student:
@@ -150,20 +140,29 @@ def render():
         )
         
         if selected_student:
-            df_student = get_student_performance_data(selected_student['id'], subject)
+            registry = get_class_registry()
+            current_class = next((c for c in registry if c['id'] == st.session_state.get('current_class_id')), None)
+            class_name = current_class['name'] if current_class else "Unbekannte Klasse"
+            df_student = student_grades(get_gradebook(), cube, selected_student['id'], subject)
             
             if df_student.empty:
                 st.info("Keine Noten vorhanden.")
             else:
                 st.write("---")
-                # Student Header
+                # Student Header (average, rank and trend from the cube)
+                student_row = df_students[df_students['student_id'] == selected_student['id']].iloc[0]
+                student_avg = student_row['average']
+                ranked = int(df_students['average'].notna().sum())
                 cols = st.columns([1, 3])
-                student_avg = calculate_weighted_average(selected_student['id'], subject)
                 
                 with cols[0]:
                     st.metric("Durchschnitt", f"{student_avg:.2f}", 
                              delta=f"{student_avg - 4.0:.2f} zu Note 4",
                              delta_color="normal")
+                    st.metric("Rang", f"{int(student_row['rank'])} / {ranked}",
+                              help=f"Besser als {student_row['percentile']:.0f}% der Klasse (Perzentil)")
+                    if pd.notna(student_row['trend']):
+                        st.metric("Trend", f"{student_row['trend']:+.2f}", help="Notenänderung pro Prüfung (Regressionsgerade)")
                 
                 with cols[1]:
                     # Comparison Chart
@@ -197,33 +196,78 @@ def render():
                         "ClassAverage": "Ø Klasse",
                         "Difference": "Abweichung"
                     },
+                    hide_index=True,
                     use_container_width=True
                 )
                 
-                # Print View (Simple HTML generation)
-                with st.expander("🖨️ Bericht drucken (Vorschau)"):
-                    date_str = datetime.now().strftime("%d.%m.%Y")
-                    report_html = f"""
-                    <div style="padding: 20px; border: 1px solid #ccc; font-family: Arial;">
-                        <h2>Notenblatt: {subject}</h2>
-                        <p><strong>Schüler/in:</strong> {selected_student['Vorname']} {selected_student['Nachname']}<br>
-                        <strong>Klasse:</strong> {st.session_state.get('current_class_id', 'Unbekannt')}<br>
-                        <strong>Datum:</strong> {date_str}</p>
-                        <hr>
-                        <h3>Gesamtschnitt: {student_avg:.2f}</h3>
-                        <table style="width:100%; border-collapse: collapse;">
-                            <tr style="background-color: #f2f2f2;">
-                                <th style="text-align:left; padding: 8px;">Prüfung</th>
-                                <th style="text-align:left; padding: 8px;">Typ</th>
-                                <th style="text-align:left; padding: 8px;">Gewicht</th>
-                                <th style="text-align:left; padding: 8px;">Datum</th>
-                                <th style="text-align:left; padding: 8px;">Note</th>
-                            </tr>
-                            {''.join([f'<tr><td style="padding:8px; border-bottom:1px solid #ddd">{df_row["Assignment"]}</td><td style="padding:8px; border-bottom:1px solid #ddd">{next(a["type"] for a in st.session_state.assignments if a["name"] == df_row["Assignment"] and a["subject"] == subject)}</td><td style="padding:8px; border-bottom:1px solid #ddd">{next(a["weight"] for a in st.session_state.assignments if a["name"] == df_row["Assignment"] and a["subject"] == subject):.1f}</td><td style="padding:8px; border-bottom:1px solid #ddd">{df_row["Date"].strftime("%d.%m.%Y")}</td><td style="padding:8px; border-bottom:1px solid #ddd"><strong>{df_row["Grade"]}</strong></td></tr>' for _, df_row in df_student.iterrows()])}
-                        </table>
-                        <br>
-                        <p>Unterschrift Lehrperson: ___________________</p>
-                    </div>
-                    """
-                    st.markdown(report_html, unsafe_allow_html=True)
-                    st.caption("Zum Drucken: Rechtsklick auf den Bereich oben -> 'Drucken' oder Screenshot erstellen.")
\ No newline at end of file
+                # Print view: one pass over the student's rows, comments via the id index
+                if st.button("🖨️ Bericht drucken", key="print_student_report"):
+                    assignments_by_id = {a['id']: a for a in st.session_state.assignments}
+                    print_html = render_subject_report(
+                        class_name, subject, selected_student, student_avg, df_student, assignments_by_id
+                    )
+                    show_print_report(
+                        print_html,
+                        f"Notenblatt_{safe_filename(selected_student['Nachname'])}_{safe_filename(subject)}.html",
+                        key="student_report"
+                    )
+
+    # === TAB 3: COHORT COMPARISON ===
+    with tab_cohort:
+        render_cohort(subject)
+
+def render_cohort(subject):
+    """Same subject across several classes (e.g. parallel classes or successive years)"""
+    registry = [c for c in get_class_registry() if not c.get('archived')] or get_class_registry()
+    names = {c['id']: c['name'] for c in registry}
+    # Same name twice (e.g. a class per year) -> add the id so the charts keep them apart
+    duplicates = {n for n in names.values() if list(names.values()).count(n) > 1}
+    labels = {cid: f"{name} ({cid})" if name in duplicates else name for cid, name in names.items()}
+
+    active = st.session_state.get('current_class_id')
+    selected = st.multiselect(
+        "Klassen vergleichen", list(labels), format_func=labels.get,
+        default=[cid for cid in labels if cid == active] or list(labels)[:1]
+    )
+    if not selected:
+        st.info("Bitte mindestens eine Klasse auswählen.")
+        return
+
+    signatures = tuple((cid, class_signature(cid)) for cid in selected)
+    class_labels = tuple((cid, labels[cid]) for cid in selected)
+    cohort = get_cohort(signatures, class_labels, subject)
+    classes = cohort['classes']
+    if cohort['assignments'].empty:
+        st.info(f"Keine Noten in {subject} für die ausgewählten Klassen.")
+        return
+
+    st.dataframe(
+        classes,
+        column_config={
+            "class": "Klasse",
+            "students": "Schüler/innen",
+            "graded": "Mit Noten",
+            "mean": st.column_config.NumberColumn("Ø", format="%.2f"),
+            "median": st.column_config.NumberColumn("Median", format="%.2f"),
+            "fail_share": st.column_config.NumberColumn("Ø < 4.0", format="percent")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    figures = get_cohort_figures(signatures, class_labels, subject)
+    c1, c2 = st.columns(2)
+    with c1:
+        st.subheader("Verteilung der Durchschnitte")
+        st.plotly_chart(figures['box'], use_container_width=True)
+    with c2:
+        st.subheader("Notenverteilung (Anteil)")
+        st.plotly_chart(figures['share'], use_container_width=True)
+
+    st.subheader("Schwierigkeit der Prüfungen")
+    st.plotly_chart(figures['difficulty'], use_container_width=True)
+
+    st.subheader("Durchschnitt pro Semester")
+    per_semester = cohort['semesters'].pivot(index='class', columns='semester', values='mean')
+    st.dataframe(per_semester.style.format("{:.2f}", na_rep="–"), use_container_width=True)
+    st.caption("Mittel aller Noten im Semester (HS: August–Januar, FS: Februar–Juli).")
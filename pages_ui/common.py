@@ -0,0 +1,33 @@
+import json
+import streamlit as st
+import streamlit.components.v1 as components
+
+
+def show_print_report(report_html, file_name, key):
+    """Open a rendered report in a new window (print dialog) and offer it as HTML download"""
+    # JSON string literal instead of a backtick template: no manual escaping,
+    # only "</" has to be broken up so the report cannot close the script tag.
+    payload = json.dumps(report_html).replace("</", "<\\/")
+    components.html(
+        f"""
+        <script>
+            var printWindow = window.open('', '_blank');
+            printWindow.document.write({payload});
+            printWindow.document.close();
+        </script>
+        """,
+        height=0
+    )
+    st.download_button(
+        "⬇️ HTML",
+        data=report_html.encode("utf-8"),
+        file_name=file_name,
+        mime="text/html",
+        key=f"download_{key}",
+        help="Bericht als HTML-Datei herunterladen"
+    )
+
+
+# Partial reruns: widget changes inside a fragment rerun only that function.
+# Streamlit versions without fragments fall back to a plain function (full rerun).
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
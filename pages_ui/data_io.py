@@ -10,7 +10,8 @@ from utils.data_manager import (
     get_class_registry, load_json, save_json, CLASSES_DIR,
     rename_class, create_new_class, switch_class
 )
-from utils.grading import calculate_grade
+from utils.grading import grade_import_frame
+from utils.batch_reports import generate_batch_reports, pdf_renderer_available
 
 def render():
     st.title("📁 Daten & System")
@@ -106,22 +107,17 @@ def render():
                                     'url': assignment_url.strip(),
                                     'date': datetime.now().isoformat(),
                                     'grades': {},
+                                    'points': {},
                                     'comments': {} # Ensure comments dict is initialized
                                 }
                                 
-                                count = 0
-                                for _, row in df.iterrows():
-                                    aname = str(row['Anmeldename']).strip()
-                                    points = row.get('Punkte', 0)
-                                    student = next((s for s in st.session_state.students if s['Anmeldename'] == aname), None)
-                                    
-                                    if student and pd.notna(points):
-                                        try:
-                                            g_info = calculate_grade(float(points), float(max_points))
-                                            if g_info: 
-                                                new_assignment['grades'][student['id']] = g_info['note']
-                                                count += 1
-                                        except: continue
+                                # Grade the whole column in one step
+                                points_by_id, grades_by_id = grade_import_frame(
+                                    df, st.session_state.students, float(max_points), default_points=0.0
+                                )
+                                new_assignment['points'].update(points_by_id)
+                                new_assignment['grades'].update(grades_by_id)
+                                count = len(grades_by_id)
                                 
                                 st.session_state.assignments.append(new_assignment)
                                 log_audit_event("Noten-Import (Neu)", f"Prüfung: {assignment_name}, {count} Noten")
@@ -138,19 +134,14 @@ def render():
                         target_assignment = next(a for a in existing_assigns if a['name'] == selected_assign_name)
                         
                         if st.button("🔄 Update starten", type="primary"):
-                            update_count = 0
-                            for _, row in df.iterrows():
-                                aname = str(row['Anmeldename']).strip()
-                                points = row.get('Punkte', None)
-                                student = next((s for s in st.session_state.students if s['Anmeldename'] == aname), None)
-                                
-                                if student and pd.notna(points):
-                                    try:
-                                        g_info = calculate_grade(float(points), float(target_assignment['maxPoints']))
-                                        if g_info:
-                                            target_assignment['grades'][student['id']] = g_info['note']
-                                            update_count += 1
-                                    except: continue
+                            points_by_id, grades_by_id = grade_import_frame(
+                                df, st.session_state.students,
+                                float(target_assignment['maxPoints']),
+                                target_assignment['scaleType']
+                            )
+                            target_assignment['points'].update(points_by_id)
+                            target_assignment['grades'].update(grades_by_id)
+                            update_count = len(grades_by_id)
                             
                             log_audit_event("Noten-Import (Update)", f"{target_assignment['name']}: {update_count} Updates.")
                             save_all_data()
@@ -271,12 +262,10 @@ def render():
             )
             if st.button("🗑️ Löschen", type="primary"):
                 st.session_state.students.remove(student_to_delete)
-                # Cleanup grades and comments
+                # Cleanup grades, points and comments
                 for a in st.session_state.assignments:
-                    if student_to_delete['id'] in a['grades']:
-                        del a['grades'][student_to_delete['id']]
-                    if 'comments' in a and student_to_delete['id'] in a['comments']:
-                        del a['comments'][student_to_delete['id']]
+                    for field in ('grades', 'points', 'comments'):
+                        a[field].pop(student_to_delete['id'], None)
                         
                 save_all_data()
                 st.success("Gelöscht!")
@@ -292,6 +281,45 @@ def render():
         if st.button("📥 Als CSV herunterladen"):
             df = pd.DataFrame(st.session_state.students)
             st.download_button("Download CSV", df.to_csv(index=False), "students.csv", "text/csv")
+        
+        st.divider()
+        st.subheader("📄 Notenberichte (Sammelexport)")
+        st.caption("Erstellt für jede/n Schüler/in einen Notenbericht über alle Fächer und packt alle Berichte in eine ZIP-Datei.")
+        
+        registry = get_class_registry()
+        active_classes = [c for c in registry if not c.get('archived', False)]
+        current_id = st.session_state.get('current_class_id')
+        
+        all_active = st.checkbox("Alle aktiven (nicht archivierten) Klassen", value=False)
+        if all_active:
+            report_classes = active_classes
+        else:
+            report_classes = st.multiselect(
+                "Klassen",
+                registry,
+                default=[c for c in registry if c['id'] == current_id],
+                format_func=lambda c: c['name']
+            )
+        
+        pdf_available = pdf_renderer_available()
+        with_pdf = st.checkbox(
+            "Zusätzlich als PDF", value=False, disabled=not pdf_available,
+            help=None if pdf_available else "Kein lokaler PDF-Renderer gefunden (WeasyPrint oder wkhtmltopdf)."
+        )
+        
+        if st.button("📦 Berichte erstellen", disabled=not report_classes):
+            # The workers read from disk, so persist pending changes of the open class first
+            save_all_data(create_auto_backup=False)
+            buffer = io.BytesIO()
+            with st.spinner(f"Erstelle Berichte für {len(report_classes)} Klasse(n)..."):
+                file_count = generate_batch_reports(report_classes, buffer, with_pdf=with_pdf)
+            st.success(f"✅ {file_count} Dateien erstellt.")
+            st.download_button(
+                "💾 ZIP speichern",
+                data=buffer.getvalue(),
+                file_name=f"Notenberichte_{datetime.now().strftime('%Y%m%d')}.zip",
+                mime="application/zip"
+            )
 
     # ==========================================
     # TAB 4: SEMESTER SWITCH
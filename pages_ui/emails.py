@@ -2,10 +2,12 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import streamlit.components.v1 as components
-from utils.email_manager import send_email, log_email_event, get_last_email_status, get_students_with_changes
-from utils.grading import calculate_weighted_average
+from utils.email_manager import send_email, log_email_event
+from utils.cache import email_recipients
 from utils.template_manager import get_templates, save_new_template, delete_template, render_template
 from utils.data_manager import get_class_registry
+from utils.report_renderer import render_report, header, table, row, cell, esc
+from pages_ui.common import show_print_report, fragment
 
 def generate_email_log_print_html(class_name, email_log, subject_filter=None):
     """Generate printable HTML for email communication log"""
@@ -15,75 +17,118 @@ def generate_email_log_print_html(class_name, email_log, subject_filter=None):
     if subject_filter and subject_filter != "Alle":
         filtered_log = [log for log in email_log if log['subject'] == subject_filter]
     
-    # Build log rows
-    log_rows = ""
-    for log in filtered_log:
-        timestamp = datetime.fromisoformat(log['timestamp']).strftime("%d.%m.%Y %H:%M")
-        
-        status_color = "#388e3c" if log['status'] == 'sent' else "#d32f2f"
-        status_text = "✓ Gesendet" if log['status'] == 'sent' else "✗ Fehler"
-        
-        log_rows += f"""
-        <tr>
-            <td style="padding:8px; border-bottom:1px solid #ddd;">{timestamp}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd;"><strong>{log['student_name']}</strong></td>
-            <td style="padding:8px; border-bottom:1px solid #ddd;">{log['subject']}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd; color:{status_color}; font-weight:bold;">{status_text}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd; font-size:11px; color:#666;">{log.get('error', '-')}</td>
-        </tr>
-        """
+    def rows():
+        for log in filtered_log:
+            timestamp = datetime.fromisoformat(log['timestamp']).strftime("%d.%m.%Y %H:%M")
+            sent = log['status'] == 'sent'
+            yield row([
+                cell(timestamp),
+                cell(f"<strong>{esc(log['student_name'])}</strong>"),
+                cell(esc(log['subject'])),
+                cell("✓ Gesendet" if sent else "✗ Fehler", "p-good" if sent else "p-bad"),
+                cell(esc(log.get('error', '-')), "muted")
+            ])
     
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Email-Protokoll - {class_name}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .no-print {{ display: none; }}
-            }}
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            .header {{ margin-bottom: 20px; border-bottom: 2px solid #333; padding-bottom: 10px; }}
-            table {{ width: 100%; border-collapse: collapse; }}
-            .footer {{ margin-top: 30px; padding-top: 10px; border-top: 1px solid #ccc; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Email-Kommunikationsprotokoll</h1>
-            <p><strong>Klasse:</strong> {class_name} | <strong>Gedruckt am:</strong> {datetime.now().strftime("%d.%m.%Y, %H:%M Uhr")}</p>
-            <p><strong>Anzahl Einträge:</strong> {len(filtered_log)}</p>
-        </div>
-        
-        <table>
-            <thead>
-                <tr style="background-color: #f2f2f2;">
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Zeitstempel</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Empfänger</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Fach</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Status</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Bemerkung</th>
-                </tr>
-            </thead>
-            <tbody>
-                {log_rows}
-            </tbody>
-        </table>
-        
-        <div class="footer">
-            <p><strong>Legende:</strong> <span style="color:#388e3c;">✓</span> Erfolgreich gesendet | <span style="color:#d32f2f;">✗</span> Fehlgeschlagen</p>
+    return render_report(f"Email-Protokoll - {class_name}", [
+        header(
+            "Email-Kommunikationsprotokoll",
+            f"<strong>Klasse:</strong> {esc(class_name)} | <strong>Gedruckt am:</strong> {datetime.now().strftime('%d.%m.%Y, %H:%M Uhr')}",
+            f"<strong>Anzahl Einträge:</strong> {len(filtered_log)}"
+        ),
+        table(["Zeitstempel", "Empfänger", "Fach", "Status", "Bemerkung"], rows()),
+        """<div class="footer">
+            <p><strong>Legende:</strong> <span class="p-good">✓</span> Erfolgreich gesendet | <span class="p-bad">✗</span> Fehlgeschlagen</p>
         </div>
-        
-        <div class="no-print" style="margin-top: 20px; text-align: center;">
-            <button onclick="window.print()" style="padding: 10px 20px; font-size: 16px; cursor: pointer;">🖨️ Drucken</button>
-            <button onclick="window.close()" style="padding: 10px 20px; font-size: 16px; cursor: pointer; margin-left: 10px;">Schließen</button>
-        </div>
-    </body>
-    </html>
+        """
+    ])
+
+@fragment
+def render_recipient_selector(subject, recipients, preselected_ids, sender):
+    """
+    Recipient checkboxes of a subject from the cached candidate table. Runs as a fragment:
+    ticking a box reruns this selector and the send panel, not the page.
+    """
+    students = {s['id']: s for s in st.session_state.students}
+    selected_students = []
+
+    # Filter UI
+    filter_mode = st.radio("Filter:", ["Alle", "Nur Ungenügende (< 4.0)", "Manuelle Auswahl"], horizontal=True)
+
+    with st.container(height=300):
+        for recipient in recipients:
+            student = students.get(recipient['id'])
+            if student is None:
+                continue
+            avg = recipient['average']
+
+            # Determine "New Data" indicator
+            change_indicator = "🔔 Neu | " if recipient['has_changes'] else ""
+
+            # Filter Logic
+            should_select = False
+            if student['id'] in preselected_ids: should_select = True
+            elif filter_mode == "Alle": should_select = True
+            elif filter_mode == "Nur Ungenügende (< 4.0)" and avg and avg < 4.0: should_select = True
+
+            status_icon = "🟢" if recipient['last_status'] == 'sent' else "⚪"
+            avg_display = f"{avg:.2f}" if avg else "-"
+            label = f"{status_icon} {change_indicator}{student['Vorname']} {student['Nachname']} (Ø {avg_display})"
+            if st.checkbox(label, value=should_select, key=f"email_{student['id']}"):
+                selected_students.append(student)
+
+    averages = {r['id']: r['average'] for r in recipients}
+    render_send_panel(subject, selected_students, averages, sender)
+
+@fragment
+def render_send_panel(subject, selected_students, averages, sender):
+    """
+    Template choice, preview and sending for the selected students. Runs as a fragment
+    inside the selector; sending ends with a full rerun so the log and counters update.
     """
-    return html
+    if not selected_students:
+        return
+    sender_email, sender_pwd, sender_name = sender
+
+    st.write("---")
+    st.subheader(f"Vorschau ({len(selected_students)} Empfänger)")
+
+    templates = get_templates()
+    selected_template_name = st.selectbox("Vorlage", [t['name'] for t in templates])
+    selected_template = next(t for t in templates if t['name'] == selected_template_name)
+
+    def render_for(student):
+        graded = [a for a in st.session_state.assignments if a['subject'] == subject and student['id'] in a['grades']]
+        return render_template(selected_template, student, subject, averages.get(student['id']), graded, sender_name=sender_name)
+
+    subj_line, _, body_html = render_for(selected_students[0])
+
+    st.text_input("Betreff", subj_line, disabled=True)
+    with st.expander("HTML Vorschau ansehen"):
+        components.html(body_html, height=300, scrolling=True)
+
+    if st.button("🚀 Emails jetzt senden", type="primary"):
+        progress = st.progress(0)
+        status = st.empty()
+        success_count = 0
+
+        for i, stud in enumerate(selected_students):
+            status.text(f"Sende an {stud['Vorname']}...")
+            s_subj, s_text, s_html = render_for(stud)
+
+            recipient = f"{stud['Anmeldename']}@lernende.bbw.ch"
+            ok, msg = send_email(recipient, s_subj, s_text, sender_email, sender_pwd, html_body=s_html)
+
+            if ok:
+                success_count += 1
+                log_email_event(stud['id'], f"{stud['Vorname']} {stud['Nachname']}", subject, 'sent')
+            else:
+                log_email_event(stud['id'], f"{stud['Vorname']} {stud['Nachname']}", subject, 'failed', msg)
+
+            progress.progress((i+1)/len(selected_students))
+
+        status.text("Fertig!")
+        st.success(f"{success_count} Emails versendet.")
+        st.rerun()
 
 def render():
     st.title("✉️ Smart Email Center")
@@ -110,12 +155,13 @@ def render():
         # --- IMPROVEMENT 2: SMART BATCH REPORT ---
         st.subheader("🤖 Smart Aktionen")
         
-        # Determine who has new grades
-        students_with_changes = get_students_with_changes(selected_subject)
+        # Determine who has new grades (cached per grade and email-log version)
+        recipients = email_recipients(selected_subject)
+        changed_ids = {r['id'] for r in recipients if r['has_changes']}
         
         col_smart1, col_smart2 = st.columns([2, 1])
         with col_smart1:
-            st.info(f"System erkannt: **{len(students_with_changes)} Schüler/innen** haben neue Noten seit der letzten Email.")
+            st.info(f"System erkannt: **{len(changed_ids)} Schüler/innen** haben neue Noten seit der letzten Email.")
         
         with col_smart2:
             if st.button("✨ Wochenbericht senden (Smart Batch)", type="primary", use_container_width=True):
@@ -126,91 +172,17 @@ def render():
 
         # --- MANUAL SELECTION ---
         st.subheader("Empfänger Auswahl")
-        
-        templates = get_templates()
-        selected_template_name = st.selectbox("Vorlage", [t['name'] for t in templates])
-        selected_template = next(t for t in templates if t['name'] == selected_template_name)
 
         # Logic to handle Smart Batch Trigger
-        preselected_ids = []
+        preselected_ids = set()
         if st.session_state.get('smart_batch_trigger'):
-            preselected_ids = [s['id'] for s in students_with_changes]
+            preselected_ids = changed_ids
             st.success("Smart Filter angewendet: Nur Schüler mit Änderungen ausgewählt.")
             del st.session_state['smart_batch_trigger'] # Reset
 
-        selected_students = []
-        
-        # Filter UI
-        filter_mode = st.radio("Filter:", ["Alle", "Nur Ungenügende (< 4.0)", "Manuelle Auswahl"], horizontal=True)
-
-        with st.container(height=300):
-            for student in st.session_state.students:
-                avg = calculate_weighted_average(student['id'], selected_subject)
-                last_log = get_last_email_status(student['id'], selected_subject)
-                
-                # Determine "New Data" indicator
-                has_changes = student['id'] in [s['id'] for s in students_with_changes]
-                change_indicator = "🔔 Neu | " if has_changes else ""
-                
-                # Filter Logic
-                should_select = False
-                if student['id'] in preselected_ids: should_select = True
-                elif filter_mode == "Alle": should_select = True
-                elif filter_mode == "Nur Ungenügende (< 4.0)" and avg and avg < 4.0: should_select = True
-                
-                status_icon = "🟢" if last_log and last_log['status'] == 'sent' else "⚪"
-                # Calculate the display string first
-                avg_display = f"{avg:.2f}" if avg else "-"
-                # Use the pre-calculated string in the label
-                label = f"{status_icon} {change_indicator}{student['Vorname']} {student['Nachname']} (Ø {avg_display})"                
-                if st.checkbox(label, value=should_select, key=f"email_{student['id']}"):
-                    selected_students.append(student)
-
-        # --- PREVIEW & SEND ---
-        if selected_students:
-            st.write("---")
-            st.subheader(f"Vorschau ({len(selected_students)} Empfänger)")
-            
-            preview_student = selected_students[0]
-            student_assignments = [a for a in st.session_state.assignments if a['subject'] == selected_subject and preview_student['id'] in a.get('grades', {})]
-            w_avg = calculate_weighted_average(preview_student['id'], selected_subject)
-            
-            subj_line, _, body_html = render_template(
-                selected_template, preview_student, selected_subject, w_avg, student_assignments, sender_name=sender_name_input
-            )
-            
-            st.text_input("Betreff", subj_line, disabled=True)
-            with st.expander("HTML Vorschau ansehen"):
-                components.html(body_html, height=300, scrolling=True)
-            
-            if st.button("🚀 Emails jetzt senden", type="primary"):
-                progress = st.progress(0)
-                status = st.empty()
-                success_count = 0
-                
-                for i, stud in enumerate(selected_students):
-                    status.text(f"Sende an {stud['Vorname']}...")
-                    s_assigns = [a for a in st.session_state.assignments if a['subject'] == selected_subject and stud['id'] in a.get('grades', {})]
-                    s_avg = calculate_weighted_average(stud['id'], selected_subject)
-                    
-                    s_subj, s_text, s_html = render_template(
-                        selected_template, stud, selected_subject, s_avg, s_assigns, sender_name=sender_name_input
-                    )
-                    
-                    recipient = f"{stud['Anmeldename']}@lernende.bbw.ch"
-                    ok, msg = send_email(recipient, s_subj, s_text, sender_email, sender_pwd, html_body=s_html)
-                    
-                    if ok:
-                        success_count += 1
-                        log_email_event(stud['id'], f"{stud['Vorname']} {stud['Nachname']}", selected_subject, 'sent')
-                    else:
-                        log_email_event(stud['id'], f"{stud['Vorname']} {stud['Nachname']}", selected_subject, 'failed', msg)
-                    
-                    progress.progress((i+1)/len(selected_students))
-                
-                status.text("Fertig!")
-                st.success(f"{success_count} Emails versendet.")
-                st.rerun()
+        render_recipient_selector(
+            selected_subject, recipients, preselected_ids, (sender_email, sender_pwd, sender_name_input)
+        )
 
     # --- TAB 2: TEMPLATES ---
     with tab_templates:
@@ -276,16 +248,7 @@ def render():
                         st.session_state.email_log,
                         subject_filter
                     )
-                    components.html(
-                        f"""
-                        <script>
-                            var printWindow = window.open('', '_blank');
-                            printWindow.document.write(`{print_html.replace('`', '\\`')}`);
-                            printWindow.document.close();
-                        </script>
-                        """,
-                        height=0
-                    )
+                    show_print_report(print_html, f"Email_Protokoll_{class_name}.html", key="email_log")
             
             # Display log
             df = pd.DataFrame(st.session_state.email_log)
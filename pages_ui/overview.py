@@ -1,135 +1,58 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
-from utils.grading import calculate_weighted_average, round_to_half
+from utils.cache import grade_version, overview_summary
+from utils.gradebook import class_means, zeugnis_col, OVERALL_COL
+from utils.charts import AVERAGE_BIN_EDGES, bin_values, histogram_figure
+from utils.report_renderer import render_report, header, table, row, cell, esc, format_grade, tier_class
+from pages_ui.common import show_print_report
 
-def get_color_for_grade(grade):
-    """Return color hex code based on grade thresholds"""
-    if grade is None: return "#333333"
-    
-    val = float(grade)
-    if val >= 4.5:
-        return "#28a745" # Green
-    elif val >= 4.0:
-        return "#ffc107" # Yellow (Darker for readability)
-    elif val >= 3.5:
-        return "#fd7e14" # Orange
-    else:
-        return "#dc3545" # Red
-
-def generate_print_html(class_name, students, subjects, config):
+def generate_print_html(class_name, summary, subjects):
     """Generate printable HTML for class overview with new color coding"""
     
-    # Build student data
-    table_rows = ""
-    for student in students:
-        row = f"""
-        <tr>
-            <td style="padding:8px; border-bottom:1px solid #ddd;">{student['Vorname']} {student['Nachname']}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd;">{student['Anmeldename']}</td>
-        """
-        
-        subject_avgs = []
-        for subject in subjects:
-            avg = calculate_weighted_average(student['id'], subject)
-            avg_text = f"{avg:.2f}" if avg else "-"
-            
-            # Rounded Subject Grade
-            zeugnis_val = round_to_half(avg)
-            zeugnis_text = f"{zeugnis_val:.1f}" if zeugnis_val else "-"
-            
-            # Colors
-            color_avg = get_color_for_grade(avg)
-            if color_avg == "#ffc107": color_avg = "#d39e00"
-            
-            color_zeugnis = get_color_for_grade(zeugnis_val)
-            if color_zeugnis == "#ffc107": color_zeugnis = "#d39e00"
-            
-            row += f'<td style="padding:8px; border-bottom:1px solid #ddd; color:{color_avg};">{avg_text}</td>'
-            row += f'<td style="padding:8px; border-bottom:1px solid #ddd; color:{color_zeugnis}; font-weight:bold; background-color:#f9f9f9;">{zeugnis_text}</td>'
-            
-            if avg:
-                subject_avgs.append(avg)
-        
-        # Overall average
-        overall_avg = round(sum(subject_avgs) / len(subject_avgs), 2) if subject_avgs else None
-        overall_text = f"{overall_avg:.2f}" if overall_avg else "-"
-        
-        overall_color = get_color_for_grade(overall_avg)
-        if overall_color == "#ffc107": overall_color = "#d39e00"
-        
-        row += f'<td style="padding:8px; border-bottom:1px solid #ddd; color:{overall_color}; font-weight:bold; background-color:#e8f0fe;">{overall_text}</td>'
-        row += "</tr>"
-        table_rows += row
-    
-    # Build subject headers
-    # We need 2 columns per subject: Name + Note
-    subject_headers = ""
+    # Columns: Name, Anmeldename, per subject (raw + Zeugnisnote), overall
+    columns = ["Name", "Anmeldename"]
     for s in subjects:
-        subject_headers += f'<th style="text-align:left; padding:8px; border-bottom:2px solid #333;">{s}</th>'
-        subject_headers += f'<th style="text-align:left; padding:8px; border-bottom:2px solid #333; background-color:#f9f9f9;">Note</th>'
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Klassenübersicht - {class_name}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .no-print {{ display: none; }}
-            }}
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            .header {{ margin-bottom: 20px; border-bottom: 2px solid #333; padding-bottom: 10px; }}
-            table {{ width: 100%; border-collapse: collapse; }}
-            .footer {{ margin-top: 30px; padding-top: 10px; border-top: 1px solid #ccc; font-size: 12px; color: #666; }}
-            .legend {{ margin-top: 10px; font-size: 12px; }}
-            .legend span {{ margin-right: 15px; font-weight: bold; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Klassenübersicht: {class_name}</h1>
-            <p><strong>Datum:</strong> {datetime.now().strftime("%d.%m.%Y, %H:%M Uhr")}</p>
-            <p><strong>Anzahl Lernende:</strong> {len(students)}</p>
-        </div>
-        
-        <table>
-            <thead>
-                <tr style="background-color: #f2f2f2;">
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Name</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Anmeldename</th>
-                    {subject_headers}
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333; background-color:#e8e8e8;">Gesamt Ø</th>
-                </tr>
-            </thead>
-            <tbody>
-                {table_rows}
-            </tbody>
-        </table>
-        
-        <div class="legend">
-            <strong>Legende:</strong> 
-            <span style="color:#28a745;">■ ≥ 4.5 (Gut)</span>
-            <span style="color:#d39e00;">■ 4.0-4.5 (Genügend)</span>
-            <span style="color:#fd7e14;">■ 3.5-4.0 (Ungnügend)</span>
-            <span style="color:#dc3545;">■ < 3.5 (Kritisch)</span>
-        </div>
-        
-        <div class="footer">
-            <p>Unterschrift Lehrperson: _________________________________</p>
-        </div>
-        
-        <div class="no-print" style="margin-top: 20px; text-align: center;">
-            <button onclick="window.print()" style="padding: 10px 20px; font-size: 16px; cursor: pointer;">🖨️ Drucken</button>
-            <button onclick="window.close()" style="padding: 10px 20px; font-size: 16px; cursor: pointer; margin-left: 10px;">Schließen</button>
+        columns += [s, ("Note", "shade")]
+    columns.append(("Gesamt Ø", "overall-head"))
+    
+    def rows():
+        for student in summary.to_dict('records'):
+            cells = [cell(esc(student['Name'])), cell(esc(student['Anmeldename']))]
+            for subject in subjects:
+                avg = student[subject]
+                zeugnis_val = student[zeugnis_col(subject)]
+                cells.append(cell(format_grade(avg, 2), tier_class(avg)))
+                cells.append(cell(format_grade(zeugnis_val, 1), f"{tier_class(zeugnis_val)} b shade"))
+            overall_avg = student[OVERALL_COL]
+            cells.append(cell(format_grade(overall_avg, 2), f"{tier_class(overall_avg)} overall"))
+            yield row(cells)
+    
+    return render_report(f"Klassenübersicht - {class_name}", [
+        header(
+            f"Klassenübersicht: {class_name}",
+            f"<strong>Datum:</strong> {datetime.now().strftime('%d.%m.%Y, %H:%M Uhr')}",
+            f"<strong>Anzahl Lernende:</strong> {len(summary)}"
+        ),
+        table(columns, rows()),
+        """<div class="legend">
+            <strong>Legende:</strong>
+            <span class="g-good">■ ≥ 4.5 (Gut)</span>
+            <span class="g-ok">■ 4.0-4.5 (Genügend)</span>
+            <span class="g-warn">■ 3.5-4.0 (Ungnügend)</span>
+            <span class="g-bad">■ &lt; 3.5 (Kritisch)</span>
         </div>
-    </body>
-    </html>
-    """
-    return html
+        <div class="footer"><p>Unterschrift Lehrperson: _________________________________</p></div>
+        """
+    ])
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_average_histograms(data_version, subjects, _summary):
+    """Histogram of the student averages per subject, binned once per data version (shared figures)"""
+    return {
+        subject: histogram_figure(bin_values(_summary[subject], AVERAGE_BIN_EDGES), AVERAGE_BIN_EDGES, height=200)
+        for subject in subjects
+    }
 
 def render():
     st.title("📊 Übersicht")
@@ -144,28 +67,17 @@ def render():
     current_class = next((c for c in registry if c['id'] == st.session_state.get('current_class_id')), None)
     class_name = current_class['name'] if current_class else "Unbekannte Klasse"
     
+    subjects = st.session_state.config['subjects']
+    summary = overview_summary(subjects)
+    
     # ==========================================
     # PRINT BUTTON
     # ==========================================
     col_title, col_print = st.columns([5, 1])
     with col_print:
         if st.button("🖨️ Drucken", help="Klassenübersicht drucken"):
-            print_html = generate_print_html(
-                class_name,
-                st.session_state.students,
-                st.session_state.config['subjects'],
-                st.session_state.config
-            )
-            st.components.v1.html(
-                f"""
-                <script>
-                    var printWindow = window.open('', '_blank');
-                    printWindow.document.write(`{print_html.replace('`', '\\`')}`);
-                    printWindow.document.close();
-                </script>
-                """,
-                height=0
-            )
+            print_html = generate_print_html(class_name, summary, subjects)
+            show_print_report(print_html, f"Klassenuebersicht_{class_name}.html", key="overview")
     
     # ==========================================
     # WEEKLY WORKFLOW SUMMARY
@@ -184,14 +96,7 @@ def render():
                     graded_count += 1
             except: pass
             
-        at_risk_count = 0
-        for s in st.session_state.students:
-            is_risk = False
-            for subj in st.session_state.config['subjects']:
-                avg = calculate_weighted_average(s['id'], subj)
-                if avg and avg < 4.0:
-                    is_risk = True
-            if is_risk: at_risk_count += 1
+        at_risk_count = int(summary['at_risk'].sum())
             
         kpi1, kpi2, kpi3 = st.columns(3)
         with kpi1:
@@ -208,97 +113,40 @@ def render():
     # STANDARD OVERVIEW (WITH COLOR)
     # ==========================================
     col1, col2 = st.columns(2)
+    means = class_means(summary, subjects)
+    histograms = get_average_histograms(grade_version(), tuple(subjects), _summary=summary)
     
-    for idx, subject in enumerate(st.session_state.config['subjects']):
+    for idx, subject in enumerate(subjects):
         with col1 if idx == 0 else col2:
             st.subheader(subject)
             
-            avg_grades = []
-            for student in st.session_state.students:
-                avg = calculate_weighted_average(student['id'], subject)
-                if avg is not None:
-                    avg_grades.append(avg)
-            
-            class_avg = round(sum(avg_grades) / len(avg_grades), 2) if avg_grades else 0
+            avg_grades = summary[subject].dropna()
+            class_avg = round(means[subject], 2) if not avg_grades.empty else 0
             
             st.metric("Klassendurchschnitt", f"{class_avg:.2f}")
             
-            if avg_grades:
-                fig = px.histogram(
-                    x=avg_grades, nbins=20,
-                    labels={'x': 'Note', 'y': 'Anzahl'}
-                )
-                fig.update_layout(showlegend=False, height=200, margin=dict(l=20, r=20, t=20, b=20))
-                fig.update_xaxes(range=[1, 6])
-                st.plotly_chart(fig, use_container_width=True)
+            if not avg_grades.empty:
+                st.plotly_chart(histograms[subject], use_container_width=True)
     
     st.subheader("Alle Schüler/innen")
     
     # Sorting Control
     sort_option = st.radio("Sortierung", ["Vorname", "Nachname"], horizontal=True)
     
-    sorted_students = st.session_state.students
     if sort_option == "Nachname":
-        sorted_students = sorted(st.session_state.students, key=lambda s: (s['Nachname'], s['Vorname']))
+        sorted_summary = summary.sort_values(['Nachname', 'Vorname'], kind='stable')
     else:
-        sorted_students = sorted(st.session_state.students, key=lambda s: (s['Vorname'], s['Nachname']))
+        sorted_summary = summary.sort_values(['Vorname', 'Nachname'], kind='stable')
     
     # 1. Prepare Data
-    table_data = []
-    
-    # Track dynamic column names
-    subject_cols = []
-    
-    for student in sorted_students:
-        row = {
-            'Name': f"{student['Vorname']} {student['Nachname']}",
-            'Anmeldename': student['Anmeldename']
-        }
-        subject_avgs = []
-        for subject in st.session_state.config['subjects']:
-            avg = calculate_weighted_average(student['id'], subject)
-            
-            # 1. Raw Subject Average
-            row[subject] = float(f"{avg:.2f}") if avg else None
-            if subject not in subject_cols: subject_cols.append(subject)
-            
-            # 2. Rounded Subject Average (Zeugnisnote)
-            zeugnis_col_name = f"{subject} (Z)"
-            zeugnis_val = round_to_half(avg)
-            row[zeugnis_col_name] = zeugnis_val
-            if zeugnis_col_name not in subject_cols: subject_cols.append(zeugnis_col_name)
-
-            if avg:
-                subject_avgs.append(avg)
-
-        # Overall Average (Arithmetic)
-        overall_avg = round(sum(subject_avgs) / len(subject_avgs), 2) if subject_avgs else None
-        row['Gesamt Ø'] = float(f"{overall_avg:.2f}") if overall_avg else None
-        
-        table_data.append(row)
-    
-    df = pd.DataFrame(table_data)
+    subject_cols = [c for s in subjects for c in (s, zeugnis_col(s))]
+    numeric_cols = subject_cols + [OVERALL_COL]
+    df = sorted_summary[['Name', 'Anmeldename'] + numeric_cols].reset_index(drop=True)
     
     # 2. Add Class Averages Row
     if not df.empty:
-        avg_row = {'Name': '<b>Ø KLASSE</b>', 'Anmeldename': ''}
-        
-        # Calculate averages for all numeric columns
-        for col in subject_cols + ['Gesamt Ø']:
-            if col in df.columns:
-                # Filter out None/NaN before processing
-                valid_values = [x for x in df[col] if pd.notna(x)]
-                if valid_values:
-                    avg_val = sum(valid_values) / len(valid_values)
-                    avg_row[col] = avg_val
-                else:
-                    avg_row[col] = None
-        
-        # Create a DataFrame for the average row
-        avg_df = pd.DataFrame([avg_row])
-        
-        # Append to main DataFrame
-        df = pd.concat([df, avg_df], ignore_index=True)
+        avg_row = {'Name': '<b>Ø KLASSE</b>', 'Anmeldename': '', **means.to_dict()}
+        df = pd.concat([df, pd.DataFrame([avg_row])], ignore_index=True)
 
     # 3. Define Style Function
     def color_grades(val):
@@ -318,7 +166,6 @@ def render():
         return f'color: {color}; font-weight: bold'
 
     # 4. Apply Style & Formatting
-    numeric_cols = subject_cols + ['Gesamt Ø']
     styled_df = df.style.map(color_grades, subset=numeric_cols)
     
     # Identify rows
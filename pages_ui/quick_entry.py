@@ -1,81 +1,47 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_manager import save_all_data, log_audit_event, get_class_registry
-from utils.grading import calculate_grade
+from utils.data_manager import save_grade_changes, get_class_registry
+from utils.cache import grade_version
+from utils.gradebook import diff_grade_matrix, build_assignment_frame
+from utils.grading import get_gradebook
+from utils.report_renderer import render_report, header, table, row, cell, esc, format_grade, pass_class, MATRIX_CSS
+from pages_ui.common import show_print_report
 
 def generate_quick_entry_print_html(class_name, students, assignments):
     """Generate printable HTML for grade matrix"""
     
-    # Build header row
-    header_cells = ""
-    for a in assignments:
-        header_cells += f'<th style="text-align:center; padding:6px; border:1px solid #333; font-size:11px; background-color:#e8e8e8;">{a["name"]}<br><small>({a["subject"][0:3]}, {a["maxPoints"]}P)</small></th>'
+    columns = [("Schüler/in", "shade")] + [
+        (f"{a['name']} ({a['subject'][0:3]}, {a['maxPoints']}P)", "") for a in assignments
+    ]
+    grade_dicts = [a['grades'] for a in assignments]
     
-    # Build data rows
-    data_rows = ""
-    for s in students:
-        row = f'<tr><td style="padding:6px; border:1px solid #333; background-color:#f9f9f9;"><strong>{s["Vorname"]} {s["Nachname"]}</strong></td>'
-        
-        for a in assignments:
-            grade = a['grades'].get(s['id'])
-            grade_text = f"{float(grade):.1f}" if grade else "-"
-            
-            # Color coding
-            color = "#d32f2f" if grade and float(grade) < 4.0 else "#388e3c" if grade and float(grade) >= 5.0 else "#333"
-            row += f'<td style="text-align:center; padding:6px; border:1px solid #333; color:{color}; font-weight:bold;">{grade_text}</td>'
-        
-        row += '</tr>'
-        data_rows += row
+    def rows():
+        for s in students:
+            sid = s['id']
+            cells = [cell(f"<strong>{esc(s['Vorname'])} {esc(s['Nachname'])}</strong>", "shade")]
+            for grades in grade_dicts:
+                grade = grades.get(sid)
+                cells.append(cell(format_grade(grade), f"c {pass_class(grade)}"))
+            yield row(cells)
     
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Notenmatrix - {class_name}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .no-print {{ display: none; }}
-                @page {{ size: landscape; }}
-            }}
-            body {{ font-family: Arial, sans-serif; padding: 15px; font-size: 12px; }}
-            .header {{ margin-bottom: 15px; border-bottom: 2px solid #333; padding-bottom: 8px; }}
-            table {{ width: 100%; border-collapse: collapse; }}
-            .footer {{ margin-top: 20px; padding-top: 8px; border-top: 1px solid #ccc; font-size: 11px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h2>Notenmatrix: {class_name}</h2>
-            <p><strong>Datum:</strong> {datetime.now().strftime("%d.%m.%Y, %H:%M Uhr")} | <strong>Lernende:</strong> {len(students)} | <strong>Prüfungen:</strong> {len(assignments)}</p>
-        </div>
-        
-        <table>
-            <thead>
-                <tr style="background-color: #f2f2f2;">
-                    <th style="text-align:left; padding:6px; border:1px solid #333;">Schüler/in</th>
-                    {header_cells}
-                </tr>
-            </thead>
-            <tbody>
-                {data_rows}
-            </tbody>
-        </table>
-        
-        <div class="footer">
-            <p><strong>Legende:</strong> <span style="color:#d32f2f;">■</span> Ungenügend (&lt;4.0) | <span style="color:#388e3c;">■</span> Gut (≥5.0) | <strong>Format:</strong> Querformat empfohlen</p>
-        </div>
-        
-        <div class="no-print" style="margin-top: 20px; text-align: center;">
-            <button onclick="window.print()" style="padding: 10px 20px; font-size: 16px; cursor: pointer;">🖨️ Drucken</button>
-            <button onclick="window.close()" style="padding: 10px 20px; font-size: 16px; cursor: pointer; margin-left: 10px;">Schließen</button>
+    return render_report(f"Notenmatrix - {class_name}", [
+        header(
+            f"Notenmatrix: {class_name}",
+            f"<strong>Datum:</strong> {datetime.now().strftime('%d.%m.%Y, %H:%M Uhr')} | <strong>Lernende:</strong> {len(students)} | <strong>Prüfungen:</strong> {len(assignments)}",
+            level=2
+        ),
+        table(columns, rows(), css="matrix"),
+        """<div class="footer">
+            <p><strong>Legende:</strong> <span class="p-bad">■</span> Ungenügend (&lt;4.0) | <span class="p-good">■</span> Gut (≥5.0) | <strong>Format:</strong> Querformat empfohlen</p>
         </div>
-    </body>
-    </html>
-    """
-    return html
+        """
+    ], extra_css=MATRIX_CSS)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_grade_store(data_version, _students, _assignments, _book):
+    """(students x assignments) grade matrix and the assignment metadata frame of the quick entry grid"""
+    return _book.matrix([s['id'] for s in _students]), build_assignment_frame(_assignments)
 
 def render():
     st.title("⚡ Schnelleingabe")
@@ -91,7 +57,15 @@ def render():
     class_name = current_class['name'] if current_class else "Unbekannte Klasse"
 
     # 1. Configuration / Filter
-    col_filter1, col_filter2, col_print = st.columns([2, 2, 1])
+    matrix_all, meta = get_grade_store(
+        grade_version(), _students=st.session_state.students, _assignments=st.session_state.assignments,
+        _book=get_gradebook()
+    )
+    if meta.empty:
+        st.info("Keine Prüfungen gefunden.")
+        return
+
+    col_filter1, col_filter2, col_filter3 = st.columns([2, 2, 2])
     with col_filter1:
         selected_subjects = st.multiselect(
             "Fächer anzeigen", 
@@ -100,20 +74,39 @@ def render():
         )
     
     with col_filter2:
-        recent_limit = st.slider("Nur die letzten X Prüfungen anzeigen", 1, 10, 5)
+        type_opts = sorted(meta['type'].unique())
+        selected_types = st.multiselect("Typen", type_opts, default=type_opts)
     
-    # 2. Prepare Data for Grid
-    visible_assignments = [
-        a for a in st.session_state.assignments 
-        if a['subject'] in selected_subjects
-    ]
-    visible_assignments.sort(key=lambda x: x['date'], reverse=True)
-    visible_assignments = visible_assignments[:recent_limit]
+    with col_filter3:
+        first_day, last_day = meta['date'].min().date(), meta['date'].max().date()
+        date_range = st.date_input(
+            "Zeitraum", value=(first_day, last_day),
+            min_value=first_day, max_value=last_day, format="DD.MM.YYYY"
+        )
+    
+    # 2. Filter the cached column store (newest first) and cut out one page
+    mask = meta['subject'].isin(selected_subjects) & meta['type'].isin(selected_types)
+    if len(date_range) == 2:
+        mask &= meta['date'].between(pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))
+    filtered_ids = meta.index[mask]
 
-    if not visible_assignments:
+    if filtered_ids.empty:
         st.info("Keine Prüfungen gefunden.")
         return
 
+    col_page_size, col_page, col_print = st.columns([2, 2, 1])
+    with col_page_size:
+        page_size = st.select_slider("Prüfungen pro Seite", [5, 10, 15, 20], value=10)
+    page_count = -(-len(filtered_ids) // page_size)
+    with col_page:
+        page = st.number_input(f"Seite (von {page_count})", min_value=1, max_value=page_count, value=1, step=1)
+    
+    page_ids = filtered_ids[(page - 1) * page_size: page * page_size]
+    st.caption(f"Prüfungen {(page - 1) * page_size + 1}–{(page - 1) * page_size + len(page_ids)} von {len(filtered_ids)}")
+
+    by_id = {a['id']: a for a in st.session_state.assignments}
+    visible_assignments = [by_id[aid] for aid in page_ids]
+
     # PRINT BUTTON
     with col_print:
         if st.button("🖨️ Drucken", help="Notenmatrix drucken"):
@@ -122,55 +115,28 @@ def render():
                 st.session_state.students,
                 visible_assignments
             )
-            st.components.v1.html(
-                f"""
-                <script>
-                    var printWindow = window.open('', '_blank');
-                    printWindow.document.write(`{print_html.replace('`', '\\`')}`);
-                    printWindow.document.close();
-                </script>
-                """,
-                height=0
-            )
-
-    # Build the Dataframe structure
-    data = []
-    col_map = {} 
-    
-    for s in st.session_state.students:
-        row = {
-            "Student_ID": s['id'],
-            "Name": f"{s['Vorname']} {s['Nachname']}"
-        }
-        
-        for a in visible_assignments:
-            col_name = f"{a['name']} ({a['subject'][0:3]})"
-            col_map[col_name] = a['id']
-            grade = a['grades'].get(s['id'])
-            row[col_name] = float(grade) if grade else None
-            
-        data.append(row)
+            show_print_report(print_html, f"Notenmatrix_{class_name}.html", key="quick_entry")
 
-    df = pd.DataFrame(data)
+    # Build the grid from the cached matrix: columns keyed by assignment id, labels only for display
+    matrix = matrix_all[page_ids]
+    df = matrix.copy()
+    df.insert(0, "Name", [f"{s['Vorname']} {s['Nachname']}" for s in st.session_state.students])
     
     # Configure the Data Editor
     column_config = {
-        "Student_ID": None,
         "Name": st.column_config.TextColumn("Schüler/in", disabled=True)
     }
-    
-    for col in df.columns:
-        if col not in ["Student_ID", "Name"]:
-            column_config[col] = st.column_config.NumberColumn(
-                col,
-                min_value=0.0,
-                max_value=6.0,
-                step=0.1,
-                format="%.1f"
-            )
+    for a in visible_assignments:
+        column_config[a['id']] = st.column_config.NumberColumn(
+            f"{a['name']} ({a['subject'][0:3]}, {datetime.fromisoformat(a['date']).strftime('%d.%m.')})",
+            min_value=0.0,
+            max_value=6.0,
+            step=0.1,
+            format="%.1f"
+        )
 
     # 3. Render Editor
-    st.info("💡 Tipp: Navigieren Sie mit Pfeiltasten. Änderungen werden erst beim Klick auf 'Speichern' übernommen.")
+    st.info("💡 Tipp: Navigieren Sie mit Pfeiltasten. Änderungen werden erst beim Klick auf 'Speichern' übernommen – vor dem Blättern speichern.")
     
     edited_df = st.data_editor(
         df,
@@ -178,40 +144,19 @@ def render():
         hide_index=True,
         use_container_width=True,
         num_rows="fixed",
-        height=400 if len(data) > 10 else None
+        height=400 if len(df) > 10 else None
     )
 
-    # 4. Save Logic
+    # 4. Save Logic: only the changed cells are applied and journaled
+    st.caption("ℹ️ Von Hand geänderte Noten ersetzen die gespeicherten Punkte (beim Neuberechnen aus Punkten bleiben sie erhalten).")
     if st.button("💾 Alle Änderungen speichern", type="primary", use_container_width=True):
-        changes_count = 0
+        changes = diff_grade_matrix(matrix, edited_df[matrix.columns])
         
-        for index, row in edited_df.iterrows():
-            s_id = row['Student_ID']
-            
-            for col_name, assign_id in col_map.items():
-                new_val = row[col_name]
-                assignment = next((a for a in st.session_state.assignments if a['id'] == assign_id), None)
-                if not assignment: continue
-
-                old_val = assignment['grades'].get(s_id)
-                
-                if pd.notna(new_val):
-                    if float(new_val) == 0.0:
-                        if s_id in assignment['grades']:
-                            del assignment['grades'][s_id]
-                            changes_count += 1
-                    elif float(new_val) != float(old_val if old_val else 0):
-                        assignment['grades'][s_id] = round(float(new_val), 1)
-                        changes_count += 1
-                
-                elif pd.isna(new_val) and old_val is not None:
-                    del assignment['grades'][s_id]
-                    changes_count += 1
-
-        if changes_count > 0:
-            log_audit_event("Schnelleingabe", f"{changes_count} Noten aktualisiert.")
-            save_all_data()
-            st.success(f"✅ {changes_count} Änderungen erfolgreich gespeichert!")
+        if changes:
+            if save_grade_changes(changes, "Schnelleingabe"):
+                st.success(f"✅ {len(changes)} Änderungen erfolgreich gespeichert!")
+            else:
+                st.error("Änderungen konnten nicht gespeichert werden.")
             st.rerun()
         else:
-            st.info("Keine Änderungen erkannt.")
\ No newline at end of file
+            st.info("Keine Änderungen erkannt.")
@@ -2,116 +2,261 @@ import streamlit as st
 import pandas as pd
 import io
 from datetime import datetime
-from utils.data_manager import save_all_data, log_audit_event, get_class_registry
-from utils.grading import calculate_weighted_average, get_student_trend, calculate_grade
+from utils.data_manager import save_all_data, log_audit_event, get_class_registry, get_data_version
+from utils.cache import grade_version
+from utils.grading import grade_import_frame, get_gradebook
+from utils.gradebook import build_entry_frame, diff_entry_frame, apply_entry_changes
+from utils.scales import compute_regrade, apply_regrade, resolve_scale
+from utils.report_renderer import render_report, header, table, row, cell, esc, format_grade, pass_class
+from pages_ui.common import show_print_report, fragment
 
 def generate_assignment_print_html(class_name, subject, assignment, students):
     """Generate printable HTML for a specific assignment including comments"""
     
-    # Ensure comments dict exists
-    comments = assignment.get('comments', {})
-
-    # Build grade rows
-    grade_rows = ""
-    grades_list = []
-    
-    for s in students:
-        grade = assignment['grades'].get(s['id'])
-        comment = comments.get(s['id'], "")
-        
-        grade_text = f"{float(grade):.1f}" if grade else "-"
-        
-        if grade:
-            grades_list.append(float(grade))
-        
-        color = "#d32f2f" if grade and float(grade) < 4.0 else "#388e3c" if grade and float(grade) >= 5.0 else "#333"
-        
-        grade_rows += f"""
-        <tr>
-            <td style="padding:8px; border-bottom:1px solid #ddd;">{s['Vorname']} {s['Nachname']}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd;">{s['Anmeldename']}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd; text-align:center; color:{color}; font-weight:bold; font-size:14px;">{grade_text}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd; font-style:italic; color:#555;">{comment}</td>
-            <td style="padding:8px; border-bottom:1px solid #ddd; text-align:center;">________</td>
-        </tr>
-        """
+    comments = assignment['comments']
+    grades = assignment['grades']
     
     # Calculate statistics
+    grades_list = [g for g in (grades.get(s['id']) for s in students) if g is not None]
     class_avg = round(sum(grades_list) / len(grades_list), 2) if grades_list else 0
     below_4 = len([g for g in grades_list if g < 4.0])
     above_5 = len([g for g in grades_list if g >= 5.0])
     
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <title>Prüfung: {assignment['name']}</title>
-        <style>
-            @media print {{
-                body {{ margin: 0; }}
-                .no-print {{ display: none; }}
-            }}
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            .header {{ margin-bottom: 20px; border-bottom: 2px solid #333; padding-bottom: 10px; }}
-            .info-box {{ background-color: #f5f5f5; padding: 15px; margin-bottom: 20px; border-left: 4px solid #333; }}
-            table {{ width: 100%; border-collapse: collapse; }}
-            .footer {{ margin-top: 30px; padding-top: 10px; border-top: 1px solid #ccc; font-size: 12px; color: #666; }}
-            .stats {{ margin: 20px 0; }}
-            .stat-box {{ display: inline-block; padding: 10px 15px; margin-right: 15px; background-color: #e8f5e9; border-radius: 4px; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>Prüfung: {assignment['name']}</h1>
-            <p><strong>Klasse:</strong> {class_name} | <strong>Fach:</strong> {subject}</p>
-        </div>
-        
-        <div class="info-box">
-            <p style="margin:5px 0;"><strong>Typ:</strong> {assignment['type']} | <strong>Gewichtung:</strong> {assignment['weight']:.1f} | <strong>Max. Punkte:</strong> {assignment['maxPoints']}</p>
-            <p style="margin:5px 0;"><strong>Datum:</strong> {datetime.fromisoformat(assignment['date']).strftime("%d.%m.%Y")} | <strong>Bewertung:</strong> {assignment['scaleType']}</p>
+    def rows():
+        for s in students:
+            grade = grades.get(s['id'])
+            yield row([
+                cell(esc(f"{s['Vorname']} {s['Nachname']}")),
+                cell(esc(s['Anmeldename'])),
+                cell(format_grade(grade), f"c {pass_class(grade)}"),
+                cell(esc(comments.get(s['id'], "")), "comment"),
+                cell("________", "c")
+            ])
+    
+    date_str = datetime.fromisoformat(assignment['date']).strftime("%d.%m.%Y")
+    
+    return render_report(f"Prüfung: {assignment['name']}", [
+        header(
+            f"Prüfung: {assignment['name']}",
+            f"<strong>Klasse:</strong> {esc(class_name)} | <strong>Fach:</strong> {esc(subject)}"
+        ),
+        f"""<div class="info-box">
+            <p><strong>Typ:</strong> {esc(assignment['type'])} | <strong>Gewichtung:</strong> {assignment['weight']:.1f} | <strong>Max. Punkte:</strong> {assignment['maxPoints']}</p>
+            <p><strong>Datum:</strong> {date_str} | <strong>Bewertung:</strong> {esc(assignment['scaleType'])}</p>
         </div>
-        
         <div class="stats">
-            <div class="stat-box">
-                <strong>Klassenschnitt:</strong> {class_avg:.2f}
-            </div>
-            <div class="stat-box" style="background-color: #ffebee;">
-                <strong>Ungenügend (&lt;4.0):</strong> {below_4}
-            </div>
-            <div class="stat-box" style="background-color: #e8f5e9;">
-                <strong>Gut (≥5.0):</strong> {above_5}
-            </div>
+            <div class="stat-box"><strong>Klassenschnitt:</strong> {class_avg:.2f}</div>
+            <div class="stat-box bad"><strong>Ungenügend (&lt;4.0):</strong> {below_4}</div>
+            <div class="stat-box"><strong>Gut (≥5.0):</strong> {above_5}</div>
         </div>
-        
-        <table>
-            <thead>
-                <tr style="background-color: #f2f2f2;">
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Name</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Anmeldename</th>
-                    <th style="text-align:center; padding:8px; border-bottom:2px solid #333; width:80px;">Note</th>
-                    <th style="text-align:left; padding:8px; border-bottom:2px solid #333;">Kommentar</th>
-                    <th style="text-align:center; padding:8px; border-bottom:2px solid #333; width:100px;">Unterschrift</th>
-                </tr>
-            </thead>
-            <tbody>
-                {grade_rows}
-            </tbody>
-        </table>
-        
-        <div class="footer">
+        """,
+        table(
+            ["Name", "Anmeldename", ("Note", "c"), "Kommentar", ("Unterschrift", "c")],
+            rows()
+        ),
+        f"""<div class="footer">
             <p><strong>Gedruckt am:</strong> {datetime.now().strftime("%d.%m.%Y, %H:%M Uhr")}</p>
             <p>Unterschrift Lehrperson: _________________________________</p>
         </div>
-        
-        <div class="no-print" style="margin-top: 20px; text-align: center;">
-            <button onclick="window.print()" style="padding: 10px 20px; font-size: 16px; cursor: pointer;">🖨️ Drucken</button>
-            <button onclick="window.close()" style="padding: 10px 20px; font-size: 16px; cursor: pointer; margin-left: 10px;">Schließen</button>
-        </div>
-    </body>
-    </html>
+        """
+    ])
+
+def render_regrade_preview(changes, skipped, key):
+    """Show the grades a regrade would change. Returns True if the user confirms."""
+    if skipped:
+        st.caption(f"ℹ️ {skipped} Noten ohne gespeicherte Punkte bleiben unverändert.")
+    
+    if not changes:
+        st.info("Keine Noten ändern sich.")
+        return False
+    
+    names = {s['id']: f"{s['Vorname']} {s['Nachname']}" for s in st.session_state.students}
+    df_changes = pd.DataFrame(changes)
+    df_changes['name'] = df_changes['student_id'].map(names).fillna(df_changes['student_id'])
+    
+    st.write(f"**{len(changes)} Noten ändern sich:**")
+    st.dataframe(
+        df_changes[['assignment', 'name', 'old', 'new']],
+        column_config={
+            "assignment": "Prüfung",
+            "name": "Schüler/in",
+            "old": st.column_config.NumberColumn("Alt", format="%.1f"),
+            "new": st.column_config.NumberColumn("Neu", format="%.1f")
+        },
+        hide_index=True,
+        use_container_width=True,
+        height=min(300, 40 + 35 * len(changes))
+    )
+    return st.button("✅ Neue Noten übernehmen", key=key, type="primary")
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_assignment_stats(data_version, _book):
+    """Grade count, mean and count below 4.0 per assignment id, keyed on the grade data version"""
+    return _book.assignment_stats()
+
+@fragment
+def render_bulk_regrade(subject):
+    """
+    Regrade of a subject or the whole class. The preview is computed only on request
+    and kept for its scope and data version (st.expander runs its content even when
+    collapsed); as a fragment, the scope radio and the buttons rerun only this function.
     """
-    return html
+    st.caption("Berechnet alle Noten aus den gespeicherten Punkten mit der aktuellen Skala und den Max. Punkten neu.")
+    scope = st.radio("Bereich", [f"Nur {subject}", "Ganze Klasse"], horizontal=True, key=f"regrade_scope_{subject}")
+    preview_key = f"regrade_preview_{subject}"
+    if st.button("🔍 Vorschau berechnen", key=f"regrade_compute_{subject}"):
+        scope_assignments = st.session_state.assignments
+        if scope != "Ganze Klasse":
+            scope_assignments = [a for a in scope_assignments if a['subject'] == subject]
+        st.session_state[preview_key] = (scope, get_data_version('assignments', 'config')) + compute_regrade(
+            scope_assignments, st.session_state.config['scales']
+        )
+    preview = st.session_state.get(preview_key)
+    if not preview or preview[:2] != (scope, get_data_version('assignments', 'config')):
+        return  # not computed yet, or for another scope / older data
+
+    changes, skipped = preview[2:]
+    if render_regrade_preview(changes, skipped, key=f"regrade_apply_{subject}"):
+        apply_regrade(st.session_state.assignments, changes)
+        log_audit_event("Noten neu berechnet", f"{scope}: {len(changes)} Noten in {len({c['assignment_id'] for c in changes})} Prüfungen geändert")
+        save_all_data()
+        del st.session_state[preview_key]
+        st.success(f"✅ {len(changes)} Noten neu berechnet.")
+        st.rerun()
+
+@fragment
+def render_assignment_detail(assignment_id, subject, class_name, stats):
+    """
+    Edit view of one assignment. Runs as a fragment: edits inside only rerun this
+    function; saving triggers a full rerun so the header rows pick up the new values.
+    """
+    assignment = next((a for a in st.session_state.assignments if a['id'] == assignment_id), None)
+    if assignment is None:
+        return
+
+    # PRINT BUTTON in header
+    col_header, col_print_btn = st.columns([5, 1])
+    with col_print_btn:
+        if st.button("🖨️", key=f"print_{assignment['id']}", help="Prüfung drucken"):
+            print_html = generate_assignment_print_html(
+                class_name,
+                subject,
+                assignment,
+                st.session_state.students
+            )
+            show_print_report(print_html, f"Pruefung_{assignment['name']}.html", key=f"print_{assignment['id']}")
+
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        st.caption(f"Max: {assignment['maxPoints']} Pkt | Typ: {assignment['type']}")
+        current_dt = datetime.fromisoformat(assignment['date'])
+        new_date = st.date_input("Datum", value=current_dt.date(), key=f"date_{assignment['id']}", format="DD.MM.YYYY")
+        if new_date != current_dt.date():
+            assignment['date'] = datetime.combine(new_date, datetime.min.time()).isoformat()
+            save_all_data()
+            st.rerun()
+
+    with col2:
+        new_weight = st.number_input("Gewichtung", min_value=0.1, value=float(assignment['weight']), step=0.1, key=f"weight_{assignment['id']}")
+        if new_weight != assignment['weight']:
+            assignment['weight'] = new_weight
+            save_all_data()
+            st.rerun()
+
+    with col3:
+        st.write("") 
+        if st.button("🗑️", key=f"del_{assignment['id']}", help="Löschen"):
+            st.session_state.assignments.remove(assignment)
+            save_all_data()
+            st.rerun()
+
+    # --- SCALE / MAX POINTS CORRECTION ---
+    with st.popover("⚙️ Bewertung anpassen"):
+        scale_opts = list(st.session_state.config['scales'].keys())
+        current_scale = assignment['scaleType']
+        new_max = st.number_input("Max. Punkte", min_value=0.5, value=float(assignment['maxPoints']), step=0.5, key=f"regrade_max_{assignment['id']}")
+        new_scale = st.selectbox(
+            "Bewertungsskala", scale_opts,
+            index=scale_opts.index(current_scale) if current_scale in scale_opts else 0,
+            key=f"regrade_scale_{assignment['id']}"
+        )
+
+        # Preview on a copy, the stored assignment stays untouched until confirmed
+        proposed = {**assignment, 'maxPoints': new_max, 'scaleType': new_scale}
+        changes, skipped = compute_regrade([proposed], st.session_state.config['scales'])
+        settings_changed = new_max != float(assignment['maxPoints']) or new_scale != current_scale
+
+        if settings_changed or changes:
+            if render_regrade_preview(changes, skipped, key=f"regrade_confirm_{assignment['id']}"):
+                old_settings = f"{assignment['maxPoints']} Pkt / {current_scale}"
+                assignment['maxPoints'] = new_max
+                assignment['scaleType'] = new_scale
+                apply_regrade([assignment], changes)
+                log_audit_event(
+                    "Noten neu berechnet",
+                    f"{assignment['name']}: {old_settings} -> {new_max} Pkt / {new_scale}, {len(changes)} Noten geändert"
+                )
+                save_all_data()
+                st.rerun()
+        else:
+            st.caption("Max. Punkte oder Skala ändern, um die Auswirkung zu sehen.")
+
+    st.divider()
+
+    if stats:
+        stat_col1, stat_col2 = st.columns(2)
+        stat_col1.metric("Ø Live", f"{stats['mean']:.2f}")
+        stat_col2.metric("Unter 4.0", f"{int(stats['below'])}", delta_color="inverse")
+
+    # --- Points & comments: one editor per assignment ---
+    trends = get_gradebook().trends(subject)
+    st.write("**Punkte & Kommentare eingeben:**")
+    st.caption("Punkte eintragen oder Zelle leeren (Note wird entfernt). Die Note wird beim Speichern aus den Punkten berechnet.")
+
+    editor_key = f"entry_{assignment['id']}"
+    max_p = float(assignment['maxPoints'])
+    original = build_entry_frame(st.session_state.students, assignment, trends)
+    edited = st.data_editor(
+        original,
+        column_config={
+            "Name": st.column_config.TextColumn("Name", disabled=True),
+            "Punkte": st.column_config.NumberColumn(
+                "Punkte", min_value=0.0, max_value=max(max_p, original['Punkte'].fillna(0.0).max()),
+                step=0.5, format="%.1f"
+            ),
+            "Note": st.column_config.NumberColumn("Note", disabled=True, format="%.1f"),
+            "Kommentar": st.column_config.TextColumn("Kommentar")
+        },
+        hide_index=True,
+        use_container_width=True,
+        num_rows="fixed",
+        key=editor_key
+    )
+
+    # Preview of the edited rows only; grades of all changed rows in one step
+    scale = resolve_scale(assignment['scaleType'], st.session_state.config['scales'])
+    changes = diff_entry_frame(original, edited, max_p, scale)
+    if not changes.empty:
+        st.write(f"**{len(changes)} Zeilen geändert:**")
+        st.dataframe(
+            changes[['Name', 'points_old', 'points_new', 'grade_old', 'grade_new', 'comment_new']],
+            column_config={
+                "points_old": st.column_config.NumberColumn("Punkte alt", format="%.1f"),
+                "points_new": st.column_config.NumberColumn("Punkte neu", format="%.1f"),
+                "grade_old": st.column_config.NumberColumn("Note alt", format="%.1f"),
+                "grade_new": st.column_config.NumberColumn("Note neu", format="%.1f"),
+                "comment_new": "Kommentar"
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        if st.button("💾 Punkte & Kommentare speichern", type="primary", use_container_width=True, key=f"save_{editor_key}"):
+            count = apply_entry_changes(assignment, changes)
+            save_all_data()
+            # Drop the pending edits, the editor restarts from the saved data
+            del st.session_state[editor_key]
+            st.success(f"✅ {count} Einträge aktualisiert!")
+            st.rerun()
 
 def render(subject):
     st.title(f"📝 {subject}")
@@ -259,24 +404,13 @@ def render(subject):
                                 'comments': {} # Initialize comments
                             }
                             
-                            count = 0
-                            for _, row in df_imp.iterrows():
-                                aname = str(row['Anmeldename']).strip()
-                                points = row.get('Punkte', 0)
-                                student = next((s for s in st.session_state.students if s['Anmeldename'] == aname), None)
-                                
-                                if student and pd.notna(points):
-                                    try:
-                                        p_val = float(points)
-                                        # Save points
-                                        new_assign['points'][student['id']] = p_val
-                                        
-                                        # Calculate Grade
-                                        g_info = calculate_grade(p_val, float(imp_max))
-                                        if g_info: 
-                                            new_assign['grades'][student['id']] = g_info['note']
-                                            count += 1
-                                    except: continue
+                            # Grade the whole column in one step
+                            points_by_id, grades_by_id = grade_import_frame(
+                                df_imp, st.session_state.students, float(imp_max), default_points=0.0
+                            )
+                            new_assign['points'].update(points_by_id)
+                            new_assign['grades'].update(grades_by_id)
+                            count = len(grades_by_id)
                             
                             st.session_state.assignments.append(new_assign)
                             log_audit_event("Import via Fach", f"{imp_name}: {count} Noten")
@@ -293,209 +427,38 @@ def render(subject):
         st.info("Noch keine Prüfungen vorhanden.")
         return
     
-    for assignment in subject_assignments:
-        # Backward compatibility for existing assignments without comments
-        if 'comments' not in assignment:
-            assignment['comments'] = {}
-
-        grades_vals = [float(g) for g in assignment['grades'].values() if g]
-        avg_display = f" (Ø {sum(grades_vals) / len(grades_vals):.2f})" if grades_vals else ""
-        link_icon = "🔗 " if assignment.get('url') else ""
-        
-        with st.expander(f"📋 {link_icon}{assignment['name']} {avg_display}"):
-            # PRINT BUTTON in header
-            col_header, col_print_btn = st.columns([5, 1])
-            with col_print_btn:
-                if st.button("🖨️", key=f"print_{assignment['id']}", help="Prüfung drucken"):
-                    print_html = generate_assignment_print_html(
-                        class_name,
-                        subject,
-                        assignment,
-                        st.session_state.students
-                    )
-                    st.components.v1.html(
-                        f"""
-                        <script>
-                            var printWindow = window.open('', '_blank');
-                            printWindow.document.write(`{print_html.replace('`', '\\`')}`);
-                            printWindow.document.close();
-                        </script>
-                        """,
-                        height=0
-                    )
-            
-            col1, col2, col3 = st.columns([2, 2, 1])
-            with col1:
-                st.caption(f"Max: {assignment['maxPoints']} Pkt | Typ: {assignment['type']}")
-                current_dt = datetime.fromisoformat(assignment['date'])
-                new_date = st.date_input("Datum", value=current_dt.date(), key=f"date_{assignment['id']}", format="DD.MM.YYYY")
-                if new_date != current_dt.date():
-                    assignment['date'] = datetime.combine(new_date, datetime.min.time()).isoformat()
-                    save_all_data()
-                    st.rerun()
-
-            with col2:
-                new_weight = st.number_input("Gewichtung", min_value=0.1, value=float(assignment['weight']), step=0.1, key=f"weight_{assignment['id']}")
-                if new_weight != assignment['weight']:
-                    assignment['weight'] = new_weight
-                    save_all_data()
-
-            with col3:
-                st.write("") 
-                if st.button("🗑️", key=f"del_{assignment['id']}", help="Löschen"):
-                    st.session_state.assignments.remove(assignment)
-                    save_all_data()
-                    st.rerun()
-
-            st.divider()
-            
-            if grades_vals:
-                curr_avg = sum(grades_vals) / len(grades_vals)
-                below_4 = len([g for g in grades_vals if g < 4.0])
-                stat_col1, stat_col2 = st.columns(2)
-                stat_col1.metric("Ø Live", f"{curr_avg:.2f}")
-                stat_col2.metric("Unter 4.0", f"{below_4}", delta_color="inverse")
-            
-            # --- UPDATED: List View for Grades + Comments ---
-            st.write("**Punkte & Kommentare eingeben:**")
-            st.caption("Geben Sie die Punktzahl ein. Die Note wird automatisch berechnet.")
-            
-            # Init points dict if missing (legacy compatibility)
-            if 'points' not in assignment:
-                assignment['points'] = {}
-
-            with st.form(f"grades_form_{assignment['id']}"):
-                input_points = {}
-                comment_data = {}
-                
-                # Header
-                h1, h2, h3, h4 = st.columns([2, 1, 1, 2])
-                h1.markdown("**Name**")
-                h2.markdown("**Punkte**")
-                h3.markdown("**Note**")
-                h4.markdown("**Kommentar**")
-                
-                for student in st.session_state.students:
-                    c_name, c_points, c_grade_display, c_comm = st.columns([2, 1, 1, 2])
-                    
-                    # 1. Name Column
-                    trend_icon, _ = get_student_trend(student['id'], subject)
-                    c_name.markdown(f"{student['Vorname']} {student['Nachname']} {trend_icon if trend_icon else ''}")
-                    
-                    # 2. Points Input
-                    current_points = assignment['points'].get(student['id'])
-                    # If no points but grade exists (legacy), we can't easily guess points. Leave 0.0 or None.
-                    # User must enter points to update.
-                    
-                    val_points = float(current_points) if current_points is not None else 0.0
-                    
-                    new_points_input = c_points.number_input(
-                        "Punkte", 
-                        min_value=0.0, 
-                        max_value=float(assignment['maxPoints']), 
-                        value=val_points, 
-                        step=0.5, 
-                        format="%.1f", 
-                        key=f"p_{assignment['id']}_{student['id']}",
-                        label_visibility="collapsed"
-                    )
-                    
-                    # Store input for saving
-                    input_points[student['id']] = new_points_input
-
-                    # 3. Calculated Grade Display (Dynamic Preview based on SAVED or INPUT if strictly reactive? Form submit means we see saved)
-                    # Actually, we want to see the grade for the *saved* points or the *current* grade.
-                    # Since we are in a form, we can't react live to input without st.session_state callbacks or rerun, but form prevents rerun.
-                    # So we display the grade corresponding to the CURRENT saved state.
-                    
-                    # However, if points are missing but grade exists (legacy), show grade.
-                    saved_grade = assignment['grades'].get(student['id'])
-                    
-                    # Calculate what the grade WOULD be based on current points (if we had live update).
-                    # But here we just show the stored grade.
-                    grade_display = "-"
-                    grade_color = "#333"
-                    
-                    if saved_grade:
-                        grade_val = float(saved_grade)
-                        grade_display = f"{grade_val:.1f}"
-                        if grade_val >= 5.0: grade_color = "#388e3c"
-                        elif grade_val < 4.0: grade_color = "#d32f2f"
-                    
-                    c_grade_display.markdown(f"<span style='font-size:16px; font-weight:bold; color:{grade_color}'>{grade_display}</span>", unsafe_allow_html=True)
-                        
-                    # 4. Comment Column
-                    current_comment = assignment['comments'].get(student['id'], "")
-                    new_comment = c_comm.text_input(
-                        "Kommentar",
-                        value=current_comment,
-                        key=f"c_{assignment['id']}_{student['id']}",
-                        label_visibility="collapsed",
-                        placeholder="Optional"
-                    )
-                    if new_comment is not None:
-                        comment_data[student['id']] = new_comment
-
-                st.write("")
-                if st.form_submit_button("💾 Punkte & Kommentare speichern", type="primary", use_container_width=True):
-                    changes_log = []
-                    
-                    max_p = float(assignment['maxPoints'])
-                    
-                    for student_id, new_p_val in input_points.items():
-                        # Logic:
-                        # If 0.0 -> Assume empty/delete? Or is 0 points valid?
-                        # Usually 0 points is valid (Note 1).
-                        # We need a way to clear? Maybe empty input? st.number_input doesn't allow None easily if initialized with float.
-                        # Let's assume if it matches "current_points" (which might be None->0.0), no change?
-                        # Check if changed
-                        
-                        old_p_val = assignment['points'].get(student_id)
-                        old_p_float = float(old_p_val) if old_p_val is not None else 0.0
-                        
-                        # Only update if changed or if it was None and now is 0.0 (explicit set)
-                        # Actually easier: Just save whatever is in the box?
-                        # But we need to handle "Delete".
-                        # For now, let's update if different.
-                        
-                        # Handle Legacy case where points were missing but grade existed.
-                        # If user leaves it at 0.0, and grade exists, do we overwrite grade to 1.0 (0 points)?
-                        # DANGER.
-                        # If legacy (no points, has grade) and user submits 0.0 -> It might be they didn't touch it.
-                        # We should skip if points were None and input is 0.0 ? 
-                        # But what if they WANT to give 0 points?
-                        
-                        # Better approach: check if modified using session state? form doesn't support that easily.
-                        # Let's trust the input. If legacy user wants to keep grade, they must enter points.
-                        # OR: We only update if points dict has entry OR input > 0.
-                        
-                        if new_p_val == 0.0 and old_p_val is None and student_id in assignment['grades']:
-                             # Legacy protection: User didn't enter points (default 0), but grade exists. Don't overwrite.
-                             continue
-                        
-                        if new_p_val != old_p_float or (old_p_val is None and new_p_val == 0.0):
-                             # Update Points
-                             assignment['points'][student_id] = new_p_val
-                             
-                             # Calculate and Update Grade
-                             g_res = calculate_grade(new_p_val, max_p, assignment.get('scaleType', '60% Scale'))
-                             if g_res:
-                                 assignment['grades'][student_id] = g_res['note']
-                             
-                             changes_log.append("Updated Grade")
-                            
-                    # Update Comments
-                    for student_id, new_comment in comment_data.items():
-                        old_comment = assignment['comments'].get(student_id, "")
-                        if new_comment.strip() != old_comment:
-                            if new_comment.strip():
-                                assignment['comments'][student_id] = new_comment.strip()
-                            else:
-                                if student_id in assignment['comments']:
-                                    del assignment['comments'][student_id]
-                            changes_log.append("Changed Comment")
-                    
-                    if changes_log:
-                        save_all_data()
-                        st.success(f"✅ Noten aktualisiert!")
-                        st.rerun()
+    # --- BULK REGRADE (after scale/maxPoints corrections) ---
+    with st.expander("🔄 Noten aus Punkten neu berechnen", expanded=False):
+        render_bulk_regrade(subject)
+    
+    # --- HEADER ROWS: every assignment as one line, details only for the selected one ---
+    stats = get_assignment_stats(grade_version(), _book=get_gradebook())
+    header_rows = pd.DataFrame([
+        {
+            'id': a['id'],
+            'Prüfung': f"{'🔗 ' if a['url'] else ''}{a['name']}",
+            'Datum': datetime.fromisoformat(a['date']).strftime("%d.%m.%Y"),
+            'Typ': a['type'],
+            'Gewicht': a['weight']
+        }
+        for a in subject_assignments
+    ]).join(stats, on='id')
+    
+    st.dataframe(
+        header_rows.drop(columns='id'),
+        column_config={
+            "Gewicht": st.column_config.NumberColumn("Gewicht", format="%.1f"),
+            "count": st.column_config.NumberColumn("Noten", format="%d"),
+            "mean": st.column_config.NumberColumn("Ø", format="%.2f"),
+            "below": st.column_config.NumberColumn("Unter 4.0", format="%d")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    labels = dict(zip(header_rows['id'], header_rows['Prüfung'] + " (" + header_rows['Datum'] + ")"))
+    selected_id = st.selectbox(
+        "📋 Prüfung bearbeiten", list(labels), format_func=labels.get, key=f"open_assignment_{subject}"
+    )
+    selected_stats = stats.loc[selected_id].to_dict() if selected_id in stats.index else None
+    render_assignment_detail(selected_id, subject, class_name, selected_stats)
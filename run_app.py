@@ -1,4 +1,5 @@
 import streamlit.web.cli as stcli
+import multiprocessing
 import os, sys
 
 def resolve_path(path):
@@ -9,6 +10,10 @@ def resolve_path(path):
     return os.path.join(os.path.abspath("."), path)
 
 if __name__ == "__main__":
+    # Die Notenberichte laufen in Worker-Prozessen (ProcessPoolExecutor): In der Exe
+    # starten diese sonst erneut Streamlit statt den Worker-Code.
+    multiprocessing.freeze_support()
+
     # Wir simulieren den Befehl "streamlit run app.py"
     sys.argv = [
         "streamlit",
@@ -0,0 +1,85 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from utils.gradebook import GradeBook
+from utils.storage import class_signature
+from utils.analytics import build_analytics_cube, student_grades, load_classes, semester_label, build_cohort
+
+STUDENTS = [
+    {"id": "s1", "Vorname": "Anna", "Nachname": "Meier", "Anmeldename": "anna.meier"},
+    {"id": "s2", "Vorname": "Ben", "Nachname": "Huber", "Anmeldename": "ben.huber"},
+    {"id": "s3", "Vorname": "Cem", "Nachname": "Keller", "Anmeldename": "cem.keller"},
+]
+
+ASSIGNMENTS = [
+    {"id": "a2", "name": "Test 2", "subject": "SPRACHE", "type": "Test", "weight": 1.0, "maxPoints": 10,
+     "date": "2025-02-01T00:00:00", "grades": {"s1": 5.0, "s2": 3.0, "s3": 4.0}},
+    {"id": "a1", "name": "Test 1", "subject": "SPRACHE", "type": "Test", "weight": 1.0, "maxPoints": 10,
+     "date": "2025-01-01T00:00:00", "grades": {"s1": 4.0, "s2": 3.5}},
+    {"id": "g1", "name": "Vortrag", "subject": "GESELLSCHAFT", "type": "Lernpfad", "weight": 2.0, "maxPoints": 20,
+     "date": "2025-01-15T00:00:00", "grades": {}},
+]
+
+def build_cube():
+    return build_analytics_cube(GradeBook(STUDENTS, ASSIGNMENTS), STUDENTS, ASSIGNMENTS, ["SPRACHE", "GESELLSCHAFT"])
+
+def test_assignment_statistics():
+    stats = build_cube()['assignments']
+
+    assert list(stats.index) == ["a1", "g1", "a2"]  # by date
+    a2 = stats.loc["a2"]
+    assert a2['n'] == 3 and a2['mean'] == pytest.approx(4.0) and a2['median'] == 4.0
+    assert a2['min'] == 3.0 and a2['max'] == 5.0
+    assert a2['fail_rate'] == pytest.approx(1 / 3)
+    assert stats.loc["g1", "n"] == 0 and np.isnan(stats.loc["g1", "mean"])
+
+def test_student_rank_and_trend():
+    students = build_cube()['students'].set_index(['subject', 'student_id'])
+    sprache = students.loc["SPRACHE"]
+
+    assert sprache.loc["s1", "average"] == 4.5 and sprache.loc["s1", "rank"] == 1
+    assert sprache.loc["s2", "rank"] == 3
+    assert sprache.loc["s1", "trend"] == pytest.approx(1.0)    # 4.0 -> 5.0
+    assert sprache.loc["s2", "trend"] == pytest.approx(-0.5)   # 3.5 -> 3.0
+    assert np.isnan(sprache.loc["s3", "trend"])                # one grade only
+    assert students.loc["GESELLSCHAFT"]['average'].isna().all()
+
+def test_bins_and_student_grades():
+    cube = build_cube()
+    assert cube['bins']["SPRACHE"].sum() == 5
+    assert cube['bins']["GESELLSCHAFT"].sum() == 0
+
+    df = student_grades(GradeBook(STUDENTS, ASSIGNMENTS), cube, "s3", "SPRACHE")
+    assert list(df.index) == ["a2"]
+    assert df.loc["a2", "Difference"] == pytest.approx(0.0)
+
+def test_semester_label():
+    dates = pd.Series(pd.to_datetime(["2024-08-20", "2025-01-10", "2025-02-03", "2025-07-31"]))
+    assert list(semester_label(dates)) == ["HS 2024", "HS 2024", "FS 2025", "FS 2025"]
+
+def test_load_classes_and_cohort(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    other = [{**ASSIGNMENTS[0], "id": "b1", "date": "2024-09-01T00:00:00", "grades": {"s1": 6.0, "s2": 5.0}}]
+    for class_id, assignments in (("class_a", ASSIGNMENTS), ("class_b", other)):
+        class_dir = tmp_path / "data" / "classes" / class_id
+        class_dir.mkdir(parents=True)
+        (class_dir / "students.json").write_text(json.dumps(STUDENTS), encoding="utf-8")
+        (class_dir / "assignments.json").write_text(json.dumps(assignments), encoding="utf-8")
+
+    loaded = load_classes(["class_a", "class_b", "missing"])
+    assert sorted(loaded) == ["class_a", "class_b"]
+    assert class_signature("class_a")[0] == 2 and class_signature("missing") == (0, 0)
+
+    cohort = build_cohort({"A": loaded["class_a"], "B": loaded["class_b"]}, "SPRACHE")
+    classes = cohort['classes'].set_index('class')
+    assert classes.loc["A", "graded"] == 3 and classes.loc["B", "graded"] == 2
+    assert classes.loc["B", "mean"] == pytest.approx(5.5)
+    assert classes.loc["A", "fail_share"] == pytest.approx(1 / 3)   # s2 at 3.25
+    assert cohort['bins']["A"].sum() == 5
+
+    assert len(cohort['assignments']) == 3                          # ungraded GESELLSCHAFT excluded
+    semesters = cohort['semesters'].set_index(['class', 'semester'])
+    assert semesters.loc[("A", "HS 2024"), 'mean'] == pytest.approx(3.75)   # January grades
+    assert semesters.loc[("A", "FS 2025"), 'mean'] == pytest.approx(4.0)
+    assert semesters.loc[("B", "HS 2024"), 'n'] == 2
@@ -0,0 +1,64 @@
+import io
+import json
+import zipfile
+from utils.batch_reports import generate_batch_reports
+
+def write_class(root, class_id, students, assignments):
+    class_dir = root / "data" / "classes" / class_id
+    class_dir.mkdir(parents=True)
+    (class_dir / "students.json").write_text(json.dumps(students), encoding="utf-8")
+    (class_dir / "assignments.json").write_text(json.dumps(assignments), encoding="utf-8")
+    (class_dir / "config.json").write_text(json.dumps({"subjects": ["GESELLSCHAFT", "SPRACHE"]}), encoding="utf-8")
+
+STUDENTS = [
+    {"id": "student_a", "Anmeldename": "a.muster", "Vorname": "Anna", "Nachname": "Muster"},
+    {"id": "student_b", "Anmeldename": "b.beispiel", "Vorname": "Ben", "Nachname": "Beispiel"},
+]
+
+ASSIGNMENTS = [
+    {"id": "a1", "name": "Test <1>", "subject": "GESELLSCHAFT", "type": "Test", "weight": 2.0,
+     "date": "2025-03-01T10:00:00", "grades": {"student_a": 5.5}, "comments": {"student_b": "fehlt"}},
+]
+
+def test_batch_reports_zip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_class(tmp_path, "class_1111", STUDENTS, ASSIGNMENTS)
+    write_class(tmp_path, "class_2222", STUDENTS[:1], [])
+    classes = [{"id": "class_1111", "name": "4A"}, {"id": "class_2222", "name": "4B"}]
+
+    buffer = io.BytesIO()
+    count = generate_batch_reports(classes, buffer, max_workers=2)
+
+    with zipfile.ZipFile(buffer) as zf:
+        names = sorted(zf.namelist())
+        report = zf.read("4A_1111/Muster_Anna_a.muster.html").decode("utf-8")
+
+    assert count == 3
+    assert names == ["4A_1111/Beispiel_Ben_b.beispiel.html", "4A_1111/Muster_Anna_a.muster.html", "4B_2222/Muster_Anna_a.muster.html"]
+    assert "Test &lt;1&gt;" in report
+    assert "5.50" in report  # subject average
+    assert "Keine Noten vorhanden." in report  # SPRACHE has no grades
+
+def test_subject_report_uses_assignment_ids():
+    import pandas as pd
+    from utils.batch_reports import render_subject_report
+
+    # Two assignments with the same name: rows are matched by id, not by name
+    assignments = {
+        "a1": {"id": "a1", "comments": {"student_a": "gut <gemacht>"}},
+        "a2": {"id": "a2", "comments": {}},
+    }
+    grades = pd.DataFrame({
+        "Assignment": ["Test", "Test"],
+        "Date": pd.to_datetime(["2025-03-01", "2025-04-01"]),
+        "Type": ["Test", "Test"],
+        "Weight": [2.0, 1.0],
+        "Grade": [5.5, 3.5],
+        "ClassAverage": [4.75, 4.0],
+    }, index=["a1", "a2"])
+    html = render_subject_report("Klasse <1>", "SPRACHE", STUDENTS[0], 4.83, grades, assignments, date_str="01.05.2025")
+
+    assert "Notenblatt SPRACHE: Anna Muster" in html and "Klasse &lt;1&gt;" in html
+    assert html.count("gut &lt;gemacht&gt;") == 1
+    assert "01.03.2025" in html and "01.04.2025" in html and "4.75" in html
+    assert '<td class="p-bad">3.5</td>' in html
@@ -0,0 +1,26 @@
+from benchmarks.datasets import SCALES, make_dataset
+from benchmarks.run import CASES, run_benchmarks, compare
+
+def test_dataset_is_seeded_and_sized():
+    classes = make_dataset('tiny', seed=1)
+    n_classes, n_students, n_assignments = SCALES['tiny']
+    assert len(classes) == n_classes
+    _, _, students, assignments = classes[0]
+    assert len(students) == n_students and len(assignments) == n_assignments
+    assert make_dataset('tiny', seed=1) == classes and make_dataset('tiny', seed=2) != classes
+
+def test_every_case_runs_on_tiny_scale(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = run_benchmarks(['tiny'], min_rounds=1, max_rounds=1, min_time=0, log=lambda line: None)
+
+    # Multi-class cases are skipped for a single class
+    assert set(results['results']) == {f"tiny/{name}" for name in CASES} - {"tiny/load_all_classes", "tiny/cohort"}
+    assert all(timing['rounds'] == 1 for timing in results['results'].values())
+    assert results['meta']['scales']['tiny'] == {'classes': 1, 'students': 6, 'assignments': 8}
+    assert list(tmp_path.iterdir()) == []  # everything ran in a temporary folder
+
+def test_compare_with_baseline():
+    baseline = {'results': {'s/a': {'median_ms': 10.0}, 's/b': {'median_ms': 10.0}, 's/gone': {'median_ms': 1.0}}}
+    current = {'results': {'s/a': {'median_ms': 13.0}, 's/b': {'median_ms': 10.5}, 's/new': {'median_ms': 1.0}}}
+    rows = {key: status for key, _, _, _, status in compare(current, baseline, threshold=0.2)}
+    assert rows == {'s/a': "slower", 's/b': "same"}
@@ -0,0 +1,41 @@
+from streamlit.testing.v1 import AppTest
+
+def cache_script():
+    import streamlit as st
+    from utils.cache import subject_averages, email_recipients
+    from utils.data_manager import bump_data_version
+
+    st.session_state.update(current_class_id="class_c", data_load_id="load_1")
+    st.session_state.students = [{"id": "s1", "Vorname": "Anna", "Nachname": "Muster"}]
+    st.session_state.assignments = [{"id": "a1", "subject": "SPRACHE", "weight": 1.0, "date": "2025-03-01T10:00:00", "grades": {"s1": 4.0}}]
+    st.session_state.email_log = []
+    results = [subject_averages("SPRACHE")["s1"]]
+
+    # In-place changes are only seen after the mutation API bumped the collection
+    st.session_state.assignments[0]['grades']['s1'] = 5.0
+    results.append(subject_averages("SPRACHE")["s1"])
+    bump_data_version('email_log')
+    results.append(subject_averages("SPRACHE")["s1"])
+    bump_data_version('assignments')
+    results.append(subject_averages("SPRACHE")["s1"])
+
+    first = email_recipients("SPRACHE")[0]['last_status']
+    st.session_state.email_log.insert(0, {"timestamp": "2025-03-02T10:00:00", "student_id": "s1", "subject": "SPRACHE", "status": "sent"})
+    before = email_recipients("SPRACHE")[0]['last_status']
+    bump_data_version('email_log')
+    after = email_recipients("SPRACHE")[0]['last_status']
+    st.write(repr((results, first, before, after)))
+
+def test_helpers_follow_collection_versions():
+    at = AppTest.from_function(cache_script, default_timeout=30).run()
+    assert not at.exception
+    assert at.markdown[0].value == "([4.0, 4.0, 4.0, 5.0], None, None, 'sent')"
+
+def test_helpers_read_only_their_arguments():
+    from utils.cache import _subject_averages
+    from utils.gradebook import GradeBook
+
+    # No session state outside a run: the result comes from the passed GradeBook alone
+    assignments = [{"id": "a1", "subject": "SPRACHE", "weight": 1.0, "date": "2025-03-01", "grades": {"s1": 4.5}}]
+    book = GradeBook([{"id": "s1"}, {"id": "s2"}], assignments)
+    assert _subject_averages(("class_x", "load_x", (0, 0)), "SPRACHE", book) == {"s1": 4.5, "s2": None}
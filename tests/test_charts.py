@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from utils.charts import AVERAGE_BIN_EDGES, bin_values, histogram_figure, trend_figure, cohort_box_figure
+
+def test_bin_values_ignores_nan():
+    counts = bin_values([1.0, 4.1, 4.2, np.nan, 6.0], AVERAGE_BIN_EDGES)
+    assert counts.sum() == 4
+    assert counts[0] == 1 and counts[-1] == 1          # 6.0 falls into the last bin
+    assert counts[np.searchsorted(AVERAGE_BIN_EDGES, 4.1) - 1] == 2
+
+def test_histogram_figure_carries_only_bins():
+    fig = histogram_figure(bin_values(np.random.default_rng(0).uniform(1, 6, 500), AVERAGE_BIN_EDGES), AVERAGE_BIN_EDGES)
+    bar = fig.data[0]
+    assert len(bar.x) == len(bar.y) == len(AVERAGE_BIN_EDGES) - 1
+    assert sum(bar.y) == 500 and bar.x[0] == 1.125
+
+def test_trend_and_box_figures():
+    stats = pd.DataFrame({
+        'date': pd.to_datetime(["2025-01-01", "2025-02-01"]), 'name': ["T1", "T2"],
+        'mean': [4.123, 4.5], 'median': [4.0, 4.5], 'n': [10, 12],
+    })
+    assert list(trend_figure(stats).data[0].y) == [4.12, 4.5]
+
+    students = pd.DataFrame({'class': ["A", "A", "A", "B", "B"], 'average': [3.0, 4.0, 5.0, 4.5, 5.5]})
+    box = cohort_box_figure(students).data[0]
+    assert list(box.x) == ["A", "B"]
+    assert list(box.median) == [4.0, 5.0] and list(box.lowerfence) == [3.0, 4.5]
@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+from noten.cli import main
+from utils.storage import load_class_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STUDENTS = [
+    {"id": "student_a", "Anmeldename": "a.muster", "Vorname": "Anna", "Nachname": "Muster"},
+    {"id": "student_b", "Anmeldename": "b.beispiel", "Vorname": "Ben", "Nachname": "Beispiel"},
+]
+
+def make_assignment(aid, subject, weight, grades, points=None, max_points=100):
+    return {
+        "id": aid, "name": f"Test {aid}", "subject": subject, "type": "Test", "weight": weight,
+        "date": "2025-03-01T10:00:00", "maxPoints": max_points, "scaleType": "60% Scale", "url": "",
+        "grades": grades, "points": points or {}, "comments": {},
+    }
+
+def write_data(root, classes):
+    """classes: {class_id: (name, students, assignments)}; files in the current schema"""
+    for class_id, (_, students, assignments) in classes.items():
+        class_dir = root / "data" / "classes" / class_id
+        class_dir.mkdir(parents=True)
+        files = {
+            "students.json": students, "assignments.json": assignments, "meta.json": {"schema_version": 1},
+            "config.json": {"subjects": ["GESELLSCHAFT", "SPRACHE"], "scales": {}},
+        }
+        for filename, content in files.items():
+            (class_dir / filename).write_text(json.dumps(content), encoding="utf-8")
+    registry = [{"id": cid, "name": name} for cid, (name, _, _) in classes.items()]
+    (root / "data" / "classes.json").write_text(json.dumps(registry), encoding="utf-8")
+
+def test_cli_starts_without_streamlit(tmp_path):
+    write_data(tmp_path, {"class_1111": ("4A", STUDENTS, [])})
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys\n"
+         "from noten.cli import main\n"
+         f"main(['--root', {str(tmp_path)!r}, 'classes'])\n"
+         "print(sorted(m for m in ('streamlit', 'pandas', 'numpy') if m in sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.strip().splitlines()
+    assert "4A: 2 Schüler/innen, 0 Prüfungen" in lines[0]
+    assert lines[-1] == "[]"
+
+def test_averages_json_over_classes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_data(tmp_path, {
+        "class_1111": ("4A", STUDENTS, [
+            make_assignment("a1", "GESELLSCHAFT", 2.0, {"student_a": 5.0, "student_b": 3.5}),
+            make_assignment("a2", "GESELLSCHAFT", 1.0, {"student_a": 4.0}),
+        ]),
+        "class_2222": ("4B", STUDENTS[:1], []),
+    })
+
+    assert main(["averages", "--format", "json", "--output", "out.json"]) == 0
+    rows = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+
+    assert [(r["Klasse"], r["Anmeldename"]) for r in rows] == [("4A", "a.muster"), ("4A", "b.beispiel"), ("4B", "a.muster")]
+    assert rows[0]["GESELLSCHAFT"] == 4.67
+    assert rows[0]["GESELLSCHAFT (Z)"] == 4.5
+    assert rows[1]["SPRACHE"] is None
+    assert rows[2]["Gesamt Ø"] is None
+
+def test_unknown_class_is_a_usage_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    write_data(tmp_path, {"class_1111": ("4A", STUDENTS, [])})
+    assert main(["averages", "--class", "class_9999"]) == 2
+    assert "class_9999" in capsys.readouterr().err
+
+def test_validate_reports_errors(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    write_data(tmp_path, {"class_1111": ("4A", STUDENTS + [dict(STUDENTS[0], id="student_c")], [
+        make_assignment("a1", "GESELLSCHAFT", 1.0, {"student_a": 7.0, "student_x": 4.0}),
+        make_assignment("a2", "MATHE", 1.0, {}),
+    ])})
+
+    assert main(["validate"]) == 1
+    out = capsys.readouterr().out
+    assert "Doppelter Anmeldename: a.muster" in out
+    assert "1 Noten ausserhalb" in out
+    assert "nicht mehr in der Klasse" in out
+    assert "Fach nicht in der Klassenkonfiguration" in out
+    assert "3 Fehler" not in out and "2 Fehler, 2 Warnungen" in out
+
+def test_regrade_preview_and_apply(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # 60% scale: 80 of 100 points -> 5.0; the stored grade is outdated
+    write_data(tmp_path, {"class_1111": ("4A", STUDENTS, [
+        make_assignment("a1", "SPRACHE", 1.0, {"student_a": 3.0, "student_b": 4.0}, {"student_a": 80}),
+    ])})
+    (tmp_path / "data" / "classes" / "class_1111" / "journal.jsonl").write_text(
+        json.dumps({"assignment_id": "a1", "student_id": "student_b", "grade": 4.5}) + "\n", encoding="utf-8"
+    )
+
+    assert main(["regrade"]) == 0
+    assert load_class_data("class_1111")['assignments'][0]['grades']['student_a'] == 3.0
+
+    assert main(["regrade", "--apply", "--no-backup"]) == 0
+    data = load_class_data("class_1111")
+    assert data['assignments'][0]['grades'] == {"student_a": 5.0, "student_b": 4.5}
+    assert data['journal'] == 0  # compacted into assignments.json
+    assert data['audit_log'][0]['user'] == "CLI"
+    assert not (tmp_path / "backups").exists()
@@ -0,0 +1,63 @@
+import json
+import pandas as pd
+from utils.compact import AuditEvent, EmailEvent, GradeMap, StudentIndex, compact_class_data
+from utils.storage import load_class_data, save_json
+
+def test_grade_map_behaves_like_a_dict():
+    index = StudentIndex(["s1", "s2", "s3"])
+    grades = GradeMap(index, {"s1": 4.5, "s3": 5})
+
+    assert grades == {"s1": 4.5, "s3": 5.0}
+    assert "s2" not in grades and grades.get("s2") is None and len(grades) == 2
+    grades["s2"] = 6
+    grades["s9"] = 3.0  # unknown ids extend the shared index
+    del grades["s1"]
+    assert grades.pop("s3") == 5.0
+    grades.update({"s1": 1.0})
+    assert dict(grades) == {"s1": 1.0, "s2": 6.0, "s9": 3.0}
+    assert index.ids == ["s1", "s2", "s3", "s9"]
+    # A second map over the same index is not affected by the new id
+    assert GradeMap(index, {"s2": 2.0}) == {"s2": 2.0}
+
+def test_records_equal_their_dicts():
+    event = {"timestamp": "2025-03-01T10:00:00", "user": "Teacher", "action": "Speichern", "details": "x"}
+    assert AuditEvent.fits(event) and not EmailEvent.fits(event)
+    assert not AuditEvent.fits(dict(event, extra=1))
+    record = AuditEvent(event)
+    assert record == event and record['action'] == "Speichern" and record.get('missing') is None
+    assert pd.DataFrame([record, record]).columns.tolist() == list(event)
+
+def test_compact_data_round_trips_through_save_json(tmp_path):
+    data = {
+        'students': [{"id": "s1"}, {"id": "s2"}],
+        'assignments': [
+            {"id": "a1", "grades": {"s1": 4.5}, "points": {"s1": 30, "s2": 12.5}, "comments": {"s1": "gut"}},
+            {"id": "a2", "grades": {"s1": "4.5"}},  # not numeric: kept as written
+        ],
+        'email_log': [{"timestamp": "t", "student_id": "s1", "student_name": "A", "subject": "SPRACHE", "status": "Sent", "error": None}],
+        'audit_log': [{"timestamp": "t", "action": "alt"}],
+    }
+    expected = json.loads(json.dumps(data))
+    compact_class_data(data)
+
+    assert isinstance(data['assignments'][0]['grades'], GradeMap)
+    assert data['assignments'][0]['grades'].index is data['assignments'][0]['points'].index
+    assert data['assignments'][1]['grades'] == {"s1": "4.5"} and data['assignments'][1]['points'] == {}
+    assert isinstance(data['email_log'][0], EmailEvent)
+    assert type(data['audit_log'][0]) is dict
+
+    save_json(tmp_path / "out.json", data)
+    assert json.loads((tmp_path / "out.json").read_text(encoding="utf-8")) == dict(expected, assignments=[
+        expected['assignments'][0], dict(expected['assignments'][1], points={})
+    ])
+
+def test_loaded_class_is_compact(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    class_dir = tmp_path / "data" / "classes" / "class_c"
+    class_dir.mkdir(parents=True)
+    (class_dir / "students.json").write_text(json.dumps([{"id": "s1"}]), encoding="utf-8")
+    (class_dir / "assignments.json").write_text(json.dumps([{"id": "a1", "subject": "SPRACHE", "grades": {"s1": 5.0}}]), encoding="utf-8")
+
+    data = load_class_data("class_c")
+    assert isinstance(data['assignments'][0]['grades'], GradeMap)
+    assert data['assignments'][0]['grades'] == {"s1": 5.0}
@@ -1,7 +1,8 @@
 import pytest
 import os
 from unittest.mock import patch, MagicMock, ANY
-from utils.data_manager import load_json, save_all_data
+import json
+from utils.data_manager import load_json, save_all_data, save_grade_changes, load_class_data, get_data_version, bump_data_version
 
 # 1. Test Loading JSON (File I/O)
 def test_load_json_valid(tmp_path):
@@ -62,4 +63,52 @@ def test_save_all_data(mock_makedirs, mock_save_json, mock_backup, mock_st):
 
     # Assert Save Calls
     # Verify save_json was called with the student list we defined above
-    mock_save_json.assert_any_call(ANY, [{"id": 1}])
\ No newline at end of file
+    mock_save_json.assert_any_call(ANY, [{"id": 1}])
+
+# 3. Grade journal (delta persistence)
+class SessionState(dict):
+    """Key and attribute access like st.session_state"""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+@patch('utils.data_manager.st')
+def test_save_grade_changes_journal(mock_st, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    class_dir = tmp_path / "data" / "classes" / "class_j"
+    class_dir.mkdir(parents=True)
+    assignments = [{"id": "a1", "grades": {"s1": 4.0, "s2": 5.0}, "points": {"s1": 60, "s2": 80}}]
+    (class_dir / "assignments.json").write_text(json.dumps(assignments), encoding="utf-8")
+    (class_dir / "audit_log.json").write_text("[]", encoding="utf-8")
+
+    mock_st.session_state = SessionState(current_class_id="class_j", data_load_id="load_1", assignments=assignments, audit_log=[])
+
+    changes = [("s1", "a1", 4.0, 4.5), ("s2", "a1", 5.0, None)]
+    assert save_grade_changes(changes, "Schnelleingabe") is True
+
+    # Session data is updated, the full files are untouched, one audit event summarizes
+    details = "2 Noten in 1 Prüfungen aktualisiert. 2 Punktzahlen entfernt (Note von Hand gesetzt)."
+    assert assignments[0]['grades'] == {"s1": 4.5}
+    assert assignments[0]['points'] == {}  # hand-set grades no longer follow the points
+    assert [(e['action'], e['details']) for e in mock_st.session_state.audit_log] == [("Schnelleingabe", details)]
+    assert json.loads((class_dir / "assignments.json").read_text(encoding="utf-8"))[0]['grades'] == {"s1": 4.0, "s2": 5.0}
+    assert json.loads((class_dir / "audit_log.json").read_text(encoding="utf-8")) == []
+
+    # Loading replays the journal, audit event included
+    data = load_class_data("class_j")
+    assert data['journal'] == 3
+    assert data['assignments'][0]['grades'] == {"s1": 4.5}
+    assert data['assignments'][0]['points'] == {}
+    assert data['audit_log'][0]['details'] == details
+
+@patch('utils.data_manager.st')
+def test_data_versions_per_collection(mock_st):
+    mock_st.session_state = SessionState(current_class_id="class_v", data_load_id="load_1")
+    grades_version = get_data_version('students', 'assignments')
+
+    bump_data_version('email_log')
+    assert get_data_version('students', 'assignments') == grades_version
+    assert get_data_version('email_log') == ("class_v", "load_1", (1,))
+
+    bump_data_version()  # save_all_data: everything may have changed
+    assert get_data_version('students', 'assignments') == ("class_v", "load_1", (1, 1))
+    assert get_data_version() == ("class_v", "load_1", 2)
@@ -0,0 +1,54 @@
+import json
+import numpy as np
+import generate_demo_data as gen
+from utils.scales import compute_regrade
+
+ARGS = ["--classes", "2", "--students", "450", "--assignments-per-subject", "3", "--date", "2025-06-01T08:00:00"]
+
+def read_class(root, class_id, name="assignments.json"):
+    return (root / "data" / "classes" / class_id / name).read_text(encoding="utf-8")
+
+def test_names_are_unique_beyond_all_combinations():
+    students = gen.generate_students(np.random.default_rng(0), 450)
+    assert len({s['id'] for s in students}) == 450
+    assert students[-1]['Anmeldename'].endswith("2")  # second round of combinations
+
+def test_stream_writer_matches_json_dump(tmp_path):
+    records = [{"id": "a", "grades": {"s1": 4.5}, "comments": {}}, {"id": "b", "name": "Prüfung"}]
+    gen.write_json_stream(tmp_path / "pretty.json", iter(records))
+    gen.write_json_stream(tmp_path / "compact.json", iter(records), pretty=False)
+    gen.write_json_stream(tmp_path / "empty.json", iter([]))
+
+    assert (tmp_path / "pretty.json").read_text(encoding="utf-8") == json.dumps(records, indent=2, ensure_ascii=False)
+    assert json.loads((tmp_path / "compact.json").read_text(encoding="utf-8")) == records
+    assert json.loads((tmp_path / "empty.json").read_text(encoding="utf-8")) == []
+
+def test_same_seed_same_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    gen.main(ARGS)
+    first = read_class(tmp_path, "class_demo_2025_001")
+    gen.main(ARGS + ["--workers", "2"])
+    assert read_class(tmp_path, "class_demo_2025_001") == first
+    gen.main(ARGS + ["--seed", "7"])
+    assert read_class(tmp_path, "class_demo_2025_001") != first
+
+    registry = json.loads((tmp_path / "data" / "classes.json").read_text(encoding="utf-8"))
+    assert [c['id'] for c in registry] == ["class_demo_2025", "class_demo_2025_001"]
+    assignments = json.loads(first)
+    assert len(assignments) == 6 and {a['subject'] for a in assignments} == set(gen.SUBJECTS)
+    assert json.loads(read_class(tmp_path, "class_demo_2025", "meta.json"))['schema_version'] >= 1
+
+def test_default_run_keeps_the_demo_class(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    gen.main(ARGS)
+    gen.main([])
+    assert [p.name for p in (tmp_path / "data" / "classes").iterdir()] == ["class_demo_2025"]
+    assignments = json.loads(read_class(tmp_path, "class_demo_2025"))
+    assert [a['name'] for a in assignments] == [c[1] for c in gen.DEMO_ASSIGNMENTS]
+    assert len(json.loads(read_class(tmp_path, "class_demo_2025", "students.json"))) == 18
+
+def test_grades_match_a_regrade():
+    students = gen.generate_students(np.random.default_rng(1), 50)
+    configs = gen.assignment_configs(20, gen.datetime(2025, 6, 1), 180)
+    assignments = list(gen.generate_assignments(np.random.default_rng(1), students, configs))
+    assert compute_regrade(assignments) == ([], 0)
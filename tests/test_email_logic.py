@@ -1,50 +1,55 @@
 import pytest
-from unittest.mock import patch
 from datetime import datetime, timedelta
-from utils.email_manager import get_students_with_changes
+from utils.email_manager import email_candidates
 
 # Helper timestamps
 NOW = datetime.now().isoformat()
 YESTERDAY = (datetime.now() - timedelta(days=1)).isoformat()
 TWO_DAYS_AGO = (datetime.now() - timedelta(days=2)).isoformat()
 
-@patch('utils.email_manager.st')
-@patch('utils.email_manager.get_last_email_status') # <--- Mock this function
-def test_smart_email_detection(mock_get_status, mock_st):
-    
-    # 1. Setup Data
-    mock_st.session_state.students = [
+def test_smart_email_detection():
+    students = [
         {"id": "student_A", "Vorname": "Alice"},
         {"id": "student_B", "Vorname": "Bob"}
     ]
-    
-    mock_st.session_state.assignments = [
+    assignments = [
         # New assignment for Alice (Date > Last Email)
-        {
-            "subject": "MATH",
-            "date": NOW, 
-            "grades": {"student_A": 5.0} 
-        },
+        {"subject": "MATH", "date": NOW, "grades": {"student_A": 5.0}},
         # Old assignment for Bob (Date < Last Email)
-        {
-            "subject": "MATH",
-            "date": TWO_DAYS_AGO, 
-            "grades": {"student_B": 4.0} 
-        }
+        {"subject": "MATH", "date": TWO_DAYS_AGO, "grades": {"student_B": 4.0}}
     ]
-    
-    # 2. Define how the mocked status function behaves
-    def side_effect(student_id, subject):
-        # We simulate that both students got an email YESTERDAY
-        return {"timestamp": YESTERDAY, "status": "sent"}
-    
-    mock_get_status.side_effect = side_effect
-    
-    # 3. Run Logic
-    changed_students = get_students_with_changes("MATH")
-    
-    # 4. Assertions
-    changed_ids = [s['id'] for s in changed_students]
-    
+    # Both students got an email YESTERDAY
+    email_log = [
+        {"timestamp": YESTERDAY, "student_id": sid, "subject": "MATH", "status": "sent"}
+        for sid in ("student_A", "student_B")
+    ]
+
+    rows = email_candidates(students, assignments, email_log, "MATH", {})
+    changed_ids = [r['id'] for r in rows if r['has_changes']]
+
     assert "student_A" in changed_ids  # Should be detected (New Data)
-    assert "student_B" not in changed_ids # Should be ignored (Old Data)
\ No newline at end of file
+    assert "student_B" not in changed_ids # Should be ignored (Old Data)
+
+def test_email_candidates_table():
+    students = [
+        {"id": "student_A", "Vorname": "Alice", "Nachname": "A"},
+        {"id": "student_B", "Vorname": "Bob", "Nachname": "B"},
+        {"id": "student_C", "Vorname": "Cem", "Nachname": "C"},
+    ]
+    assignments = [
+        {"subject": "MATH", "date": NOW, "grades": {"student_A": 5.0}},
+        {"subject": "MATH", "date": TWO_DAYS_AGO, "grades": {"student_B": 4.0, "student_C": 3.5}},
+        {"subject": "ART", "date": NOW, "grades": {"student_B": 6.0}},
+    ]
+    email_log = [  # newest first
+        {"timestamp": YESTERDAY, "student_id": "student_B", "subject": "MATH", "status": "failed"},
+        {"timestamp": YESTERDAY, "student_id": "student_A", "subject": "MATH", "status": "sent"},
+        {"timestamp": TWO_DAYS_AGO, "student_id": "student_B", "subject": "MATH", "status": "sent"},
+    ]
+
+    rows = email_candidates(students, assignments, email_log, "MATH", {"student_A": 5.0})
+
+    assert [r['id'] for r in rows] == ["student_A", "student_B", "student_C"]
+    assert [r['has_changes'] for r in rows] == [True, False, True]  # C was never emailed
+    assert [r['last_status'] for r in rows] == ["sent", "failed", None]
+    assert rows[0]['name'] == "Alice A" and rows[0]['average'] == 5.0 and rows[1]['average'] is None
@@ -0,0 +1,131 @@
+import math
+import numpy as np
+import pytest
+from utils.gradebook import (
+    build_class_summary, class_means, zeugnis_col, OVERALL_COL,
+    build_entry_frame, diff_entry_frame, apply_entry_changes,
+    build_grade_matrix, diff_grade_matrix, build_assignment_frame, GradeBook, weighted_average
+)
+from utils.schema import migrate_class_data
+
+STUDENTS = [
+    {"id": "s1", "Vorname": "Anna", "Nachname": "Meier", "Anmeldename": "anna.meier"},
+    {"id": "s2", "Vorname": "Ben", "Nachname": "Huber", "Anmeldename": "ben.huber"},
+    {"id": "s3", "Vorname": "Cem", "Nachname": "Keller", "Anmeldename": "cem.keller"},
+]
+
+ASSIGNMENTS = [
+    {"id": "a1", "subject": "GESELLSCHAFT", "weight": 2.0, "grades": {"s1": 5.0, "s2": "3.5"}},
+    {"id": "a2", "subject": "GESELLSCHAFT", "weight": 1.0, "grades": {"s1": 4.2, "s2": None}},
+    {"id": "a3", "subject": "SPRACHE", "weight": 1.0, "grades": {"s1": 3.0, "s2": 4.4}},
+    {"id": "a4", "subject": "SPRACHE", "weight": 0.5, "grades": {"s2": "n/a"}},
+]
+
+SUBJECTS = ["GESELLSCHAFT", "SPRACHE"]
+
+def test_summary_matches_weighted_average():
+    # The GradeBook parses the raw values itself; weighted_average relies on migrated data
+    migrated = {'students': [], 'assignments': [dict(a, grades=dict(a['grades'])) for a in ASSIGNMENTS]}
+    migrate_class_data(migrated, 0)
+
+    summary = build_class_summary(STUDENTS, ASSIGNMENTS, SUBJECTS).set_index('id')
+
+    for s in STUDENTS:
+        for subject in SUBJECTS:
+            expected = weighted_average(migrated['assignments'], s['id'], subject)
+            value = summary.at[s['id'], subject]
+            if expected is None:
+                assert math.isnan(value)
+            else:
+                assert value == pytest.approx(expected)
+
+def test_summary_columns():
+    summary = build_class_summary(STUDENTS, ASSIGNMENTS, SUBJECTS).set_index('id')
+
+    # s1: GES (5.0*2 + 4.2) / 3 = 4.73 -> Zeugnis 4.5, SPR 3.0 -> at risk
+    assert summary.at['s1', zeugnis_col("GESELLSCHAFT")] == 4.5
+    assert summary.at['s1', OVERALL_COL] == pytest.approx((4.73 + 3.0) / 2, abs=0.01)
+    assert summary.at['s1', 'at_risk']
+    # s3 has no grades at all
+    assert math.isnan(summary.at['s3', OVERALL_COL])
+    assert not summary.at['s3', 'at_risk']
+    assert summary.at['s2', 'Name'] == "Ben Huber"
+
+def test_class_means_ignore_missing():
+    summary = build_class_summary(STUDENTS, ASSIGNMENTS, SUBJECTS)
+    means = class_means(summary, SUBJECTS)
+    assert means["SPRACHE"] == pytest.approx((3.0 + 4.4) / 2)
+
+DATED = [
+    {"id": "d1", "subject": "SPRACHE", "date": "2025-01-01", "grades": {"s1": 4.0, "s2": 5.0, "s3": 4.0}},
+    {"id": "d2", "subject": "SPRACHE", "date": "2025-02-01", "grades": {"s1": 5.0, "s2": 4.0, "s3": 4.1}},
+    {"id": "d3", "subject": "GESELLSCHAFT", "date": "2025-03-01", "grades": {"s1": 1.0}},
+]
+
+def test_trends_between_two_newest_grades():
+    book = GradeBook(STUDENTS, DATED)
+    assert book.trends("SPRACHE") == {"s1": "📈", "s2": "📉", "s3": "➡️"}
+    assert book.trends("GESELLSCHAFT") == {}
+
+def test_entry_diff_only_changed_rows():
+    assignment = {
+        "id": "e1", "maxPoints": 10, "grades": {"s1": 4.0, "s2": 5.5, "s3": 3.0},
+        "points": {"s1": 5.0, "s2": 9.0}, "comments": {"s2": "gut"}
+    }
+    original = build_entry_frame(STUDENTS, assignment)
+    edited = original.copy()
+    edited.loc["s1", "Punkte"] = 10.0           # new points -> new grade
+    edited.loc["s2", "Punkte"] = None           # cleared -> grade removed
+    edited.loc["s2", "Kommentar"] = " "         # blank -> comment removed
+    # s3: legacy grade without points stays untouched
+
+    changes = diff_entry_frame(original, edited, 10, "60% Scale")
+    assert list(changes.index) == ["s1", "s2"]
+    assert changes.loc["s1", "grade_new"] == 6.0
+
+    assert apply_entry_changes(assignment, changes) == 3
+    assert assignment["grades"] == {"s1": 6.0, "s3": 3.0}
+    assert assignment["points"] == {"s1": 10.0}
+    assert assignment["comments"] == {}
+
+def test_assignment_stats():
+    stats = GradeBook([], ASSIGNMENTS).assignment_stats()
+    assert stats.loc["a1", "count"] == 2
+    assert stats.loc["a1", "mean"] == pytest.approx(4.25)
+    assert stats.loc["a1", "below"] == 1
+    assert "a4" not in stats.index  # only non-numeric grades
+
+def test_grade_matrix_diff_only_changed_cells():
+    matrix = build_grade_matrix(STUDENTS, ASSIGNMENTS[:2])
+    edited = matrix.copy()
+    edited.loc["s1", "a1"] = 5.04      # rounds back to the stored grade: no change
+    edited.loc["s1", "a2"] = 4.66      # changed, stored rounded
+    edited.loc["s2", "a1"] = 0.0       # 0 clears the grade
+    edited.loc["s3", "a2"] = 4.0       # new grade
+    # s2/a2 (None) stays empty
+
+    changes = diff_grade_matrix(matrix, edited)
+    assert sorted(changes) == [("s1", "a2", 4.2, 4.7), ("s2", "a1", 3.5, None), ("s3", "a2", None, 4.0)]
+
+def test_assignment_frame_newest_first():
+    assignments = [
+        {"id": "x1", "name": "Alt", "subject": "SPRACHE", "type": "Test", "date": "2025-01-05T10:00:00"},
+        {"id": "x2", "name": "Neu", "subject": "SPRACHE", "type": "Lernpfad", "date": "2025-03-01T00:00:00"},
+    ]
+    meta = build_assignment_frame(assignments)
+    assert list(meta.index) == ["x2", "x1"]
+    assert str(meta.loc["x1", "date"].date()) == "2025-01-05"
+
+def test_gradebook_columns():
+    assignments = [
+        {"id": "r1", "subject": "SPRACHE", "date": "2025-01-01", "grades": {"s1": 4.3, "s2": "5.5", "old": 3.0}, "points": {"s1": 17.5}},
+        {"id": "r2", "subject": "SPRACHE", "date": "2025-02-01", "grades": {"s2": None, "s3": "n/a"}},
+    ]
+    book = GradeBook(STUDENTS, assignments)
+
+    # Class students first, ids that only occur in grades are appended
+    assert book.student_ids == ["s1", "s2", "s3", "old"]
+    assert book.grades.dtype == np.float32 and book.grades.shape == (2, 4)
+    assert np.isnan(book.grades[1]).all()
+    assert book.grades[0].tolist() == pytest.approx([4.3, 5.5, np.nan, 3.0], nan_ok=True)
+    assert book.points[0, 0] == 17.5 and np.isnan(book.points[0, 1:]).all()
@@ -0,0 +1,34 @@
+import smtplib
+from email.mime.text import MIMEText
+from benchmarks.load import percentiles, run_load_test
+from benchmarks.smtp_server import LocalSMTPServer
+
+def test_percentiles_nearest_rank():
+    stats = percentiles([float(ms) for ms in range(1, 101)])
+    assert stats['count'] == 100
+    assert (stats['p50_ms'], stats['p90_ms'], stats['p99_ms'], stats['max_ms']) == (50.0, 90.0, 99.0, 100.0)
+    assert percentiles([7.0])['p95_ms'] == 7.0
+    assert percentiles([]) == {}
+
+def test_smtp_stand_in_accepts_ssl_mail():
+    with LocalSMTPServer() as server:
+        with smtplib.SMTP_SSL(server.host, server.port, timeout=10) as client:
+            client.login("lehrer@example.ch", "geheim")
+            message = MIMEText("Hallo")
+            message['From'], message['To'], message['Subject'] = "lehrer@example.ch", "a@example.ch", "Noten"
+            client.send_message(message)
+    assert server.messages == 1
+    assert server.bytes > 0
+
+def test_concurrent_sessions_run_every_step(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = run_load_test(sessions=2, iterations=1, scale='tiny', log=lambda line: None)
+
+    assert report['errors'] == []
+    assert set(report['steps']) == {
+        'start', 'open_class', 'subject_page', 'edit_points', 'save_points', 'email_page', 'email_login', 'send_emails'
+    }
+    assert all(stats['count'] == 2 for stats in report['steps'].values())
+    assert report['io']['save']['files'] > 0  # the edits were saved
+    assert report['smtp']['messages'] == 2 * 6  # tiny: 6 students per class, all selected
+    assert all(s['state_bytes'] > 0 for s in report['sessions'])
@@ -0,0 +1,40 @@
+import sys
+from array import array
+import numpy as np
+import pandas as pd
+from utils.compact import GradeMap, StudentIndex
+from utils.memory import cache_report, deep_sizeof, session_report
+
+def test_deep_sizeof_follows_slots_and_buffers():
+    index = StudentIndex(f"student_{i}" for i in range(1000))
+    grades = GradeMap(index, {sid: 4.0 for sid in index.ids})
+    assert deep_sizeof(grades) >= deep_sizeof(index) + sys.getsizeof(array('d', [0.0]) * 1000)
+
+    matrix = np.zeros((100, 100))
+    assert deep_sizeof(matrix) >= matrix.nbytes
+    frame = pd.DataFrame({"name": [f"student_{i}" for i in range(100)]})
+    assert deep_sizeof(frame) == int(frame.memory_usage(deep=True).sum())
+
+def test_shared_objects_are_counted_once():
+    shared = ["x" * 1000]
+    seen = set()
+    first = deep_sizeof({"a": shared}, seen)
+    assert deep_sizeof({"b": shared}, seen) < first - 1000
+
+def test_session_report_is_sorted_by_size():
+    rows = session_report({"small": 1, "big": list(range(10000)), "text": "abc"})
+    assert [key for key, _, _ in rows][0] == "big"
+    assert rows[0][1] == "list"
+    assert [size for _, _, size in rows] == sorted((size for _, _, size in rows), reverse=True)
+
+def test_cache_report_lists_cached_functions():
+    import streamlit as st
+
+    @st.cache_resource
+    def cached_table():
+        return list(range(1000))
+
+    cached_table()
+    rows = [row for row in cache_report() if row[1].endswith("cached_table")]
+    assert rows and rows[0][0] == "resource" and rows[0][2] == 1 and rows[0][3] > 8000
+    cached_table.clear()
@@ -0,0 +1,49 @@
+import json
+from utils import perf
+from utils.storage import load_json, save_json
+
+def test_hooks_are_noops_without_run():
+    assert not perf.active()
+    with perf.phase("page"):
+        perf.count("x")
+        perf.record_io('load', 10)
+    assert perf.finish_run() is None
+
+def test_run_records_phases_counters_and_io(tmp_path):
+    @perf.counted
+    def hot():
+        return 1
+
+    perf.start_run("📊 Übersicht")
+    with perf.phase("page"):
+        hot(); hot()
+        save_json(tmp_path / "a.json", {"grades": [1, 2, 3]})
+        assert load_json(tmp_path / "a.json") == {"grades": [1, 2, 3]}
+    with perf.phase("page"):
+        pass
+    run = perf.finish_run()
+
+    size = (tmp_path / "a.json").stat().st_size
+    assert run['page'] == "📊 Übersicht" and run['total_ms'] >= run['phases']['page'] >= 0
+    assert list(run['phases']) == ["page"]
+    assert run['counters'] == {"test_run_records_phases_counters_and_io.<locals>.hot": 2}
+    assert run['io'] == {'load': [1, size], 'save': [1, size]}
+    assert not perf.active()
+
+def test_history_and_jsonl(tmp_path, monkeypatch):
+    monkeypatch.setenv(perf.ENV_FLAG, "1")
+    assert perf.requested() and perf.requested({'perf_instrumentation': False})
+    monkeypatch.delenv(perf.ENV_FLAG)
+    assert not perf.requested({}) and perf.requested({'perf_instrumentation': True})
+
+    history = []
+    for i in range(perf.MAX_RUNS + 5):
+        perf.start_run(f"page {i}")
+        perf.add_run(history, perf.finish_run())
+    assert len(history) == perf.MAX_RUNS and history[-1]['page'] == f"page {perf.MAX_RUNS + 4}"
+
+    path = tmp_path / "runs.jsonl"
+    path.write_text(perf.to_jsonl(history[-2:]), encoding="utf-8")
+    runs = perf.read_jsonl(path)
+    assert [r['page'] for r in runs] == [h['page'] for h in history[-2:]]
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[0])['io']['save'] == [0, 0]
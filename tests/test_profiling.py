@@ -0,0 +1,35 @@
+import time
+import pstats
+from utils import profiling
+
+def busy(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+def test_cprofile_capture_and_top(tmp_path):
+    with profiling.capture("cprofile") as result:
+        for _ in range(3):
+            busy(5)
+    assert result.mode == "cprofile" and result.seconds >= 0.015
+
+    top = profiling.top_functions(result, n=5)
+    assert len(top) <= 5
+    row = next(r for r in top if r['function'].startswith("busy (test_profiling.py"))
+    assert row['calls'] == 3 and row['total_ms'] >= 15
+
+    path = profiling.save_capture(result, "📊 Übersicht", directory=tmp_path)
+    assert path.endswith("_Übersicht.prof")
+    pstats.Stats(path)  # readable by the standard tools
+
+def test_sampling_capture_writes_collapsed_stacks(tmp_path):
+    with profiling.capture("sampling") as result:
+        busy(60)
+    assert result.mode == "sampling" and sum(result.stacks.values()) > 0
+
+    top = profiling.top_functions(result)
+    assert top[0]['function'].startswith("busy") and top[0]['calls'] is None
+
+    path = profiling.save_capture(result, "Analyse", directory=tmp_path)
+    stack, count = open(path, encoding="utf-8").readline().rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("busy") and int(count) > 0
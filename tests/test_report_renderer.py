@@ -0,0 +1,22 @@
+from utils.report_renderer import render_report, header, table, row, cell, esc, format_grade, tier_class, pass_class
+
+def test_render_report_structure():
+    rows = (row([cell(esc(name)), cell(format_grade(g), pass_class(g))]) for name, g in [("A & B", 3.5), ("C", None)])
+
+    html = render_report("Test <Report>", [header("Titel", "<strong>Datum:</strong> heute"), table(["Name", ("Note", "c")], rows)])
+
+    assert html.startswith("<!DOCTYPE html>")
+    assert "<title>Test &lt;Report&gt;</title>" in html
+    assert '<th class="c">Note</th>' in html
+    assert "<td>A &amp; B</td>" in html
+    assert '<td class="p-bad">3.5</td>' in html
+    assert '<td class="p-none">-</td>' in html
+    assert html.rstrip().endswith("</html>")
+    # Styling comes from the shared stylesheet, not from inline styles
+    assert 'style="' not in html
+
+def test_grade_classes():
+    assert [tier_class(v) for v in (5.0, 4.2, 3.7, 2.0, None)] == ["g-good", "g-ok", "g-warn", "g-bad", ""]
+    assert [pass_class(v) for v in (5.0, 4.5, 3.9, "")] == ["p-good", "p-none", "p-bad", "p-none"]
+    assert format_grade(float("nan")) == "-"
+    assert format_grade("4.25", 2) == "4.25"
@@ -0,0 +1,98 @@
+import math
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from utils.scales import build_scale, resolve_scale, calculate_grades, compute_regrade, apply_regrade
+from utils.grading import calculate_grade, grade_import_frame
+
+# Legacy config (no 'type') as stored in older class folders
+LEGACY_SCALES = {
+    '60% Scale': {'threshold': 0.6, 'label': 'Note 4 mit 60%'},
+    '66% Scale': {'threshold': 0.66, 'label': 'Note 4 mit 66%'},
+    '50% Scale': {'threshold': 0.5, 'label': 'Note 4 mit 50%'}
+}
+
+def test_legacy_scales_keep_their_formula():
+    registry = {name: resolve_scale(name, LEGACY_SCALES) for name in LEGACY_SCALES}
+    points = [0, 30, 60, 100]
+    assert list(calculate_grades(points, 100, registry['60% Scale'])) == [1.0, 2.5, 4.0, 6.0]
+    assert list(calculate_grades(points, 100, registry['66% Scale'])) == [1.0, 1.8, 3.6, 6.0]
+    assert list(calculate_grades(points, 100, registry['50% Scale'])) == [2.0, 3.2, 4.4, 6.0]
+
+def test_rounding_matches_round_per_value():
+    # Boundary cases: half-up rounding gave 1.2, 2.6 and 5.9 here and changed stored grades
+    assert list(calculate_grades([3, 31, 97], 100, '60% Scale')) == [1.1, 2.5, 5.8]
+    for max_points in (7, 13, 40, 100):
+        for (slope, intercept), name in zip(((5, 1), (6, 0), (4, 2)), ('60% Scale', '66% Scale', '50% Scale')):
+            points = np.arange(0, max_points + 0.5, 0.5).tolist()
+            expected = [round(max(1.0, min(6.0, p / max_points * slope + intercept)), 1) for p in points]
+            assert list(calculate_grades(points, max_points, name)) == expected
+
+def test_missing_points_and_invalid_max():
+    notes = calculate_grades([None, np.nan, 50], 100)
+    assert math.isnan(notes[0]) and math.isnan(notes[1])
+    assert notes[2] == 3.5
+
+    notes = calculate_grades([10, 10], [0, 20])
+    assert math.isnan(notes[0])
+    assert notes[1] == 3.5
+
+def test_threshold_scale():
+    scale = build_scale('Knick 70%', {'type': 'threshold', 'threshold': 0.7})
+    notes = calculate_grades([0, 35, 70, 85, 100], 100, scale)
+    assert list(notes) == [1.0, 2.5, 4.0, 5.0, 6.0]
+
+def test_table_scale():
+    scale = build_scale('Tabelle', {'type': 'table', 'table': [[0.0, 1.0], [0.5, 3.0], [0.6, 4.0], [0.9, 6.0]]})
+    notes = calculate_grades([10, 55, 60, 89, 95], 100, scale)
+    assert list(notes) == [1.0, 3.0, 4.0, 4.0, 6.0]
+
+@patch('utils.grading.st')
+def test_calculate_grade_matches_vectorized(mock_st):
+    mock_st.session_state.config = {'scales': LEGACY_SCALES}
+
+    points = np.arange(0, 48.5, 0.5)
+    notes = calculate_grades(points, 48, '66% Scale', LEGACY_SCALES)
+    for p, n in zip(points, notes):
+        assert calculate_grade(float(p), 48, '66% Scale')['note'] == n
+
+@patch('utils.grading.st')
+def test_grade_import_frame(mock_st):
+    mock_st.session_state.config = {'scales': LEGACY_SCALES}
+    students = [
+        {'id': 'student_a', 'Anmeldename': 'a'},
+        {'id': 'student_b', 'Anmeldename': 'b'},
+    ]
+    df = pd.DataFrame({'Anmeldename': [' a', 'b', 'unknown'], 'Punkte': [60, 'n/a', 10]})
+
+    points, grades = grade_import_frame(df, students, 100)
+
+    assert points == {'student_a': 60.0}
+    assert grades == {'student_a': 4.0}
+
+def test_compute_regrade_after_max_points_fix():
+    assignments = [
+        {
+            'id': 'a1', 'name': 'Test 1', 'subject': 'MATH', 'maxPoints': 48, 'scaleType': '60% Scale',
+            'points': {'s1': 48, 's2': 24},
+            # Graded out of 50 by mistake, s3 is a legacy grade without points
+            'grades': {'s1': 5.8, 's2': 3.4, 's3': 4.5}
+        },
+        {
+            'id': 'a2', 'name': 'Test 2', 'subject': 'MATH', 'maxPoints': 10, 'scaleType': '50% Scale',
+            'points': {'s1': 5},
+            'grades': {'s1': 4.0}
+        }
+    ]
+
+    changes, skipped = compute_regrade(assignments, LEGACY_SCALES)
+
+    assert skipped == 1
+    assert sorted((c['assignment_id'], c['student_id'], c['old'], c['new']) for c in changes) == [
+        ('a1', 's1', 5.8, 6.0),
+        ('a1', 's2', 3.4, 3.5),
+    ]
+
+    apply_regrade(assignments, changes)
+    assert assignments[0]['grades'] == {'s1': 6.0, 's2': 3.5, 's3': 4.5}
+    assert compute_regrade(assignments, LEGACY_SCALES)[0] == []
@@ -0,0 +1,67 @@
+import json
+from utils.schema import SCHEMA_VERSION, migrate_class_data, validate_class_data
+from utils.storage import load_class_data, save_schema_version
+
+LEGACY_ASSIGNMENT = {
+    "id": "a1", "name": "Test", "subject": "SPRACHE", "type": "Test",
+    "weight": "2", "maxPoints": 40, "date": "2024-09-01T00:00:00",
+    "grades": {"s1": "4.5", "s2": None, "s3": "", "s4": 5},
+    "comments": {"s1": "  gut ", "s2": ""}
+}
+
+def write_class(root, assignments, meta=None):
+    class_dir = root / "data" / "classes" / "class_s"
+    class_dir.mkdir(parents=True)
+    (class_dir / "students.json").write_text(json.dumps([{"id": "s1", "Vorname": " Anna", "Nachname": "Meier", "Anmeldename": "a.meier"}]), encoding="utf-8")
+    (class_dir / "assignments.json").write_text(json.dumps(assignments), encoding="utf-8")
+    if meta is not None:
+        (class_dir / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+def test_legacy_class_is_migrated_on_load(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_class(tmp_path, [dict(LEGACY_ASSIGNMENT)])
+
+    data = load_class_data("class_s")
+    a = data['assignments'][0]
+
+    assert data['migrated'] is True
+    assert a['grades'] == {"s1": 4.5, "s4": 5.0}
+    assert a['points'] == {}
+    assert a['comments'] == {"s1": "gut"}
+    assert a['weight'] == 2.0 and a['maxPoints'] == 40
+    assert a['scaleType'] == "60% Scale" and a['url'] == ""
+    assert data['students'][0]['Vorname'] == "Anna"
+
+def test_current_schema_is_not_migrated(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_class(tmp_path, [dict(LEGACY_ASSIGNMENT)])
+    save_schema_version("class_s")
+
+    data = load_class_data("class_s")
+    assert data['migrated'] is False
+    assert data['assignments'][0]['grades']['s1'] == "4.5"  # trusted as written
+
+def test_migrations_cover_every_version():
+    data = {'students': [], 'assignments': [dict(LEGACY_ASSIGNMENT)]}
+    assert migrate_class_data(data, 0) is True
+    assert migrate_class_data(data, SCHEMA_VERSION) is False
+
+def test_assignment_without_subject_gets_the_first_subject():
+    legacy = {k: v for k, v in LEGACY_ASSIGNMENT.items() if k != 'subject'}
+    data = {'students': [], 'assignments': [legacy], 'config': {'subjects': ["MATHE", "SPRACHE"]}}
+    migrate_class_data(data, 0)
+    assert data['assignments'][0]['subject'] == "MATHE"
+    assert all(level == "warning" for level, _ in validate_class_data(data, ["MATHE", "SPRACHE"]))  # no KeyError, no error
+
+def test_assignments_without_id_get_stable_unique_ids():
+    legacy = {k: v for k, v in LEGACY_ASSIGNMENT.items() if k != 'id'}
+    assignments = [dict(legacy), dict(legacy, id="assignment_legacy_2"), dict(legacy, id=""), dict(legacy, id=7)]
+    data = {'students': [], 'assignments': [dict(a) for a in assignments]}
+    migrate_class_data(data, 0)
+    ids = [a['id'] for a in data['assignments']]
+    assert ids == ["assignment_legacy_0", "assignment_legacy_2", "assignment_legacy_2_", "7"]
+
+    again = {'students': [], 'assignments': [dict(a) for a in assignments]}
+    migrate_class_data(again, 0)
+    assert [a['id'] for a in again['assignments']] == ids  # same file, same ids
+    assert all(level == "warning" for level, _ in validate_class_data(data))  # no duplicate ids
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The class dashboard must start without the heavy libraries of the page modules
+# (plotly.graph_objects is not listed: streamlit itself imports it)
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "xlsxwriter", "smtplib"]
+
+IMPORT_BUDGET_SECONDS = 1.0  # app on top of streamlit itself; generous for slow laptops / CI
+
+def run_python(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+def test_app_import_skips_page_modules():
+    loaded = run_python(
+        "import sys, app\n"
+        "print(sorted(m for m in sys.modules if m in %r or m.startswith('pages_ui.')))" % HEAVY_MODULES
+    )
+    assert loaded == "[]"
+
+def test_app_import_time_budget():
+    elapsed = run_python(
+        "import time, streamlit\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "print(time.perf_counter() - start)"
+    )
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS
+
+def test_every_page_module_imports():
+    run_python(
+        "import importlib, app\n"
+        "for module_name, _ in app.PAGES.values(): importlib.import_module(module_name)\n"
+        "print('ok')"
+    )
@@ -15,14 +15,17 @@ MOCK_ASSIGNMENTS = [
         "weight": 1.0,
         "date": "2025-01-01T12:00:00",
         "url": "http://moodle",
-        "grades": {"student_1": 5.0}
+        "grades": {"student_1": 5.0},
+        "comments": {}
     },
     {
         "name": "Homework",
         "type": "Task",
         "weight": 0.5,
         "date": "2025-01-02T12:00:00",
-        "grades": {"student_1": 4.0}
+        "url": "",
+        "grades": {"student_1": 4.0},
+        "comments": {}
     }
 ]
 
@@ -0,0 +1,200 @@
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from .gradebook import AT_RISK_THRESHOLD, GradeBook
+from .storage import load_class_data
+
+# Analytics cube of one class: every statistic the analytics page shows,
+# computed in one vectorized pass over a GradeBook. The cohort view builds the
+# same cube for several classes loaded straight from disk.
+
+GRADE_BIN_EDGES = np.arange(1.0, 6.01, 0.5)  # 1.0-1.5, ..., 5.5-6.0 (last bin includes 6.0)
+
+
+def _assignment_stats(book, assignments):
+    """One row per assignment: metadata plus n, mean, median, std, quantiles and fail rate"""
+    values = book.grade_values()
+    grades = pd.DataFrame(values, index=pd.Index(book.assignment_ids, name='assignment_id'))
+    quantiles = np.full((3, len(values)), np.nan)
+    if values.size:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # assignments without grades give NaN
+            quantiles = np.nanquantile(values, [0.25, 0.5, 0.75], axis=1)
+    n = grades.count(axis=1)
+
+    stats = pd.DataFrame({
+        'name': [a['name'] for a in assignments],
+        'subject': book.subjects,
+        'type': [a['type'] for a in assignments],
+        'date': pd.to_datetime(book.dates.astype(str), format='ISO8601'),
+        'weight': book.weights,
+        'maxPoints': [a['maxPoints'] for a in assignments],
+        'n': n,
+        'mean': grades.mean(axis=1),
+        'median': quantiles[1],
+        'std': grades.std(axis=1, ddof=0),
+        'q25': quantiles[0],
+        'q75': quantiles[2],
+        'min': grades.min(axis=1),
+        'max': grades.max(axis=1),
+        'fail_rate': (grades < AT_RISK_THRESHOLD).sum(axis=1) / n.where(n > 0),
+    }, index=grades.index)
+    return stats.sort_values('date', kind='stable')
+
+
+def _trend_slopes(book, rows, n_students):
+    """Least-squares slope of each student's grades over the chronological assignment order"""
+    grades = book.grade_values()[rows][:, :n_students]
+    valid = ~np.isnan(grades)
+    x = np.where(valid, np.arange(len(rows))[:, None], 0.0)
+    y = np.where(valid, grades, 0.0)
+    n = valid.sum(axis=0)
+    denom = n * (x * x).sum(axis=0) - x.sum(axis=0) ** 2
+    numer = n * (x * y).sum(axis=0) - x.sum(axis=0) * y.sum(axis=0)
+    return np.divide(numer, denom, out=np.full(n_students, np.nan), where=(n >= 2) & (denom > 0))
+
+
+def _student_stats(book, students, assignment_stats, subjects):
+    """One row per (student, subject): average, rank (1 = best), percentile, trend slope"""
+    averages = book.weighted_averages(subjects)[:len(students)]
+    frames = []
+    for j, subject in enumerate(subjects):
+        rows = [book.assignment_index[aid] for aid in assignment_stats.index[assignment_stats['subject'] == subject]]
+        avg = pd.Series(averages[:, j])
+        frames.append(pd.DataFrame({
+            'student_id': [s['id'] for s in students],
+            'Name': [f"{s['Vorname']} {s['Nachname']}" for s in students],
+            'subject': subject,
+            'average': avg,
+            'rank': avg.rank(ascending=False, method='min'),
+            'percentile': avg.rank(pct=True) * 100,
+            'trend': _trend_slopes(book, rows, len(students)),
+        }))
+    if not frames:
+        return pd.DataFrame(columns=['student_id', 'Name', 'subject', 'average', 'rank', 'percentile', 'trend'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _grade_bins(book, subjects):
+    """Grade distribution per subject over GRADE_BIN_EDGES"""
+    grades = book.grade_values()
+    bins = {}
+    for subject in subjects:
+        values = grades[book.subjects == subject]
+        bins[subject] = np.histogram(values[~np.isnan(values)], bins=GRADE_BIN_EDGES)[0]
+    return bins
+
+
+def build_analytics_cube(book, students, assignments, subjects):
+    """
+    All analytics of a class from its GradeBook.
+
+    Returns a dict with
+      'assignments': per assignment (index: assignment id) name, subject, type, date, weight,
+                     maxPoints, n, mean, median, std, q25, q75, min, max, fail_rate; sorted by date
+      'students':    per (student, subject) average, rank, percentile, trend (grade change per assignment)
+      'bins':        {subject: counts per GRADE_BIN_EDGES bin}
+    `assignments` must be the list the book was built from (same order).
+    """
+    assignment_stats = _assignment_stats(book, assignments)
+    return {
+        'assignments': assignment_stats,
+        'students': _student_stats(book, students, assignment_stats, subjects),
+        'bins': _grade_bins(book, subjects),
+    }
+
+
+def student_grades(book, cube, student_id, subject):
+    """
+    Graded assignments of one student in a subject, oldest first (index: assignment id).
+    Columns: Assignment, Date, Type, Weight, Grade, ClassAverage, Difference
+    """
+    stats = cube['assignments']
+    stats = stats[stats['subject'] == subject]
+    rows = [book.assignment_index[aid] for aid in stats.index]
+    column = book.student_index.get(student_id)
+    grades = book.grade_values()[rows, column] if column is not None else np.full(len(rows), np.nan)
+
+    df = pd.DataFrame({
+        'Assignment': stats['name'],
+        'Date': stats['date'],
+        'Type': stats['type'],
+        'Weight': stats['weight'],
+        'Grade': grades,
+        'ClassAverage': stats['mean'],
+    }, index=stats.index)
+    df['Difference'] = df['Grade'] - df['ClassAverage']
+    return df[df['Grade'].notna()]
+
+
+# ---------------------------------------------------------
+# Cohort analytics (several classes, one subject)
+# ---------------------------------------------------------
+def load_classes(class_ids, max_workers=8):
+    """Load several class folders concurrently; returns {class_id: data} (classes without folder are skipped)"""
+    if not class_ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(class_ids))) as pool:
+        loaded = dict(zip(class_ids, pool.map(load_class_data, class_ids)))
+    return {cid: data for cid, data in loaded.items() if data is not None}
+
+
+def semester_label(dates):
+    """School semester of each date: HS (August-January) or FS (February-July)"""
+    dates = pd.to_datetime(pd.Series(dates))
+    year, month = dates.dt.year, dates.dt.month
+    autumn_year = year.where(month >= 8, year - 1)
+    spring = (month >= 2) & (month < 8)
+    return ("FS " + year.astype(str)).where(spring, "HS " + autumn_year.astype(str))
+
+
+def build_cohort(classes, subject):
+    """
+    Compare one subject across classes.
+
+    classes: {label: class data as from load_class_data}
+    Returns a dict with
+      'classes':     per class students, graded, mean, median, fail_share (students below 4.0)
+      'students':    per class and student the subject average (for distributions)
+      'bins':        {label: grade histogram counts}
+      'assignments': per class and graded assignment name, type, date, semester, n, mean, fail_rate
+      'semesters':   per class and semester the mean of all grades
+    """
+    class_rows, student_frames, assignment_frames, bins = [], [], [], {}
+    for label, data in classes.items():
+        students, assignments = data['students'], data['assignments']
+        cube = build_analytics_cube(GradeBook(students, assignments), students, assignments, [subject])
+
+        averages = cube['students']['average']
+        student_frames.append(pd.DataFrame({'class': label, 'average': averages.dropna()}))
+        class_rows.append({
+            'class': label,
+            'students': len(students),
+            'graded': int(averages.notna().sum()),
+            'mean': averages.mean(),
+            'median': averages.median(),
+            'fail_share': (averages < AT_RISK_THRESHOLD).sum() / averages.notna().sum() if averages.notna().any() else np.nan,
+        })
+
+        stats = cube['assignments']
+        stats = stats[(stats['subject'] == subject) & (stats['n'] > 0)]
+        assignment_frames.append(stats[['name', 'type', 'date', 'n', 'mean', 'fail_rate']].assign(
+            **{'class': label, 'semester': semester_label(stats['date'])}
+        ))
+        bins[label] = cube['bins'][subject]
+
+    assignments = pd.concat(assignment_frames, ignore_index=True) if assignment_frames else pd.DataFrame(
+        columns=['name', 'type', 'date', 'n', 'mean', 'fail_rate', 'class', 'semester']
+    )
+    weighted = assignments.assign(total=assignments['mean'] * assignments['n'])
+    semesters = weighted.groupby(['class', 'semester'], as_index=False)[['total', 'n']].sum()
+    semesters['mean'] = semesters['total'] / semesters['n']
+
+    return {
+        'classes': pd.DataFrame(class_rows, columns=['class', 'students', 'graded', 'mean', 'median', 'fail_share']),
+        'students': pd.concat(student_frames, ignore_index=True) if student_frames else pd.DataFrame(columns=['class', 'average']),
+        'bins': bins,
+        'assignments': assignments,
+        'semesters': semesters[['class', 'semester', 'n', 'mean']],
+    }
@@ -0,0 +1,178 @@
+import os
+import re
+import shutil
+import subprocess
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from .gradebook import build_class_summary, zeugnis_col, OVERALL_COL
+from .report_renderer import render_report, header, table, row, cell, esc, format_grade, pass_class, tier_class
+from .storage import load_class_data
+
+# Batch report cards: one HTML (and optionally PDF) report per student,
+# rendered per class in worker processes and streamed into one ZIP file.
+
+
+def pdf_renderer_available():
+    """True if a local HTML->PDF renderer (WeasyPrint or wkhtmltopdf) is installed"""
+    try:
+        import weasyprint  # noqa: F401
+        return True
+    except Exception:
+        return shutil.which("wkhtmltopdf") is not None
+
+
+def html_to_pdf(report_html):
+    """Render HTML to PDF bytes with the first available renderer, None if there is none"""
+    try:
+        from weasyprint import HTML
+        return HTML(string=report_html).write_pdf()
+    except ImportError:
+        pass
+    if shutil.which("wkhtmltopdf"):
+        result = subprocess.run(
+            ["wkhtmltopdf", "--quiet", "-", "-"],
+            input=report_html.encode("utf-8"), capture_output=True, check=True
+        )
+        return result.stdout
+    return None
+
+
+def safe_filename(name):
+    return re.sub(r'[^\w.-]+', '_', str(name)).strip('_') or "unbenannt"
+
+
+def build_report_index(assignments, subjects):
+    """Assignments per subject sorted by date; built once per class and shared by all students"""
+    index = {subject: [] for subject in subjects}
+    for a in sorted(assignments, key=lambda x: x['date']):
+        if a['subject'] in index:
+            index[a['subject']].append(a)
+    return index
+
+
+def render_student_report(class_name, student, summary_row, report_index, date_str=None):
+    """Report card of one student over all subjects (HTML)"""
+    date_str = date_str or datetime.now().strftime("%d.%m.%Y")
+    sid = student['id']
+    sections = [header(
+        f"Notenbericht: {student['Vorname']} {student['Nachname']}",
+        f"<strong>Klasse:</strong> {esc(class_name)} | <strong>Datum:</strong> {date_str}",
+        f"<strong>Gesamtschnitt:</strong> <span class=\"b {tier_class(summary_row[OVERALL_COL])}\">{format_grade(summary_row[OVERALL_COL], 2)}</span>"
+    )]
+
+    for subject, assignments in report_index.items():
+        avg = summary_row[subject]
+        zeugnis = summary_row[zeugnis_col(subject)]
+        sections.append(
+            f"<h3>{esc(subject)}: Ø {format_grade(avg, 2)} | Zeugnisnote "
+            f"<span class=\"{tier_class(zeugnis)}\">{format_grade(zeugnis, 1)}</span></h3>\n"
+        )
+        rows = [
+            row([
+                cell(esc(a['name'])),
+                cell(esc(a['type'])),
+                cell(f"{float(a['weight']):.1f}"),
+                cell(datetime.fromisoformat(a['date']).strftime("%d.%m.%Y")),
+                cell(format_grade(a['grades'].get(sid)), pass_class(a['grades'].get(sid))),
+                cell(esc(a['comments'].get(sid, "")), "comment"),
+            ])
+            for a in assignments
+            if sid in a['grades'] or sid in a['comments']
+        ]
+        if rows:
+            sections.append(table(["Prüfung", "Typ", "Gewicht", "Datum", "Note", "Kommentar"], rows))
+        else:
+            sections.append('<p class="muted">Keine Noten vorhanden.</p>\n')
+
+    sections.append('<div class="footer"><p>Unterschrift Lehrperson: _________________________________</p></div>\n')
+    return render_report(f"Notenbericht {student['Vorname']} {student['Nachname']}", sections)
+
+
+
+def render_subject_report(class_name, subject, student, average, grades, assignments_by_id, date_str=None):
+    """
+    Report of one student in one subject (HTML).
+    grades is the student's frame from analytics.student_grades (index: assignment id);
+    comments are looked up in assignments_by_id, so the report is one pass over the rows.
+    """
+    date_str = date_str or datetime.now().strftime("%d.%m.%Y")
+    sid = student['id']
+    rows = (
+        row([
+            cell(esc(g.Assignment)),
+            cell(esc(g.Type)),
+            cell(f"{g.Weight:.1f}"),
+            cell(g.Date.strftime("%d.%m.%Y")),
+            cell(format_grade(g.Grade), pass_class(g.Grade)),
+            cell(format_grade(g.ClassAverage, 2), "c"),
+            cell(esc(assignments_by_id[aid]['comments'].get(sid, "")), "comment"),
+        ])
+        for aid, g in zip(grades.index, grades.itertuples(index=False))
+    )
+    return render_report(f"Notenblatt {student['Vorname']} {student['Nachname']}", [
+        header(
+            f"Notenblatt {subject}: {student['Vorname']} {student['Nachname']}",
+            f"<strong>Klasse:</strong> {esc(class_name)} | <strong>Datum:</strong> {date_str}",
+            f"<strong>Durchschnitt:</strong> <span class=\"b {tier_class(average)}\">{format_grade(average, 2)}</span>"
+        ),
+        table(["Prüfung", "Typ", "Gewicht", "Datum", "Note", ("Ø Klasse", "c"), "Kommentar"], rows),
+        '<div class="footer"><p>Unterschrift Lehrperson: _________________________________</p></div>\n',
+    ])
+
+def render_class_reports(class_id, class_name, with_pdf=False):
+    """
+    Worker: load one class and render the reports of all its students.
+    Returns a list of (archive path, bytes).
+    """
+    data = load_class_data(class_id)
+    if not data or not data['students']:
+        return []
+
+    subjects = data['config']['subjects']
+    # Class-wide data is computed once and reused for every student
+    summary = build_class_summary(data['students'], data['assignments'], subjects)
+    summary_rows = summary.set_index('id').to_dict('index')
+    report_index = build_report_index(data['assignments'], subjects)
+    date_str = datetime.now().strftime("%d.%m.%Y")
+    folder = safe_filename(f"{class_name}_{class_id[-4:]}")
+
+    files = []
+    for student in data['students']:
+        report_html = render_student_report(class_name, student, summary_rows[student['id']], report_index, date_str)
+        base = f"{folder}/{safe_filename(student['Nachname'])}_{safe_filename(student['Vorname'])}_{safe_filename(student['Anmeldename'])}"
+        files.append((f"{base}.html", report_html.encode("utf-8")))
+        if with_pdf:
+            pdf = html_to_pdf(report_html)
+            if pdf:
+                files.append((f"{base}.pdf", pdf))
+    return files
+
+
+def generate_batch_reports(classes, target, with_pdf=False, max_workers=None):
+    """
+    Render the reports of several classes into one ZIP file.
+
+    classes: list of registry entries ({'id', 'name'})
+    target:  path or binary file object for the ZIP
+    Classes are rendered in a process pool (inline for a single class) and
+    written to the archive as soon as each class is done.
+    Returns the number of files written.
+    """
+    count = 0
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        if len(classes) <= 1 or max_workers == 1:
+            results = (render_class_reports(c['id'], c['name'], with_pdf) for c in classes)
+            for files in results:
+                for path, content in files:
+                    zf.writestr(path, content)
+                    count += 1
+        else:
+            workers = max_workers or min(len(classes), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(render_class_reports, c['id'], c['name'], with_pdf) for c in classes]
+                for future in as_completed(futures):
+                    for path, content in future.result():
+                        zf.writestr(path, content)
+                        count += 1
+    return count
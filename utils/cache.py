@@ -0,0 +1,65 @@
+import math
+import streamlit as st
+from .data_manager import get_data_version
+from .grading import get_gradebook
+from .gradebook import build_class_summary
+from .analytics import build_analytics_cube
+from .email_manager import email_candidates
+
+# Derived data of the active class, shared by the pages.
+# Each helper is cached with st.cache_data under (class_id, load id, versions of the
+# collections it reads) plus its parameters; the data itself (including the shared
+# GradeBook) is passed with a leading underscore and never hashed, and the helpers
+# read nothing else. A mutation API that bumps one collection therefore
+# invalidates exactly the results that read it (see data_manager.bump_data_version).
+
+GRADE_DATA = ('students', 'assignments')
+
+
+def grade_version():
+    """Cache key of everything computed from students and assignments only"""
+    return get_data_version(*GRADE_DATA)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _subject_averages(data_version, subject, _book):
+    averages = _book.weighted_averages([subject])[:, 0]
+    return {sid: None if math.isnan(avg) else float(avg) for sid, avg in zip(_book.student_ids, averages)}
+
+def subject_averages(subject):
+    """{student_id: weighted average (2 decimals) or None} of a subject, for all students"""
+    return _subject_averages(grade_version(), subject, get_gradebook())
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _overview_summary(data_version, subjects, _students, _assignments, _book):
+    return build_class_summary(_students, _assignments, list(subjects), book=_book)
+
+def overview_summary(subjects):
+    """Per-student summary frame (build_class_summary) of the active class"""
+    return _overview_summary(
+        grade_version(), tuple(subjects), st.session_state.students, st.session_state.assignments, get_gradebook()
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _analytics_cube(data_version, subjects, _students, _assignments, _book):
+    return build_analytics_cube(_book, _students, _assignments, list(subjects))
+
+def analytics_cube(subjects):
+    """Analytics cube (build_analytics_cube) of the active class"""
+    return _analytics_cube(
+        grade_version(), tuple(subjects), st.session_state.students, st.session_state.assignments, get_gradebook()
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _email_candidates(data_version, subject, _students, _assignments, _email_log, _averages):
+    return email_candidates(_students, _assignments, _email_log, subject, _averages)
+
+def email_recipients(subject):
+    """Recipient table of a subject (email_manager.email_candidates); new after grade changes and sent emails"""
+    return _email_candidates(
+        get_data_version('students', 'assignments', 'email_log'), subject, st.session_state.students,
+        st.session_state.assignments, st.session_state.get('email_log', []), subject_averages(subject)
+    )
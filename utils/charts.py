@@ -0,0 +1,110 @@
+import numpy as np
+import plotly.graph_objects as go
+from .gradebook import AT_RISK_THRESHOLD
+
+# Lightweight chart figures built from pre-aggregated data.
+# Values are binned on the server with NumPy and the figures carry only the
+# aggregates (bin counts, one point per assignment), not every raw value.
+# Pages cache the figures per data version; an unchanged figure serializes to the
+# same message, which Streamlit's message cache does not send to the browser again.
+
+AVERAGE_BIN_EDGES = np.linspace(1.0, 6.0, 21)  # 0.25 wide bins over the grade range
+GRADE_RANGE = [1, 6]
+_MARGIN = dict(l=20, r=20, t=40, b=20)
+
+
+def bin_values(values, edges):
+    """Counts per bin; NaN values are ignored"""
+    values = np.asarray(values, dtype=float)
+    return np.histogram(values[~np.isnan(values)], bins=edges)[0]
+
+
+def _pass_line(fig, horizontal=True, label=None):
+    if horizontal:
+        fig.add_hline(y=AT_RISK_THRESHOLD, line_dash="dash", line_color="red", annotation_text=label)
+    else:
+        fig.add_vline(x=AT_RISK_THRESHOLD, line_dash="dash", line_color="red", annotation_text=label)
+
+
+def histogram_figure(counts, edges, height=None, title=None):
+    """Bar chart of pre-binned counts, one bar per bin at its centre"""
+    edges = np.asarray(edges, dtype=float)
+    fig = go.Figure(go.Bar(
+        x=((edges[:-1] + edges[1:]) / 2).round(3), y=np.asarray(counts), width=np.diff(edges).round(3),
+        hovertemplate="Note %{x}<br>Anzahl %{y}<extra></extra>"
+    ))
+    fig.update_layout(title=title, height=height, showlegend=False, bargap=0.05, margin=_MARGIN)
+    fig.update_xaxes(range=GRADE_RANGE, title="Note")
+    fig.update_yaxes(title="Anzahl")
+    return fig
+
+
+def trend_figure(stats, title=None):
+    """Class average per assignment over time; stats: analytics assignment rows (date, mean, median, n, name)"""
+    fig = go.Figure(go.Scatter(
+        x=stats['date'], y=stats['mean'].round(2), mode='lines+markers',
+        customdata=np.column_stack([stats['name'], stats['median'].round(2), stats['n']]),
+        hovertemplate="%{customdata[0]}<br>%{x|%d.%m.%Y}<br>Ø %{y}<br>Median %{customdata[1]}<br>Noten %{customdata[2]}<extra></extra>"
+    ))
+    _pass_line(fig, label="Genügend (4.0)")
+    fig.update_layout(title=title, margin=_MARGIN)
+    fig.update_yaxes(range=GRADE_RANGE, title="Durchschnitt")
+    return fig
+
+
+def difficulty_figure(stats, title=None):
+    """Assignments as horizontal bars sorted by average (hardest on top)"""
+    stats = stats.sort_values('mean', ascending=False)
+    fig = go.Figure(go.Bar(
+        x=stats['mean'].round(2), y=stats['name'], orientation='h',
+        marker=dict(color=stats['mean'].round(2), colorscale='RdYlGn', cmin=GRADE_RANGE[0], cmax=GRADE_RANGE[1]),
+        hovertemplate="%{y}<br>Ø %{x}<extra></extra>"
+    ))
+    fig.update_layout(title=title, margin=_MARGIN)
+    fig.update_xaxes(range=GRADE_RANGE, title="Durchschnitt")
+    return fig
+
+
+def cohort_box_figure(students):
+    """Box per class from precomputed quartiles; students: cohort rows (class, average)"""
+    grouped = students.groupby('class', sort=False)['average']
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    labels = list(quartiles.index)
+    fig = go.Figure(go.Box(
+        x=labels,
+        q1=quartiles[0.25].round(2), median=quartiles[0.5].round(2), q3=quartiles[0.75].round(2),
+        lowerfence=grouped.min().round(2)[labels], upperfence=grouped.max().round(2)[labels],
+        mean=grouped.mean().round(2)[labels], boxpoints=False, showlegend=False
+    ))
+    _pass_line(fig)
+    fig.update_layout(margin=_MARGIN)
+    fig.update_yaxes(range=GRADE_RANGE, title="Durchschnitt")
+    return fig
+
+
+def share_figure(bins, labels):
+    """Grouped bars: share of grades per bin for each class; bins: {class: counts}"""
+    fig = go.Figure([
+        go.Bar(x=labels, y=(counts / total).round(4), name=name)
+        for name, counts in bins.items() if (total := counts.sum())
+    ])
+    fig.update_layout(barmode='group', margin=_MARGIN)
+    fig.update_yaxes(tickformat='.0%', title="Anteil")
+    return fig
+
+
+def cohort_difficulty_figure(assignments):
+    """Assignment averages over time, one trace per class, marker size by number of grades"""
+    fig = go.Figure([
+        go.Scatter(
+            x=rows['date'], y=rows['mean'].round(2), mode='markers', name=name,
+            marker=dict(size=rows['n'], sizemode='area', sizeref=max(assignments['n'].max(), 1) / 400, sizemin=4),
+            customdata=np.column_stack([rows['name'], rows['type'], rows['fail_rate'].round(3)]),
+            hovertemplate="%{customdata[0]} (%{customdata[1]})<br>%{x|%d.%m.%Y}<br>Ø %{y}<br>< 4.0: %{customdata[2]:.0%}<extra></extra>"
+        )
+        for name, rows in assignments.groupby('class', sort=False)
+    ])
+    _pass_line(fig)
+    fig.update_layout(margin=_MARGIN)
+    fig.update_yaxes(range=GRADE_RANGE, title="Durchschnitt")
+    return fig
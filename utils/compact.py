@@ -0,0 +1,179 @@
+import sys
+from array import array
+from collections.abc import Mapping, MutableMapping
+
+# Compact in-memory form of loaded class data.
+# JSON gives one dict entry and one float object per grade and per points value,
+# and one dict per log event: a class with 200 students and 300 assignments holds
+# about 7 MB of dict graphs in every session. Here the grades and points of an
+# assignment are a float array over a student index shared by the whole class,
+# and log events are __slots__ records. Both keep the mapping interface of the
+# dicts they replace (get, in, [], items, pop, update, ==), so code reading or
+# writing the data does not change; save_json writes them back as plain JSON.
+
+_MISSING = float('nan')
+
+
+class StudentIndex:
+    """Student id -> position, shared by all GradeMaps of one class; grows when new ids get a value"""
+    __slots__ = ('ids', 'positions')
+
+    def __init__(self, ids=()):
+        self.ids = []
+        self.positions = {}
+        for sid in ids:
+            self.add(sid)
+
+    def add(self, sid):
+        pos = self.positions.get(sid)
+        if pos is None:
+            sid = sys.intern(sid)
+            pos = self.positions[sid] = len(self.ids)
+            self.ids.append(sid)
+        return pos
+
+
+class GradeMap(MutableMapping):
+    """{student id: float} stored as array('d') over a StudentIndex, NaN = no value"""
+    __slots__ = ('index', 'values')
+
+    def __init__(self, index, items=None):
+        self.index = index
+        self.values = array('d')
+        if items:
+            items = dict(items.items())
+            positions = [index.add(sid) for sid in items]
+            self.values = array('d', [_MISSING]) * (max(positions) + 1)
+            for pos, value in zip(positions, items.values()):
+                self.values[pos] = value
+
+    def _value(self, sid):
+        pos = self.index.positions.get(sid)
+        if pos is None or pos >= len(self.values):
+            return _MISSING
+        return self.values[pos]
+
+    def __getitem__(self, sid):
+        value = self._value(sid)
+        if value != value:
+            raise KeyError(sid)
+        return value
+
+    def get(self, sid, default=None):
+        value = self._value(sid)
+        return default if value != value else value
+
+    def __contains__(self, sid):
+        value = self._value(sid)
+        return value == value
+
+    def __setitem__(self, sid, value):
+        value = float(value)
+        pos = self.index.add(sid)
+        if pos >= len(self.values):
+            self.values.extend([_MISSING] * (pos + 1 - len(self.values)))
+        self.values[pos] = value
+
+    def __delitem__(self, sid):
+        if sid not in self:
+            raise KeyError(sid)
+        self.values[self.index.positions[sid]] = _MISSING
+
+    def __iter__(self):
+        ids = self.index.ids
+        return (ids[pos] for pos, value in enumerate(self.values) if value == value)
+
+    def items(self):
+        ids = self.index.ids
+        return [(ids[pos], value) for pos, value in enumerate(self.values) if value == value]
+
+    def __len__(self):
+        return sum(1 for value in self.values if value == value)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class Record(Mapping):
+    """Read-only record with fixed fields and the mapping interface of the dict it replaces"""
+    __slots__ = ()
+    fields = ()
+    interned = ()  # fields with few distinct values, shared between records
+
+    def __init__(self, values):
+        for field in self.fields:
+            value = values.get(field)
+            if field in self.interned and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, field, value)
+
+    @classmethod
+    def fits(cls, values):
+        """True if a dict has exactly the record's fields (anything else stays a dict)"""
+        return isinstance(values, dict) and len(values) == len(cls.fields) and all(f in values for f in cls.fields)
+
+    def __getitem__(self, field):
+        if field not in self.fields:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class EmailEvent(Record):
+    __slots__ = fields = ('timestamp', 'student_id', 'student_name', 'subject', 'status', 'error')
+    interned = frozenset(('student_id', 'student_name', 'subject', 'status', 'error'))
+
+
+class AuditEvent(Record):
+    __slots__ = fields = ('timestamp', 'user', 'action', 'details')
+    interned = frozenset(('user', 'action'))
+
+
+def compact_values(index, values):
+    """GradeMap of a {student id: number} dict; dicts holding anything else are kept as written"""
+    values = values or {}
+    if all(type(v) in (float, int) and v == v for v in values.values()):
+        return GradeMap(index, values)
+    return values
+
+
+def compact_records(events, record):
+    """Replace the dicts of a log list that fit `record` in place"""
+    for i, event in enumerate(events):
+        if record.fits(event):
+            events[i] = record(event)
+    return events
+
+
+def compact_class_data(data):
+    """
+    Convert loaded class data (dict from load_class_data) in place: grades and points
+    to GradeMaps over one StudentIndex, email and audit events to records.
+    Student ids are interned, so the student dicts and the index share one string per id.
+    """
+    index = StudentIndex(s['id'] for s in data['students'])
+    for s in data['students']:
+        s['id'] = index.ids[index.positions[s['id']]]
+    for a in data['assignments']:
+        for field in ('grades', 'points'):
+            a[field] = compact_values(index, a.get(field))
+        if a.get('comments'):
+            a['comments'] = {sys.intern(sid): text for sid, text in a['comments'].items()}
+    compact_records(data['email_log'], EmailEvent)
+    compact_records(data['audit_log'], AuditEvent)
+    return data
+
+
+def to_json(obj):
+    """json.dump default= hook: compact containers are written as plain objects"""
+    if isinstance(obj, Mapping):
+        return dict(obj.items())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
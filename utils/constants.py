@@ -10,13 +10,18 @@ GLOBAL_CONFIG_FILE = os.path.join(DATA_DIR, "global_config.json")
 CLASSES_REGISTRY_FILE = os.path.join(DATA_DIR, "classes.json")
 TEMPLATES_FILE = os.path.join(DATA_DIR, "templates.json")
 
+# Scale of assignments without an explicit scaleType
+DEFAULT_SCALE = '60% Scale'
+
 # Default Configuration
 DEFAULT_CONFIG = {
     'subjects': ['GESELLSCHAFT', 'SPRACHE'],
+    # Scale types: 'linear' (slope/intercept), 'threshold' (note 4 at threshold),
+    # 'table' ([[min_percentage, note], ...]) - see utils/scales.py
     'scales': {
-        '60% Scale': {'threshold': 0.6, 'label': 'Note 4 mit 60%'},
-        '66% Scale': {'threshold': 0.66, 'label': 'Note 4 mit 66%'},
-        '50% Scale': {'threshold': 0.5, 'label': 'Note 4 mit 50%'}
+        '60% Scale': {'type': 'linear', 'slope': 5.0, 'intercept': 1.0, 'threshold': 0.6, 'label': 'Note 4 mit 60%'},
+        '66% Scale': {'type': 'linear', 'slope': 6.0, 'intercept': 0.0, 'threshold': 0.66, 'label': 'Note 4 mit 66%'},
+        '50% Scale': {'type': 'linear', 'slope': 4.0, 'intercept': 2.0, 'threshold': 0.5, 'label': 'Note 4 mit 50%'}
     },
     'weightDefaults': {
         'Test': 2.0,
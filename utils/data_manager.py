@@ -1,15 +1,18 @@
-import json
 import os
 import shutil
-import glob
 import zipfile
 import streamlit as st
-import stat
+import uuid
 from datetime import datetime
 from .constants import (
     DATA_DIR, BACKUP_DIR, CLASSES_DIR, CLASSES_REGISTRY_FILE, 
     GLOBAL_CONFIG_FILE, DEFAULT_CONFIG
 )
+from .storage import (
+    load_json, save_json, load_class_data, load_class_registry, save_schema_version,
+    append_journal, apply_journal, clear_journal, audit_event, create_backup
+)
+from . import perf
 
 # --- AUDIT LOGGING ---
 
@@ -21,16 +24,17 @@ def log_audit_event(action, details, class_id=None):
     if not class_id:
         return
 
-    event = {
-        'timestamp': datetime.now().isoformat(),
-        'user': 'Teacher', # Placeholder for future auth
-        'action': action,
-        'details': details
-    }
+    event = audit_event(action, details)
 
     # Load existing log, append, save
+    # The active class keeps its log in session state; update it there as well,
+    # otherwise the next save_all_data() would overwrite the event again.
     log_path = os.path.join(CLASSES_DIR, class_id, "audit_log.json")
-    current_log = load_json(log_path, [])
+    if class_id == st.session_state.get('current_class_id') and 'audit_log' in st.session_state:
+        current_log = st.session_state.audit_log
+        bump_data_version('audit_log')
+    else:
+        current_log = load_json(log_path, [])
     current_log.insert(0, event) # Newest first
     save_json(log_path, current_log)
 
@@ -61,38 +65,6 @@ def get_available_backups():
     
     return sorted(backups, key=lambda x: x['date'], reverse=True)
 
-def create_backup(auto=False, note=""):
-    """Create a full system backup"""
-    try:
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        backup_name = f"backup_{'auto' if auto else 'manual'}_{timestamp}"
-        backup_path = os.path.join(BACKUP_DIR, backup_name)
-        
-        if os.path.exists(DATA_DIR):
-            shutil.copytree(DATA_DIR, backup_path)
-        
-        if note:
-            with open(os.path.join(backup_path, "note.txt"), "w", encoding="utf-8") as f:
-                f.write(note)
-        
-        # --- FIX STARTS HERE ---
-        # Helper function to remove read-only files on Windows
-        def on_rm_error(func, path, exc_info):
-            os.chmod(path, stat.S_IWRITE)
-            func(path)
-
-        # Cleanup retention (Keep last 30)
-        backups = sorted(glob.glob(os.path.join(BACKUP_DIR, "backup_*")))
-        if len(backups) > 30:
-            for old in backups[:-30]:
-                # Use the helper function to force delete
-                shutil.rmtree(old, onerror=on_rm_error)
-        # --- FIX ENDS HERE ---
-                
-        return True, f"Backup erstellt: {timestamp}"
-    except Exception as e:
-        return False, str(e)
-    
 def restore_backup(backup_name):
     """Restore data from a specific backup folder"""
     try:
@@ -162,26 +134,8 @@ def init_directories():
     os.makedirs(BACKUP_DIR, exist_ok=True)
     os.makedirs(CLASSES_DIR, exist_ok=True)
 
-def load_json(filepath, default=None):
-    try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f: return json.load(f)
-    except: pass
-    return default if default is not None else []
-
-def save_json(filepath, data):
-    try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        return True
-    except: return False
-
 def get_class_registry():
-    registry = load_json(CLASSES_REGISTRY_FILE, [])
-    # Optional: Filter for demo mode if env var is set
-    if os.environ.get("DEMO_MODE") == "TRUE":
-        return [c for c in registry if c['id'] == "class_demo_2025"]
-    return registry
+    return load_class_registry()
 
 def create_new_class(class_name):
     class_id = f"class_{datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -189,20 +143,62 @@ def create_new_class(class_name):
     registry.append({"id": class_id, "name": class_name, "created_at": datetime.now().isoformat()})
     save_json(CLASSES_REGISTRY_FILE, registry)
     os.makedirs(os.path.join(CLASSES_DIR, class_id), exist_ok=True)
+    save_schema_version(class_id)
     return class_id
 
+# --- DATA VERSION ---
+# Every mutation API bumps the collections it changed. Derived data is cached under the
+# version of the collections it reads (utils.cache), so e.g. a sent email does not
+# invalidate the averages, and nothing has to hash the data itself.
+COLLECTIONS = ('students', 'assignments', 'email_log', 'audit_log', 'config')
+
+def get_data_version(*collections):
+    """
+    Cheap cache key for the loaded class data: (class_id, load id, change counter).
+    The load id is unique per switch_class() so sessions never share a key by accident.
+    With collection names the counter is the tuple of their own counters; without,
+    it counts every change of the class.
+    """
+    if collections:
+        versions = st.session_state.get('data_versions', {})
+        counter = tuple(versions.get(name, 0) for name in collections)
+    else:
+        counter = st.session_state.get('data_version', 0)
+    return (
+        st.session_state.get('current_class_id'),
+        st.session_state.get('data_load_id'),
+        counter
+    )
+
+def bump_data_version(*collections):
+    """Mark collections of the class data in session state as changed (all without arguments)"""
+    versions = dict(st.session_state.get('data_versions', {}))
+    for name in collections or COLLECTIONS:
+        versions[name] = versions.get(name, 0) + 1
+    st.session_state.data_versions = versions
+    st.session_state.data_version = st.session_state.get('data_version', 0) + 1
+
 def switch_class(class_id):
     st.session_state.current_class_id = class_id
-    class_path = os.path.join(CLASSES_DIR, class_id)
+    st.session_state.data_load_id = uuid.uuid4().hex
+    st.session_state.data_version = 0
+    st.session_state.data_versions = {}
+    data = load_class_data(class_id)
     
-    if os.path.exists(class_path):
-        st.session_state.students = load_json(os.path.join(class_path, "students.json"), [])
-        st.session_state.assignments = load_json(os.path.join(class_path, "assignments.json"), [])
-        st.session_state.email_log = load_json(os.path.join(class_path, "email_log.json"), [])
-        st.session_state.audit_log = load_json(os.path.join(class_path, "audit_log.json"), [])
-        
-        class_config = load_json(os.path.join(class_path, "config.json"), None)
-        st.session_state.config = class_config if class_config else load_json(GLOBAL_CONFIG_FILE, DEFAULT_CONFIG)
+    if data is not None:
+        st.session_state.students = data['students']
+        st.session_state.assignments = data['assignments']
+        st.session_state.email_log = data['email_log']
+        st.session_state.audit_log = data['audit_log']
+        st.session_state.config = data['config']
+        if data['migrated'] or data['journal']:
+            # Write back the upgraded schema and compact the journal left by the last session
+            class_path = os.path.join(CLASSES_DIR, class_id)
+            if save_json(os.path.join(class_path, "students.json"), data['students']) and \
+                    save_json(os.path.join(class_path, "assignments.json"), data['assignments']) and \
+                    save_json(os.path.join(class_path, "audit_log.json"), data['audit_log']):
+                save_schema_version(class_id)
+                clear_journal(class_id)
     else:
         # Fallback if folder deleted but id in session
         st.session_state.students = []
@@ -259,7 +255,11 @@ def initialize_session_state():
         st.session_state.assignments = []
         st.session_state.config = load_json(GLOBAL_CONFIG_FILE, DEFAULT_CONFIG)
 
+@perf.phase("save")
 def save_all_data(create_auto_backup=True):
+    # Pages mutate the session data in place and then save, so every save is a new version
+    bump_data_version()
+
     if create_auto_backup:
         create_backup(auto=True)
 
@@ -271,11 +271,41 @@ def save_all_data(create_auto_backup=True):
     
     success = True
     success &= save_json(os.path.join(class_path, "students.json"), st.session_state.students)
-    success &= save_json(os.path.join(class_path, "assignments.json"), st.session_state.assignments)
+    journaled_saved = save_json(os.path.join(class_path, "assignments.json"), st.session_state.assignments)
+    if 'audit_log' in st.session_state:
+        journaled_saved &= save_json(os.path.join(class_path, "audit_log.json"), st.session_state.audit_log)
+    if journaled_saved:
+        clear_journal(class_id)  # The full files now contain all journaled changes
+        save_schema_version(class_id)
+    success &= journaled_saved
     success &= save_json(os.path.join(class_path, "config.json"), st.session_state.config)
     success &= save_json(os.path.join(class_path, "email_log.json"), st.session_state.email_log)
-    if 'audit_log' in st.session_state:
-        success &= save_json(os.path.join(class_path, "audit_log.json"), st.session_state.audit_log)
     
     save_json(GLOBAL_CONFIG_FILE, st.session_state.config)
-    return success
\ No newline at end of file
+    return success
+
+def save_grade_changes(changes, action):
+    """
+    Apply and persist single grade changes without a backup or full rewrite: the changes
+    and one audit event summarizing them are appended to the class journal (O(changes)).
+    changes: list of (student_id, assignment_id, old, new), new None = grade removed
+    A grade set by hand no longer follows the stored points, so the points are removed
+    as well (counted in the audit event); otherwise a later regrade would overwrite it.
+    """
+    class_id = st.session_state.get('current_class_id')
+    if not class_id or not changes:
+        return False
+
+    points = {a['id']: a['points'] for a in st.session_state.assignments}
+    removed_points = sum(1 for sid, aid, _, _ in changes if sid in points.get(aid, {}))
+    details = f"{len(changes)} Noten in {len({aid for _, aid, _, _ in changes})} Prüfungen aktualisiert."
+    if removed_points:
+        details += f" {removed_points} Punktzahlen entfernt (Note von Hand gesetzt)."
+
+    entries = [{'assignment_id': aid, 'student_id': sid, 'grade': new, 'points': None} for sid, aid, _, new in changes]
+    entries.append({'audit': audit_event(action, details)})
+    apply_journal(st.session_state.assignments, entries, st.session_state.get('audit_log'))
+    bump_data_version('assignments', 'audit_log')
+
+    os.makedirs(os.path.join(CLASSES_DIR, class_id), exist_ok=True)
+    return append_journal(class_id, entries)
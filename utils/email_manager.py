@@ -4,9 +4,8 @@ import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from .data_manager import save_json
+from .data_manager import save_json, bump_data_version
 from .constants import CLASSES_DIR
-from .grading import calculate_weighted_average
 
 def log_email_event(student_id, student_name, subject, status, error_msg=""):
     event = {
@@ -18,59 +17,50 @@ def log_email_event(student_id, student_name, subject, status, error_msg=""):
         'error': error_msg
     }
     st.session_state.email_log.insert(0, event)
+    bump_data_version('email_log')
     if 'current_class_id' in st.session_state:
         class_id = st.session_state.current_class_id
         log_file_path = os.path.join(CLASSES_DIR, class_id, "email_log.json")
         save_json(log_file_path, st.session_state.email_log)
 
-def get_last_email_status(student_id, subject):
-    if 'email_log' not in st.session_state:
-        return None
-    for log in st.session_state.email_log:
-        if log['student_id'] == student_id and log['subject'] == subject:
-            return log
-    return None
-
-def get_students_with_changes(subject):
+def email_candidates(students, assignments, email_log, subject, averages):
     """
-    Identify students who have assignments with a modification date NEWER 
-    than their last sent email.
+    Recipient table of a subject in one pass over the log and the assignments:
+    per student {'id', 'name', 'average', 'last_status', 'has_changes'}, in class order.
+    averages: {student_id: average or None}.
+    has_changes: never emailed but graded, or graded in an assignment dated after the last
+    email. Grades carry no timestamp, so a changed grade of an older assignment is not noticed.
     """
-    changed_students = []
-    
-    # Filter assignments by subject
-    subj_assignments = [a for a in st.session_state.assignments if a['subject'] == subject]
-    
-    for student in st.session_state.students:
-        last_email_log = get_last_email_status(student['id'], subject)
-        
-        # If never emailed, but has grades -> Needs email
-        has_grades = any(student['id'] in a['grades'] for a in subj_assignments)
-        if not last_email_log:
-            if has_grades: changed_students.append(student)
-            continue
-            
-        last_email_date = datetime.fromisoformat(last_email_log['timestamp'])
-        
-        # Check if any assignment has a grade that is logically 'newer'
-        # Since we don't track timestamp per grade, we check assignment date 
-        # (Assuming assignment date ~ grading date for new assignments)
-        # For updates to old assignments, this is a limitation, but sufficient for "New Weekly Assignments"
-        
-        has_new_data = False
-        for a in subj_assignments:
-            if student['id'] in a['grades']:
-                try:
-                    assign_date = datetime.fromisoformat(a['date'])
-                    if assign_date > last_email_date:
-                        has_new_data = True
-                        break
-                except: pass
-        
-        if has_new_data:
-            changed_students.append(student)
-            
-    return changed_students
+    last_sent = {}
+    for log in email_log:  # newest first
+        if log['subject'] == subject and log['student_id'] not in last_sent:
+            last_sent[log['student_id']] = log
+
+    dated = []
+    for a in assignments:
+        if a['subject'] == subject:
+            try:
+                dated.append((a['grades'], datetime.fromisoformat(a['date'])))
+            except (KeyError, TypeError, ValueError):
+                dated.append((a['grades'], None))
+
+    rows = []
+    for student in students:
+        sid = student['id']
+        last_log = last_sent.get(sid)
+        if not last_log:
+            has_changes = any(sid in grades for grades, _ in dated)
+        else:
+            last_email_date = datetime.fromisoformat(last_log['timestamp'])
+            has_changes = any(sid in grades and date is not None and date > last_email_date for grades, date in dated)
+        rows.append({
+            'id': sid,
+            'name': f"{student.get('Vorname', '')} {student.get('Nachname', '')}".strip(),
+            'average': averages.get(sid),
+            'last_status': last_log['status'] if last_log else None,
+            'has_changes': has_changes,
+        })
+    return rows
 
 def send_email(recipient, subject_line, text_body, sender_email, sender_password, html_body=None):
     try:
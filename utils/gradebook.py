@@ -0,0 +1,327 @@
+import numpy as np
+import pandas as pd
+from .scales import calculate_grades
+from .compact import GradeMap
+
+AT_RISK_THRESHOLD = 4.0
+OVERALL_COL = 'Gesamt Ø'
+
+
+def zeugnis_col(subject):
+    """Column name of the rounded report grade (Zeugnisnote) of a subject"""
+    return f"{subject} (Z)"
+
+
+def weighted_average(assignments, student_id, subject):
+    """Weighted average of one student in one subject (2 decimals), None without grades"""
+    total_weighted = 0
+    total_weight = 0
+    for assignment in assignments:
+        if assignment['subject'] != subject:
+            continue
+        grade = assignment['grades'].get(student_id)
+        if grade is not None:
+            total_weighted += grade * assignment['weight']
+            total_weight += assignment['weight']
+
+    if total_weight > 0:
+        return round(total_weighted / total_weight, 2)
+    return None
+
+
+class GradeBook:
+    """
+    Columnar grades of one class, built once from the JSON dicts.
+
+    Student ids are interned to an int index: the students of the class first,
+    then ids that only occur in old grade records. grades and points are float32
+    arrays of shape (assignments, students) with NaN where there is no value,
+    so every aggregation is an array operation without per-value parsing.
+    """
+    __slots__ = (
+        'student_ids', 'student_index', 'assignment_ids', 'assignment_index',
+        'subjects', 'weights', 'dates', 'grades', 'points'
+    )
+
+    def __init__(self, students, assignments):
+        self.student_ids = [s['id'] for s in students]
+        self.student_index = {sid: i for i, sid in enumerate(self.student_ids)}
+        complete = set()  # GradeMap indexes whose ids are all students already
+        for a in assignments:
+            for field in ('grades', 'points'):
+                values = a.get(field, {})
+                if isinstance(values, GradeMap):
+                    if id(values.index) in complete:
+                        continue
+                    if all(sid in self.student_index for sid in values.index.ids):
+                        complete.add(id(values.index))
+                        continue
+                for sid in values:
+                    if sid not in self.student_index:
+                        self.student_index[sid] = len(self.student_ids)
+                        self.student_ids.append(sid)
+
+        self.assignment_ids = [a['id'] for a in assignments]
+        self.assignment_index = {aid: i for i, aid in enumerate(self.assignment_ids)}
+        self.subjects = np.array([a['subject'] for a in assignments], dtype=object)
+        self.weights = _to_float_array([a.get('weight', 1.0) for a in assignments], np.float64)
+        self.dates = np.array([a.get('date', "") for a in assignments], dtype=object)  # ISO strings sort by time
+        self.grades = self._columns(assignments, 'grades')
+        self.points = self._columns(assignments, 'points')
+
+    def _columns(self, assignments, field):
+        out = np.full((len(assignments), len(self.student_ids)), np.nan, dtype=np.float32)
+        rows, cols, values = [], [], []
+        index_cols = {}  # GradeMap student index -> GradeBook columns
+        for r, a in enumerate(assignments):
+            grade_map = a.get(field, {})
+            if isinstance(grade_map, GradeMap):
+                # Float array over the class's student index: copied without per-value work
+                key = id(grade_map.index)
+                if key not in index_cols:
+                    index_cols[key] = np.array(
+                        [self.student_index.get(sid, -1) for sid in grade_map.index.ids], dtype=np.intp
+                    )
+                row = np.frombuffer(grade_map.values, dtype=np.float64)
+                pos = index_cols[key][:len(row)]
+                has_value = ~np.isnan(row)
+                out[r, pos[has_value]] = row[has_value]
+                continue
+            for sid, value in grade_map.items():
+                rows.append(r)
+                cols.append(self.student_index[sid])
+                values.append(value)
+        out[rows, cols] = _to_float_array(values, np.float32)
+        return out
+
+    @property
+    def nbytes(self):
+        return self.grades.nbytes + self.points.nbytes + self.weights.nbytes
+
+    def grade_values(self):
+        """Grades as float64, rounded back to the stored precision (float32 holds 4.3 as 4.3000002)"""
+        return np.round(self.grades.astype(np.float64), 4)
+
+    def weighted_averages(self, subjects):
+        """(students x subjects) weighted averages rounded to 2 decimals, NaN without grades"""
+        grades = self.grade_values()
+        valid = ~np.isnan(grades) & ~np.isnan(self.weights)[:, None]
+        weights = np.where(valid, self.weights[:, None], 0.0)
+        weighted = np.where(valid, grades * self.weights[:, None], 0.0)
+
+        out = np.full((len(self.student_ids), len(subjects)), np.nan)
+        for j, subject in enumerate(subjects):
+            rows = self.subjects == subject
+            total_weight = weights[rows].sum(axis=0)
+            has_weight = total_weight > 0
+            out[has_weight, j] = weighted[rows].sum(axis=0)[has_weight] / total_weight[has_weight]
+        return np.round(out, 2)
+
+    def assignment_stats(self):
+        """Per-assignment statistics (index: assignment_id): count, mean, below (< 4.0); graded assignments only"""
+        grades = self.grade_values()
+        valid = ~np.isnan(grades)
+        count = valid.sum(axis=1)
+        graded = count > 0
+        total = np.where(valid, grades, 0.0).sum(axis=1)
+        return pd.DataFrame({
+            'count': count[graded],
+            'mean': total[graded] / count[graded],
+            'below': (grades < AT_RISK_THRESHOLD)[graded].sum(axis=1),
+        }, index=pd.Index(self.assignment_ids, name='assignment_id')[graded])
+
+    def matrix(self, student_ids, assignment_ids=None):
+        """Grades as a student x assignment frame (index: student id, columns: assignment id)"""
+        assignment_ids = self.assignment_ids if assignment_ids is None else list(assignment_ids)
+        rows = [self.assignment_index[aid] for aid in assignment_ids]
+        cols = [self.student_index[sid] for sid in student_ids]
+        values = self.grade_values()[np.ix_(rows, cols)].T
+        return pd.DataFrame(
+            values, index=pd.Index(list(student_ids), name='student_id'), columns=assignment_ids
+        )
+
+    def trends(self, subject, threshold=0.2):
+        """Trend icon per student id between the two newest grades of a subject"""
+        rows = sorted(np.flatnonzero(self.subjects == subject), key=lambda r: self.dates[r], reverse=True)
+        if len(rows) < 2:
+            return {}
+        grades = self.grade_values()[rows]
+        valid = ~np.isnan(grades)
+        seen = np.cumsum(valid, axis=0)
+        cols = np.flatnonzero(seen[-1] >= 2)
+
+        newest = grades[np.argmax(valid & (seen == 1), axis=0)[cols], cols]
+        previous = grades[np.argmax(valid & (seen == 2), axis=0)[cols], cols]
+        diff = newest - previous
+        icons = np.where(diff > threshold, "📈", np.where(diff < -threshold, "📉", "➡️"))
+        return {self.student_ids[c]: str(icon) for c, icon in zip(cols, icons)}
+
+
+def _to_float_array(values, dtype):
+    """Parse mixed JSON values (floats, numeric strings, None) once; anything else becomes NaN"""
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=dtype)
+
+
+def build_class_summary(students, assignments, subjects, book=None):
+    """
+    Per-student summary of a class in one pass, in the order of `students`.
+    `book` is an already built GradeBook of the same data (optional).
+
+    Columns: id, Vorname, Nachname, Anmeldename, Name,
+             <subject> (raw weighted average), <subject> (Z) (Zeugnisnote),
+             Gesamt Ø (mean of the subject averages), at_risk (any subject < 4.0)
+    """
+    summary = pd.DataFrame(
+        [(s['id'], s['Vorname'], s['Nachname'], s['Anmeldename']) for s in students],
+        columns=['id', 'Vorname', 'Nachname', 'Anmeldename']
+    )
+    summary['Name'] = summary['Vorname'] + " " + summary['Nachname']
+
+    book = book or GradeBook(students, assignments)
+    averages = book.weighted_averages(subjects)[:len(students)]
+
+    for j, subject in enumerate(subjects):
+        avg = averages[:, j]
+        summary[subject] = avg
+        summary[zeugnis_col(subject)] = np.floor(avg * 2 + 0.5) / 2
+
+    subject_avgs = summary[subjects] if subjects else pd.DataFrame(index=summary.index)
+    summary[OVERALL_COL] = subject_avgs.mean(axis=1, skipna=True).round(2)
+    summary['at_risk'] = (subject_avgs < AT_RISK_THRESHOLD).any(axis=1)
+    return summary
+
+
+def class_means(summary, subjects):
+    """Class average of every grade column of a summary frame (NaN ignored)"""
+    cols = [c for s in subjects for c in (s, zeugnis_col(s))] + [OVERALL_COL]
+    return summary[cols].mean(skipna=True)
+
+
+# ---------------------------------------------------------
+# Entry editor (points & comments of one assignment)
+# ---------------------------------------------------------
+def build_entry_frame(students, assignment, trends=None):
+    """
+    Editor frame of one assignment, indexed by student id.
+    Punkte is NaN where no points are stored, Kommentar is '' where there is no comment.
+    """
+    trends = trends or {}
+    points = assignment['points']
+    grades = assignment['grades']
+    comments = assignment['comments']
+    ids = [s['id'] for s in students]
+    frame = pd.DataFrame({
+        'Name': [f"{s['Vorname']} {s['Nachname']} {trends.get(s['id'], '')}".rstrip() for s in students],
+        'Punkte': pd.to_numeric(pd.Series([points.get(i) for i in ids], dtype=object), errors='coerce').to_numpy(dtype=float),
+        'Note': pd.to_numeric(pd.Series([grades.get(i) for i in ids], dtype=object), errors='coerce').to_numpy(dtype=float),
+        'Kommentar': [comments.get(i, "") for i in ids],
+    }, index=pd.Index(ids, name='student_id'))
+    return frame
+
+
+def diff_entry_frame(original, edited, max_points, scale):
+    """
+    Compare an edited entry frame with its original.
+
+    Returns only the changed rows (index: student id) with the columns
+    Name, points_old, points_new, grade_old, grade_new, comment_old, comment_new,
+    points_changed, comment_changed. New grades of all changed rows are computed
+    in one vectorized step; a cleared points cell gives grade_new NaN (grade removed).
+    """
+    edited = edited.reindex(original.index)
+    old_p = original['Punkte'].to_numpy(dtype=float)
+    new_p = pd.to_numeric(edited['Punkte'], errors='coerce').to_numpy(dtype=float)
+    points_changed = ~((old_p == new_p) | (np.isnan(old_p) & np.isnan(new_p)))
+
+    old_c = original['Kommentar'].fillna("").astype(str).str.strip()
+    new_c = edited['Kommentar'].fillna("").astype(str).str.strip()
+    comment_changed = (old_c != new_c).to_numpy()
+
+    changed = points_changed | comment_changed
+    old_g = original['Note'].to_numpy(dtype=float)
+    new_g = np.where(points_changed, calculate_grades(new_p, max_points, scale), old_g)
+
+    diff = pd.DataFrame({
+        'Name': original['Name'],
+        'points_old': old_p, 'points_new': new_p,
+        'grade_old': old_g, 'grade_new': new_g,
+        'comment_old': old_c, 'comment_new': new_c,
+        'points_changed': points_changed, 'comment_changed': comment_changed,
+    }, index=original.index)
+    return diff[changed]
+
+
+def apply_entry_changes(assignment, changes):
+    """Write the rows of diff_entry_frame into the assignment. Returns the number of changed cells."""
+    points = assignment.setdefault('points', {})
+    comments = assignment.setdefault('comments', {})
+    grades = assignment['grades']
+    count = 0
+    for sid, ch in changes.iterrows():
+        if ch['points_changed']:
+            count += 1
+            if np.isnan(ch['points_new']):
+                points.pop(sid, None)
+                grades.pop(sid, None)
+            else:
+                points[sid] = float(ch['points_new'])
+                if not np.isnan(ch['grade_new']):
+                    grades[sid] = float(ch['grade_new'])
+        if ch['comment_changed']:
+            count += 1
+            if ch['comment_new']:
+                comments[sid] = ch['comment_new']
+            else:
+                comments.pop(sid, None)
+    return count
+
+
+# ---------------------------------------------------------
+# Grade matrix (quick entry)
+# ---------------------------------------------------------
+def build_grade_matrix(students, assignments, book=None):
+    """Grades as a student x assignment frame (index: student id, columns: assignment id), NaN = no grade"""
+    book = book or GradeBook(students, assignments)
+    return book.matrix([s['id'] for s in students], [a['id'] for a in assignments])
+
+
+def diff_grade_matrix(original, edited):
+    """
+    Changed cells between two grade matrices with the same index and columns.
+    Empty cells and 0 both mean 'no grade'; new grades are rounded to 0.1.
+    Returns a list of (student_id, assignment_id, old, new) with None for a missing grade.
+    """
+    old = original.to_numpy(dtype=float)
+    new = (
+        edited.reindex(index=original.index, columns=original.columns)
+        .apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    )
+    new = np.where(new == 0, np.nan, new)
+
+    old_missing = np.isnan(old)
+    new_missing = np.isnan(new)
+    rounded = np.round(new, 1)
+    # Untouched cells compare unrounded; edits that round back to the stored grade are no change
+    changed = (old_missing != new_missing) | (
+        ~old_missing & ~new_missing & (old != new) & (old != rounded)
+    )
+
+    rows, cols = np.nonzero(changed)
+    return [
+        (
+            original.index[r], original.columns[c],
+            None if old_missing[r, c] else float(old[r, c]),
+            None if new_missing[r, c] else float(rounded[r, c])
+        )
+        for r, c in zip(rows, cols)
+    ]
+
+
+def build_assignment_frame(assignments):
+    """Assignment metadata (index: assignment id): name, subject, type, date; newest first"""
+    meta = pd.DataFrame(
+        [(a['id'], a['name'], a['subject'], a['type'], a['date']) for a in assignments],
+        columns=['assignment_id', 'name', 'subject', 'type', 'date']
+    ).set_index('assignment_id')
+    meta['date'] = pd.to_datetime(meta['date'], format='ISO8601').dt.normalize()
+    return meta.sort_values('date', ascending=False, kind='stable')
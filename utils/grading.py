@@ -1,5 +1,10 @@
 import math
+import pandas as pd
 import streamlit as st
+from .scales import DEFAULT_SCALE, calculate_grades, resolve_scale
+from .gradebook import GradeBook
+from .data_manager import get_data_version
+from . import perf
 
 
 def round_to_half(number):
@@ -15,75 +20,55 @@ def round_to_half(number):
     return math.floor(number * 2 + 0.5) / 2
 
 
-def calculate_grade(points, max_points, scale_type='60% Scale'):
+@st.cache_resource(show_spinner=False, max_entries=16)
+@perf.counted  # counts rebuilds (cache misses)
+def _build_gradebook(data_version, _students, _assignments):
+    return GradeBook(_students, _assignments)
+
+
+def get_gradebook():
+    """Shared, read-only GradeBook of the active class; one per student and assignment version"""
+    return _build_gradebook(
+        get_data_version('students', 'assignments'), st.session_state.students, st.session_state.assignments
+    )
+
+
+@perf.counted
+def calculate_grade(points, max_points, scale_type=DEFAULT_SCALE):
     # OLD (Buggy): if not points or not max_points or max_points == 0:
     # NEW (Correct): We check if points is specifically None
     if points is None or not max_points or max_points == 0:
         return None
     
-    percentage = points / max_points
-    
-    if scale_type == '60% Scale':
-        note = (percentage * 5) + 1
-    elif scale_type == '66% Scale':
-        note = percentage * 6
-    elif scale_type == '50% Scale':
-        note = (percentage * 4) + 2
-    else:
-        note = (percentage * 5) + 1
-    
-    note = max(1.0, min(6.0, note))
+    scale = resolve_scale(scale_type, st.session_state.config['scales'])
+    note = calculate_grades([points], max_points, scale)[0]
     
     return {
-        'note': round(note, 1),
-        'percentage': round(percentage * 100, 1),
-        'label': st.session_state.config['scales'][scale_type]['label']
+        'note': float(note),
+        'percentage': round(points / max_points * 100, 1),
+        'label': scale['label']
     }
 
-def calculate_weighted_average(student_id, subject):
-    student_assignments = [
-        a for a in st.session_state.assignments 
-        if a['subject'] == subject and student_id in a.get('grades', {})
-    ]
-    
-    if not student_assignments:
-        return None
-    
-    total_weighted = 0
-    total_weight = 0
-    
-    for assignment in student_assignments:
-        grade = assignment['grades'].get(student_id)
-        if grade is not None:
-            try:
-                grade_value = float(grade)
-                weight = assignment.get('weight', 1.0)
-                total_weighted += grade_value * weight
-                total_weight += weight
-            except (ValueError, TypeError):
-                continue
-    
-    if total_weight > 0:
-        return round(total_weighted / total_weight, 2)
-    return None
-
-def get_student_trend(student_id, subject):
+def grade_import_frame(df, students, max_points, scale_type=DEFAULT_SCALE, default_points=None):
     """
-    Returns an icon and difference representing the trend between the last two graded assignments.
+    Grade an imported sheet (columns: Anmeldename, Punkte) in one vectorized step.
+    Returns (points, grades) dicts keyed by student id. Unknown logins and empty cells are skipped.
     """
-    assigns = [a for a in st.session_state.assignments if a['subject'] == subject and student_id in a.get('grades', {})]
-    assigns.sort(key=lambda x: x['date'], reverse=True) # Newest first
+    id_by_login = {s['Anmeldename']: s['id'] for s in students}
+    student_ids = df['Anmeldename'].astype(str).str.strip().map(id_by_login)
+    
+    if 'Punkte' in df.columns:
+        points = pd.to_numeric(df['Punkte'], errors='coerce')
+    else:
+        points = pd.Series(default_points, index=df.index, dtype=float)
+    
+    mask = student_ids.notna() & points.notna()
+    student_ids = student_ids[mask].tolist()
+    points = points[mask].to_numpy(dtype=float)
     
-    if len(assigns) < 2:
-        return None, 0
+    scale = resolve_scale(scale_type, st.session_state.config['scales'])
+    notes = calculate_grades(points, max_points, scale)
     
-    try:
-        newest = float(assigns[0]['grades'][student_id])
-        previous = float(assigns[1]['grades'][student_id])
-        diff = newest - previous
-        
-        if diff > 0.2: return "📈", diff
-        elif diff < -0.2: return "📉", diff
-        else: return "➡️", diff
-    except:
-        return None, 0
\ No newline at end of file
+    points_by_id = dict(zip(student_ids, points.tolist()))
+    grades_by_id = {sid: note for sid, note in zip(student_ids, notes.tolist()) if not math.isnan(note)}
+    return points_by_id, grades_by_id
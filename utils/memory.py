@@ -0,0 +1,86 @@
+import sys
+
+# Memory accounting of session state and caches (approximate, for diagnostics).
+# deep_sizeof walks an object graph once and counts every object a single time,
+# including __slots__ objects, numpy arrays and pandas frames; objects shared
+# between session keys are attributed to the first key that reaches them.
+
+
+def _slot_names(cls):
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        yield from (slots,) if isinstance(slots, str) else slots
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate size of an object graph in bytes; objects already in `seen` count 0"""
+    seen = set() if seen is None else seen
+    stack, total = [obj], 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, type) or callable(obj) and not hasattr(obj, '__slots__'):
+            continue  # classes and functions belong to the code, not to the data
+        module = type(obj).__module__
+        if module.startswith('pandas') and hasattr(obj, 'memory_usage'):
+            usage = obj.memory_usage(deep=True)
+            total += int(usage.sum() if hasattr(usage, 'sum') else usage)
+            continue
+        total += sys.getsizeof(obj)  # numpy arrays and array.array include their buffer
+        if module == 'numpy':
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif not isinstance(obj, (str, bytes, bytearray, int, float, bool)):
+            if hasattr(obj, '__dict__'):
+                stack.append(vars(obj))
+            for name in _slot_names(type(obj)):
+                if name not in ('__dict__', '__weakref__') and hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return total
+
+
+def session_report(state):
+    """
+    Rows (key, type, bytes) per session-state key, largest first.
+    Each key is measured on its own; shared objects count for every key that holds them.
+    """
+    rows = [(key, type(value).__name__, deep_sizeof(value)) for key, value in state.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+
+def cache_report():
+    """
+    Rows (kind, function, entries, bytes) for the process-wide Streamlit caches.
+    st.cache_data stores pickled values (bytes as stored), st.cache_resource the
+    objects themselves (deep size). Reads Streamlit internals: [] if they change.
+    """
+    try:
+        from streamlit.runtime.caching.cache_data_api import _data_caches
+        from streamlit.runtime.caching.cache_resource_api import _resource_caches
+    except ImportError:
+        return []
+
+    rows = []
+    for kind, caches in (("data", _data_caches), ("resource", _resource_caches)):
+        try:
+            with caches._caches_lock:
+                function_caches = [c for per_session in caches._function_caches.values() for c in per_session.values()]
+        except AttributeError:
+            return []
+        for cache in function_caches:
+            if kind == "data":
+                stats = [s for family in cache.get_stats().values() for s in family]
+                entries, size = len(stats), sum(s.byte_length for s in stats)
+            else:
+                with cache._mem_cache_lock:
+                    results = list(cache._mem_cache.values())
+                seen = set()
+                entries, size = len(results), sum(deep_sizeof(r.value, seen) for r in results)
+            rows.append((kind, cache.display_name, entries, size))
+    return sorted(rows, key=lambda row: row[3], reverse=True)
@@ -0,0 +1,116 @@
+import json
+import os
+import platform
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+# Opt-in performance instrumentation of one rerun.
+# Enabled with the environment variable NOTEN_PERF=1 or config['perf_instrumentation'].
+# app.main opens a run, phases add up wall time in ms, counters count calls of hot
+# functions and the storage layer adds JSON bytes read and written. Without an open
+# run every hook is a single attribute lookup. Runs are thread-local: each Streamlit
+# session reruns in its own script thread, helper threads are not recorded.
+
+ENV_FLAG = "NOTEN_PERF"
+ENV_TAG = "NOTEN_PERF_TAG"  # free label stored with every run, e.g. a version to compare against
+MAX_RUNS = 50
+
+_local = threading.local()
+
+
+def requested(config=None):
+    """True if instrumentation is switched on by environment or configuration"""
+    if os.environ.get(ENV_FLAG, "").lower() in ("1", "true", "yes"):
+        return True
+    return bool((config or {}).get('perf_instrumentation'))
+
+
+def start_run(page):
+    _local.run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'tag': os.environ.get(ENV_TAG, ""),
+        'python': platform.python_version(),
+        'page': page,
+        'phases': {},
+        'counters': Counter(),
+        'io': {'load': [0, 0], 'save': [0, 0]},  # [files, bytes]
+        '_start': time.perf_counter(),
+    }
+
+
+def active():
+    return getattr(_local, 'run', None) is not None
+
+
+def finish_run():
+    """Close the current run; returns it as a plain dict (None if no run was open)"""
+    run = getattr(_local, 'run', None)
+    _local.run = None
+    if run is None:
+        return None
+    run['total_ms'] = round((time.perf_counter() - run.pop('_start')) * 1000, 2)
+    run['phases'] = {name: round(ms, 2) for name, ms in run['phases'].items()}
+    run['counters'] = dict(run['counters'])
+    return run
+
+
+@contextmanager
+def phase(name):
+    """Time a block; repeated phases in one run add up"""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run['phases'][name] = run['phases'].get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def count(name, n=1):
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run['counters'][name] += n
+
+
+def counted(func):
+    """Count calls of a hot function while a run is open"""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        run = getattr(_local, 'run', None)
+        if run is not None:
+            run['counters'][name] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def record_io(kind, nbytes):
+    """kind: 'load' or 'save'"""
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run['io'][kind][0] += 1
+        run['io'][kind][1] += nbytes
+
+
+def add_run(history, run):
+    """Append a finished run to a history list, keeping the newest MAX_RUNS"""
+    history.append(run)
+    del history[:-MAX_RUNS]
+    return history
+
+
+def to_jsonl(runs):
+    return "".join(json.dumps(run, ensure_ascii=False) + "\n" for run in runs)
+
+
+def read_jsonl(path):
+    """Runs from an exported file (for comparing versions)"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,140 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# On-demand profiling of single reruns.
+# 'cprofile' records every call of the script thread (exact counts, some overhead);
+# 'sampling' reads the script thread's stack every few milliseconds from a helper
+# thread (low overhead, statistical). Results go to PROFILE_DIR as .prof (open with
+# snakeviz / pstats) or .collapsed (one "a;b;c count" line per stack, for flamegraph tools).
+
+PROFILE_DIR = "profiles"
+MODES = ("cprofile", "sampling")
+SAMPLE_INTERVAL = 0.005  # seconds
+
+
+class _Sampler:
+    """Collect the stacks of one thread at a fixed interval"""
+    __slots__ = ('thread_id', 'interval', 'stacks', '_stop', '_thread')
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class Capture:
+    """Result of one profiled block: a cProfile.Profile or sampled stacks"""
+    __slots__ = ('mode', 'profile', 'stacks', 'interval', 'seconds')
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.profile = None
+        self.stacks = None
+        self.interval = SAMPLE_INTERVAL
+        self.seconds = 0.0
+
+
+@contextmanager
+def capture(mode="cprofile"):
+    """
+    Profile the enclosed block on the current thread.
+    cProfile allows one active profiler per process; if another session is already
+    being profiled, the block is sampled instead (result.mode tells which).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unbekannter Profiler: {mode}")
+    result = Capture(mode)
+    if mode == "cprofile":
+        result.profile = cProfile.Profile()
+        try:
+            result.profile.enable()
+        except ValueError:
+            result.mode, result.profile = "sampling", None
+    if result.mode == "sampling":
+        sampler = _Sampler(threading.get_ident())
+        sampler.start()
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.seconds = time.perf_counter() - start
+        if result.mode == "cprofile":
+            result.profile.disable()
+        else:
+            sampler.stop()
+            result.stacks = sampler.stacks
+
+
+def save_capture(result, label, directory=PROFILE_DIR):
+    """Write the capture to directory; returns the file path"""
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r'[^\w.-]+', '_', label).strip('_') or "page"
+    stem = os.path.join(directory, f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{slug}")
+    if result.mode == "cprofile":
+        path = stem + ".prof"
+        result.profile.dump_stats(path)
+    else:
+        path = stem + ".collapsed"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{stack} {n}\n" for stack, n in result.stacks.most_common())
+    return path
+
+
+def top_functions(result, n=20):
+    """
+    The n most expensive functions, by own time.
+    Rows: function, calls (None when sampled), self_ms, total_ms
+    """
+    if result.mode == "cprofile":
+        stats = pstats.Stats(result.profile).stats
+        rows = [
+            {
+                'function': f"{name} ({os.path.basename(filename)}:{line})",
+                'calls': calls,
+                'self_ms': tottime * 1000,
+                'total_ms': cumtime * 1000,
+            }
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.items()
+        ]
+    else:
+        own, total = Counter(), Counter()
+        for stack, count in result.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        ms = result.interval * 1000
+        rows = [
+            {'function': frame, 'calls': None, 'self_ms': own[frame] * ms, 'total_ms': samples * ms}
+            for frame, samples in total.items()
+        ]
+    rows.sort(key=lambda r: (r['self_ms'], r['total_ms']), reverse=True)
+    return [{**r, 'self_ms': round(r['self_ms'], 2), 'total_ms': round(r['total_ms'], 2)} for r in rows[:n]]
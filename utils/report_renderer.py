@@ -0,0 +1,146 @@
+import html
+from string import Template
+
+# Shared report rendering for all print views.
+# Templates are compiled once at import, rows are produced by generators and
+# joined once, and styling lives in one stylesheet instead of per-cell inline styles.
+
+esc = html.escape
+
+REPORT_CSS = """
+@media print { body { margin: 0; } .no-print { display: none; } }
+body { font-family: Arial, sans-serif; padding: 20px; color: #333; }
+.header { margin-bottom: 20px; border-bottom: 2px solid #333; padding-bottom: 10px; }
+.info-box { background-color: #f5f5f5; padding: 15px; margin-bottom: 20px; border-left: 4px solid #333; }
+.info-box p { margin: 5px 0; }
+.stats { margin: 20px 0; }
+.stat-box { display: inline-block; padding: 10px 15px; margin-right: 15px; background-color: #e8f5e9; border-radius: 4px; }
+.stat-box.bad { background-color: #ffebee; }
+table { width: 100%; border-collapse: collapse; }
+thead tr { background-color: #f2f2f2; }
+th { text-align: left; padding: 8px; border-bottom: 2px solid #333; }
+td { padding: 8px; border-bottom: 1px solid #ddd; }
+.c { text-align: center; }
+.b { font-weight: bold; }
+.shade { background-color: #f9f9f9; }
+.overall { background-color: #e8f0fe; font-weight: bold; }
+.overall-head { background-color: #e8e8e8; }
+.comment { font-style: italic; color: #555; }
+.muted { font-size: 11px; color: #666; }
+.g-good { color: #28a745; } .g-ok { color: #d39e00; } .g-warn { color: #fd7e14; } .g-bad { color: #dc3545; }
+.p-good { color: #388e3c; font-weight: bold; } .p-bad { color: #d32f2f; font-weight: bold; } .p-none { font-weight: bold; }
+.legend { margin-top: 10px; font-size: 12px; }
+.legend span { margin-right: 15px; font-weight: bold; }
+.footer { margin-top: 30px; padding-top: 10px; border-top: 1px solid #ccc; font-size: 12px; color: #666; }
+.actions { margin-top: 20px; text-align: center; }
+.actions button { padding: 10px 20px; font-size: 16px; cursor: pointer; margin: 0 5px; }
+"""
+
+# Dense grid (grade matrix): smaller font, full borders, landscape page
+MATRIX_CSS = """
+@media print { @page { size: landscape; } }
+body { padding: 15px; font-size: 12px; }
+.matrix th, .matrix td { padding: 6px; border: 1px solid #333; }
+.matrix th { font-size: 11px; background-color: #e8e8e8; text-align: center; }
+"""
+
+_PAGE_START = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>$css</style>
+</head>
+<body>
+""")
+
+_PAGE_END = """<div class="no-print actions">
+<button onclick="window.print()">🖨️ Drucken</button>
+<button onclick="window.close()">Schließen</button>
+</div>
+</body>
+</html>
+"""
+
+# Precompiled cell/row formatters (bound str.format methods)
+_CELL = '<td class="{}">{}</td>'.format
+_PLAIN_CELL = '<td>{}</td>'.format
+_HEAD = '<th class="{}">{}</th>'.format
+_PLAIN_HEAD = '<th>{}</th>'.format
+
+
+def cell(content, css=""):
+    """One table cell; content must already be escaped"""
+    return _CELL(css, content) if css else _PLAIN_CELL(content)
+
+
+def row(cells):
+    return "<tr>" + "".join(cells) + "</tr>\n"
+
+
+def header(heading, *lines, level=1):
+    """Report header block; lines are trusted HTML snippets"""
+    paragraphs = "".join(f"<p>{line}</p>" for line in lines)
+    return f'<div class="header"><h{level}>{esc(heading)}</h{level}>{paragraphs}</div>\n'
+
+
+def table(columns, rows, css=""):
+    """
+    Stream a table: columns is a list of labels or (label, css) tuples,
+    rows an iterable of row() strings.
+    """
+    head = "".join(
+        _HEAD(c[1], esc(c[0])) if isinstance(c, tuple) else _PLAIN_HEAD(esc(c))
+        for c in columns
+    )
+    yield f'<table class="{css}"><thead><tr>{head}</tr></thead><tbody>\n'
+    yield from rows
+    yield "</tbody></table>\n"
+
+
+def format_grade(value, digits=1):
+    """Grade as text, '-' if missing"""
+    if value is None or value != value or value == "":
+        return "-"
+    return f"{float(value):.{digits}f}"
+
+
+def tier_class(value):
+    """Four-step colour of the overview (≥4.5 / ≥4.0 / ≥3.5 / below)"""
+    if value is None or value != value:
+        return ""
+    value = float(value)
+    if value >= 4.5:
+        return "g-good"
+    if value >= 4.0:
+        return "g-ok"
+    if value >= 3.5:
+        return "g-warn"
+    return "g-bad"
+
+
+def pass_class(value):
+    """Colour of single grades: red below 4.0, green from 5.0"""
+    if value is None or value != value or value == "":
+        return "p-none"
+    value = float(value)
+    if value < 4.0:
+        return "p-bad"
+    if value >= 5.0:
+        return "p-good"
+    return "p-none"
+
+
+def iter_report(title, sections, extra_css=""):
+    """Yield the report page chunk by chunk; sections are strings or iterables of strings"""
+    yield _PAGE_START.substitute(title=esc(title), css=REPORT_CSS + extra_css)
+    for section in sections:
+        if isinstance(section, str):
+            yield section
+        else:
+            yield from section
+    yield _PAGE_END
+
+
+def render_report(title, sections, extra_css=""):
+    return "".join(iter_report(title, sections, extra_css))
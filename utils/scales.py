@@ -0,0 +1,150 @@
+import numpy as np
+from .constants import DEFAULT_SCALE
+
+MIN_GRADE = 1.0
+MAX_GRADE = 6.0
+PASS_GRADE = 4.0
+
+# Formulas of the built-in scales (note = slope * percentage + intercept).
+# Class configs written before scales carried their own definition only store
+# 'threshold' and 'label', so these are used as fallback by name.
+LEGACY_LINEAR_SCALES = {
+    '60% Scale': (5.0, 1.0),
+    '66% Scale': (6.0, 0.0),
+    '50% Scale': (4.0, 2.0),
+}
+
+
+def build_scale(name, spec):
+    """
+    Turn one entry of config['scales'] into a scale definition.
+
+    Supported types:
+    - 'linear':    note = slope * percentage + intercept
+    - 'threshold': knee scale, note 4 at 'threshold', linear below and above
+    - 'table':     lookup table [[min_percentage, note], ...] (Notenschlüssel)
+    Entries without a type are legacy configs and use the built-in formula.
+    """
+    spec = spec or {}
+    scale_type = spec.get('type')
+    scale = {'name': name, 'label': spec.get('label', name)}
+
+    if scale_type == 'threshold':
+        threshold = float(spec.get('threshold', 0.6))
+        scale['type'] = 'threshold'
+        scale['x'] = np.array([0.0, threshold, 1.0])
+        scale['y'] = np.array([MIN_GRADE, PASS_GRADE, MAX_GRADE])
+    elif scale_type == 'table':
+        rows = sorted((float(p), float(n)) for p, n in spec.get('table', []))
+        scale['type'] = 'table'
+        scale['x'] = np.array([p for p, _ in rows])
+        scale['y'] = np.array([n for _, n in rows])
+    elif scale_type == 'linear':
+        scale['type'] = 'linear'
+        scale['slope'] = float(spec.get('slope', 5.0))
+        scale['intercept'] = float(spec.get('intercept', 1.0))
+    else:
+        slope, intercept = LEGACY_LINEAR_SCALES.get(name, LEGACY_LINEAR_SCALES[DEFAULT_SCALE])
+        scale['type'] = 'linear'
+        scale['slope'] = slope
+        scale['intercept'] = intercept
+    return scale
+
+
+def resolve_scale(scale, scales_config=None):
+    """Accept a scale definition or a scale name; unknown names fall back to the default formula."""
+    if isinstance(scale, dict) and 'type' in scale:
+        return scale
+    name = scale or DEFAULT_SCALE
+    return build_scale(name, (scales_config or {}).get(name))
+
+
+def calculate_grades(points_array, max_points, scale=DEFAULT_SCALE, scales_config=None):
+    """
+    Vectorized grading of a whole column of points.
+
+    points_array: sequence of points (None/NaN = no grade)
+    max_points:   scalar or array with the same length
+    Returns a float array of notes rounded to 0.1, NaN where no grade can be computed.
+    """
+    scale = resolve_scale(scale, scales_config)
+    points = np.asarray(points_array, dtype=float)
+    max_p = np.asarray(max_points, dtype=float)
+
+    valid_max = np.broadcast_to(max_p > 0, points.shape)
+    percentage = np.divide(points, max_p, out=np.full(points.shape, np.nan), where=valid_max)
+
+    if scale['type'] == 'linear':
+        notes = percentage * scale['slope'] + scale['intercept']
+    elif scale['type'] == 'threshold':
+        notes = np.interp(percentage, scale['x'], scale['y'])
+        notes[np.isnan(percentage)] = np.nan
+    else:
+        idx = np.searchsorted(scale['x'], percentage, side='right') - 1
+        table_notes = scale['y'][np.clip(idx, 0, None)] if len(scale['y']) else np.full(points.shape, MIN_GRADE)
+        notes = np.where(idx >= 0, table_notes, MIN_GRADE)
+        notes[np.isnan(percentage)] = np.nan
+
+    notes = np.clip(notes, MIN_GRADE, MAX_GRADE)
+    # round() per value, as calculate_grade always did: it rounds the exact binary value
+    # (1.15 is 1.1499...), np.round and half-up rounding do not, and stored grades would change on regrade
+    return np.array([round(note, 1) for note in notes.tolist()])
+
+
+# --- REGRADE ---
+
+def compute_regrade(assignments, scales_config=None):
+    """
+    Recompute the grades of all given assignments from their stored points.
+
+    All points are graded in one vectorized pass per scale. Returns (changes, skipped):
+    changes: list of {'assignment_id', 'assignment', 'subject', 'student_id', 'old', 'new'}
+    skipped: number of grades without stored points (legacy entries, left untouched)
+    """
+    rows = []  # (assignment index, student id)
+    points, max_points, scale_names = [], [], []
+    skipped = 0
+
+    for idx, a in enumerate(assignments):
+        skipped += sum(1 for sid in a['grades'] if sid not in a['points'])
+        for sid, p in a['points'].items():
+            rows.append((idx, sid))
+            points.append(p)
+            max_points.append(a['maxPoints'])
+            scale_names.append(a['scaleType'])
+
+    if not rows:
+        return [], skipped
+
+    points = np.array(points)
+    max_points = np.array(max_points)
+    scale_names = np.array(scale_names)
+    new_notes = np.full(len(rows), np.nan)
+    for name in np.unique(scale_names):
+        mask = scale_names == name
+        new_notes[mask] = calculate_grades(points[mask], max_points[mask], name, scales_config)
+
+    changes = []
+    for (idx, sid), new in zip(rows, new_notes.tolist()):
+        if np.isnan(new):
+            continue  # No valid maxPoints - keep the stored grade
+        a = assignments[idx]
+        old = a['grades'].get(sid)
+        if old == new:
+            continue
+        changes.append({
+            'assignment_id': a['id'],
+            'assignment': a['name'],
+            'subject': a['subject'],
+            'student_id': sid,
+            'old': old,
+            'new': new
+        })
+    return changes, skipped
+
+
+def apply_regrade(assignments, changes):
+    """Write the result of compute_regrade back into the assignment dicts"""
+    by_id = {a['id']: a for a in assignments}
+    for c in changes:
+        by_id[c['assignment_id']]['grades'][c['student_id']] = c['new']
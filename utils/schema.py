@@ -0,0 +1,136 @@
+import math
+from datetime import datetime
+from .constants import DEFAULT_SCALE, DEFAULT_CONFIG
+
+# Versioned schema of the class files.
+# Every class folder has a meta.json with its schema_version; folders without one
+# are version 0. MIGRATIONS[n] upgrades data from version n to n + 1 in place and
+# runs once on load, afterwards the upgraded files are written back. Code reading
+# the data can then rely on the current schema:
+#
+#   student:    id, Vorname, Nachname, Anmeldename (stripped strings)
+#   assignment: id, name, subject, type, date (ISO string), weight, maxPoints (numbers),
+#               scaleType, url (strings), grades / points ({student id: float}),
+#               comments ({student id: non-empty string})
+#
+# Grades that exist without points (entered before points were stored) stay as
+# they are: the points cannot be reconstructed, editors show them as empty.
+
+SCHEMA_VERSION = 1
+META_FILE = "meta.json"
+
+
+def _to_float(value):
+    """float or None for numbers and numeric strings; None, '', NaN and text give None"""
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _to_number(value, default):
+    """Keep ints/floats as they are, parse strings, fall back to default"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    number = _to_float(value)
+    return default if number is None else number
+
+
+def _float_values(values):
+    return {sid: number for sid, value in (values or {}).items() if (number := _to_float(value)) is not None}
+
+
+def _migrate_v0_to_v1(data):
+    """Fill missing fields, parse numbers stored as text, drop empty grades and comments"""
+    # Assignments without a subject go to the first subject of the class
+    default_subject = ((data.get('config') or {}).get('subjects') or DEFAULT_CONFIG['subjects'])[0]
+    for s in data['students']:
+        for field in ('id', 'Vorname', 'Nachname', 'Anmeldename'):
+            s[field] = str(s.get(field) or "").strip()
+
+    # Assignments without an id get one from their position in the file: the same
+    # legacy file always gets the same ids, and they never collide with existing ones
+    used_ids = {str(a['id']) for a in data['assignments'] if a.get('id')}
+    for i, a in enumerate(data['assignments']):
+        if a.get('id'):
+            a['id'] = str(a['id'])
+        else:
+            a['id'] = f"assignment_legacy_{i}"
+            while a['id'] in used_ids:
+                a['id'] += "_"
+            used_ids.add(a['id'])
+        a.setdefault('name', "")
+        a.setdefault('type', "")
+        a['subject'] = a.get('subject') or default_subject
+        a['date'] = a.get('date') or datetime.now().isoformat()
+        a['weight'] = _to_number(a.get('weight'), 1.0)
+        a['maxPoints'] = _to_number(a.get('maxPoints'), 100)
+        a['scaleType'] = a.get('scaleType') or DEFAULT_SCALE
+        a['url'] = (a.get('url') or "").strip()
+        a['grades'] = _float_values(a.get('grades'))
+        a['points'] = _float_values(a.get('points'))
+        a['comments'] = {
+            sid: str(text).strip() for sid, text in (a.get('comments') or {}).items()
+            if text is not None and str(text).strip()
+        }
+
+
+MIGRATIONS = [_migrate_v0_to_v1]
+
+
+def migrate_class_data(data, version):
+    """
+    Upgrade loaded class data (dict from load_class_data) from `version` to SCHEMA_VERSION in place.
+    Returns True if a migration ran and the files should be written back.
+    """
+    for step in MIGRATIONS[version:SCHEMA_VERSION]:
+        step(data)
+    return version < SCHEMA_VERSION
+
+
+# --- VALIDATION ---
+
+def validate_class_data(data, subjects=None):
+    """
+    Consistency checks of loaded class data (current schema).
+    Returns a list of (level, message) with level 'error' (data is wrong) or
+    'warning' (allowed, but worth a look, e.g. grades of removed students).
+    """
+    from .scales import MIN_GRADE, MAX_GRADE
+
+    problems = []
+    student_ids, logins = set(), set()
+    for s in data['students']:
+        if not s['id']:
+            problems.append(('error', f"Schüler/in ohne ID: {s['Vorname']} {s['Nachname']}"))
+        elif s['id'] in student_ids:
+            problems.append(('error', f"Doppelte Schüler-ID: {s['id']}"))
+        if s['Anmeldename'] and s['Anmeldename'] in logins:
+            problems.append(('error', f"Doppelter Anmeldename: {s['Anmeldename']}"))
+        student_ids.add(s['id'])
+        logins.add(s['Anmeldename'])
+
+    assignment_ids = set()
+    for a in data['assignments']:
+        label = f"{a['name'] or a['id']} ({a['subject']})"
+        if a['id'] in assignment_ids:
+            problems.append(('error', f"Doppelte Prüfungs-ID: {a['id']}"))
+        assignment_ids.add(a['id'])
+        if subjects is not None and a['subject'] not in subjects:
+            problems.append(('warning', f"{label}: Fach nicht in der Klassenkonfiguration"))
+        if not a['maxPoints'] or a['maxPoints'] <= 0:
+            problems.append(('error', f"{label}: ungültige Maximalpunktzahl {a['maxPoints']}"))
+
+        out_of_range = [sid for sid, g in a['grades'].items() if not MIN_GRADE <= g <= MAX_GRADE]
+        if out_of_range:
+            problems.append(('error', f"{label}: {len(out_of_range)} Noten ausserhalb {MIN_GRADE}–{MAX_GRADE}"))
+        bad_points = [sid for sid, p in a['points'].items() if p < 0 or (a['maxPoints'] and p > a['maxPoints'])]
+        if bad_points:
+            problems.append(('error', f"{label}: {len(bad_points)} Punktzahlen ausserhalb 0–{a['maxPoints']}"))
+        unknown = set(a['grades']) - student_ids
+        if unknown:
+            problems.append(('warning', f"{label}: {len(unknown)} Noten von Schüler/innen, die nicht mehr in der Klasse sind"))
+    return problems
@@ -0,0 +1,202 @@
+import glob
+import json
+import os
+import shutil
+import stat
+from datetime import datetime
+from .constants import DATA_DIR, BACKUP_DIR, CLASSES_DIR, CLASSES_REGISTRY_FILE, GLOBAL_CONFIG_FILE, DEFAULT_CONFIG
+from .schema import SCHEMA_VERSION, META_FILE, migrate_class_data
+from .compact import compact_class_data, to_json
+from . import perf
+
+# Plain file storage without Streamlit, usable from worker processes and scripts.
+
+CLASS_FILES = {
+    'students': "students.json",
+    'assignments': "assignments.json",
+    'email_log': "email_log.json",
+    'audit_log': "audit_log.json",
+}
+
+# Single grade changes are appended here instead of rewriting assignments.json;
+# the journal is replayed on load and cleared by the next full save.
+JOURNAL_FILE = "journal.jsonl"
+
+
+def load_json(filepath, default=None):
+    try:
+        if os.path.exists(filepath):
+            with open(filepath, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                if perf.active():
+                    perf.record_io('load', os.fstat(f.fileno()).st_size)
+                return data
+    except: pass
+    return default if default is not None else []
+
+def save_json(filepath, data):
+    try:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False, default=to_json)
+            if perf.active():
+                perf.record_io('save', f.tell())
+        return True
+    except: return False
+
+@perf.counted
+def load_class_data(class_id):
+    """
+    Load all files of a class folder into one dict:
+    students, assignments, email_log, audit_log, config,
+    migrated (schema upgraded on load), journal (replayed journal entries).
+    Grades, points and log events are in the compact form of utils.compact.
+    Returns None if the folder does not exist.
+    """
+    class_path = os.path.join(CLASSES_DIR, class_id)
+    if not os.path.exists(class_path):
+        return None
+
+    data = {key: load_json(os.path.join(class_path, filename), []) for key, filename in CLASS_FILES.items()}
+    class_config = load_json(os.path.join(class_path, "config.json"), None)
+    data['config'] = class_config if class_config else load_json(GLOBAL_CONFIG_FILE, DEFAULT_CONFIG)
+    # True if the files were upgraded to the current schema and should be written back
+    version = load_json(os.path.join(class_path, META_FILE), {}).get('schema_version', 0)
+    data['migrated'] = migrate_class_data(data, version)
+    # Number of replayed journal entries (> 0: assignments.json is behind the journal)
+    data['journal'] = apply_journal(data['assignments'], read_journal(class_id), data['audit_log'])
+    compact_class_data(data)
+    return data
+
+def save_class_data(class_id, data):
+    """
+    Write a class dict (as returned by load_class_data) back to its folder:
+    all class files and config, then the schema version; the journal is cleared
+    once assignments.json and audit_log.json hold its changes. Returns True if every file was written.
+    """
+    class_path = os.path.join(CLASSES_DIR, class_id)
+    os.makedirs(class_path, exist_ok=True)
+    success = save_json(os.path.join(class_path, "config.json"), data['config'])
+    saved = {key: save_json(os.path.join(class_path, filename), data[key]) for key, filename in CLASS_FILES.items()}
+    if saved['assignments'] and saved['audit_log']:
+        clear_journal(class_id)
+        save_schema_version(class_id)
+    return success and all(saved.values())
+
+def load_class_registry():
+    """Registry entries ({'id', 'name', 'created_at', 'archived'?}) of all classes"""
+    registry = load_json(CLASSES_REGISTRY_FILE, [])
+    # Optional: Filter for demo mode if env var is set
+    if os.environ.get("DEMO_MODE") == "TRUE":
+        return [c for c in registry if c['id'] == "class_demo_2025"]
+    return registry
+
+def audit_event(action, details, user='Teacher'):
+    """One audit log entry; logs are stored newest first"""
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'user': user,  # Placeholder for future auth
+        'action': action,
+        'details': details
+    }
+
+def class_signature(class_id):
+    """Cheap change marker of a class folder: (file count, newest modification time)"""
+    try:
+        with os.scandir(os.path.join(CLASSES_DIR, class_id)) as entries:
+            mtimes = [e.stat().st_mtime_ns for e in entries if e.is_file()]
+    except OSError:
+        return (0, 0)
+    return (len(mtimes), max(mtimes, default=0))
+
+def save_schema_version(class_id):
+    return save_json(os.path.join(CLASSES_DIR, class_id, META_FILE), {'schema_version': SCHEMA_VERSION})
+
+# --- BACKUP ---
+
+@perf.phase("backup")
+def create_backup(auto=False, note=""):
+    """Create a full system backup"""
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        backup_name = f"backup_{'auto' if auto else 'manual'}_{timestamp}"
+        backup_path = os.path.join(BACKUP_DIR, backup_name)
+        
+        if os.path.exists(DATA_DIR):
+            shutil.copytree(DATA_DIR, backup_path)
+        
+        if note:
+            with open(os.path.join(backup_path, "note.txt"), "w", encoding="utf-8") as f:
+                f.write(note)
+        
+        # --- FIX STARTS HERE ---
+        # Helper function to remove read-only files on Windows
+        def on_rm_error(func, path, exc_info):
+            os.chmod(path, stat.S_IWRITE)
+            func(path)
+
+        # Cleanup retention (Keep last 30)
+        backups = sorted(glob.glob(os.path.join(BACKUP_DIR, "backup_*")))
+        if len(backups) > 30:
+            for old in backups[:-30]:
+                # Use the helper function to force delete
+                shutil.rmtree(old, onerror=on_rm_error)
+        # --- FIX ENDS HERE ---
+                
+        return True, f"Backup erstellt: {timestamp}"
+    except Exception as e:
+        return False, str(e)
+
+# --- GRADE JOURNAL ---
+
+def read_journal(class_id):
+    """All journal entries of a class, oldest first. Unreadable lines are skipped."""
+    entries = []
+    try:
+        with open(os.path.join(CLASSES_DIR, class_id, JOURNAL_FILE), 'r', encoding='utf-8') as f:
+            for line in f:
+                try: entries.append(json.loads(line))
+                except ValueError: continue
+    except OSError: pass
+    return entries
+
+def append_journal(class_id, entries):
+    """
+    Append journal entries: grade changes {'assignment_id', 'student_id', 'grade'[, 'points']}
+    (None = removed) and audit events {'audit': event}
+    """
+    try:
+        with open(os.path.join(CLASSES_DIR, class_id, JOURNAL_FILE), 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+        return True
+    except OSError: return False
+
+def clear_journal(class_id):
+    path = os.path.join(CLASSES_DIR, class_id, JOURNAL_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+def apply_journal(assignments, entries, audit_log=None):
+    """
+    Apply journal entries to the assignment dicts through an id index; audit events are
+    put in front of `audit_log` (newest first). Returns the number applied.
+    """
+    by_id = {a['id']: a for a in assignments}
+    applied = 0
+    for e in entries:
+        if 'audit' in e:
+            if audit_log is not None:
+                audit_log.insert(0, e['audit'])
+                applied += 1
+            continue
+        assignment = by_id.get(e['assignment_id'])
+        if assignment is None:
+            continue
+        for field, key in (('grades', 'grade'), ('points', 'points')):
+            if key not in e:
+                continue  # entries written before points were journaled carry only the grade
+            if e[key] is None:
+                assignment[field].pop(e['student_id'], None)
+            else:
+                assignment[field][e['student_id']] = e[key]
+        applied += 1
+    return applied
@@ -39,14 +39,14 @@ def render_template(template, student, subject_name, weighted_avg, assignments,
     grades_list_text = ""
     for a in assignments:
         grade = a['grades'].get(student['id'])
-        comment = a.get('comments', {}).get(student['id'], "")
+        comment = a['comments'].get(student['id'], "")
         
         # Include if grade exists OR comment exists (e.g. "not graded")
         if grade or comment:
             date_str = datetime.fromisoformat(a['date']).strftime("%d.%m.%Y")
             
             # Text Version
-            link_txt = f" (LMS: {a['url']})" if a.get('url') else ""
+            link_txt = f" (LMS: {a['url']})" if a['url'] else ""
             grade_display = str(grade) if grade else "-"
             comment_txt = f" [{comment}]" if comment else ""
             
@@ -56,13 +56,13 @@ def render_template(template, student, subject_name, weighted_avg, assignments,
     rows_html = ""
     for a in assignments:
         grade = a['grades'].get(student['id'])
-        comment = a.get('comments', {}).get(student['id'], "")
+        comment = a['comments'].get(student['id'], "")
         
         if grade or comment:
             date_str = datetime.fromisoformat(a['date']).strftime("%d.%m.%Y")
             
             # HTML Version: Clickable Name if URL exists
-            if a.get('url'):
+            if a['url']:
                 display_name = f'<a href="{a["url"]}" target="_blank" style="color: #007BFF; text-decoration: none; font-weight: bold;">{a["name"]} 🔗</a>'
             else:
                 display_name = a['name']